@@ -1,7 +1,12 @@
 # scripts/base_speech.py
 
 import os
-from melo.api import TTS
+import sys
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if repo_root not in sys.path:
+    sys.path.append(repo_root)
+from vocomate_app.utils.model_registry import get_melo_tts
 
 def generate_base_speech(
     text,
@@ -15,8 +20,8 @@ def generate_base_speech(
     if not os.path.exists(output_dir):
         os.makedirs(output_dir, exist_ok=True)
 
-    # Initialize TTS engine
-    tts = TTS(language=language, device="auto")
+    # Reuse the resident TTS engine for this language
+    tts = get_melo_tts(language)
 
     # Get speaker ID (print available speakers for reference)
     speaker_ids = tts.hps.data.spk2id
@@ -0,0 +1,183 @@
+#batch_transcribe
+"""
+Transcribes every audio file under a directory across a process pool, one
+resident Whisper per worker.
+
+Results are appended to a JSONL file as each file finishes, and every finished
+file is recorded in a manifest next to it, so a rerun after a crash (or Ctrl-C)
+only does the files that are left. ``--vad-gate`` runs Silero first and skips
+files without speech instead of paying a Whisper pass on silence.
+
+    python scripts/batch_transcribe.py recordings/ --output transcripts.jsonl --workers 4 --vad-gate
+    python scripts/batch_transcribe.py recordings/ --output transcripts.jsonl   # resumes
+
+Throughput is reported as audio-hours per wall-hour.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(REPO_ROOT)
+from vocomate_app.utils.cpu_scheduler import available_cpus
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".flac", ".ogg", ".opus", ".webm", ".mp4", ".aac")
+SAMPLE_RATE = 16000
+
+
+def find_audio(root, extensions=AUDIO_EXTENSIONS):
+    """Audio files under ``root``, largest first so long files don't end up alone at the tail."""
+    found = []
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name.lower().endswith(extensions):
+                path = os.path.join(directory, name)
+                found.append((os.path.getsize(path), path))
+    return [path for _, path in sorted(found, reverse=True)]
+
+
+def read_manifest(path):
+    """``{audio path: entry}`` of the files a previous run finished (a torn last line is ignored)."""
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            done[entry["path"]] = entry
+    return done
+
+
+def append_line(f, record):
+    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    f.flush()
+    os.fsync(f.fileno())
+
+
+# --- Worker processes ---
+
+_worker = {}
+
+
+def _init_worker(model_size, threads, vad_gate):
+    from vocomate_app.utils.cpu_scheduler import CpuScheduler, set_scheduler
+    from vocomate_app.utils.model_registry import get_silero_vad, get_whisper_model
+
+    set_scheduler(CpuScheduler(plan={"transcribe": threads, "vad": 1}))
+    _worker["model_size"] = model_size
+    get_whisper_model(model_size)
+    if vad_gate:
+        get_silero_vad()
+
+
+def _transcribe_file(path, language, vad_gate, decode_options):
+    from vocomate_app.asr.whisper_asr import transcribe
+    from vocomate_app.utils.vad import analyze_speech, load_audio
+
+    began = time.perf_counter()
+    # Decode once; VAD and Whisper both work on the same samples
+    audio, _ = load_audio(path, SAMPLE_RATE)
+    audio = audio.numpy()
+    record = {"path": path, "duration": round(len(audio) / SAMPLE_RATE, 3)}
+    if vad_gate:
+        timestamps, _ = analyze_speech(audio, SAMPLE_RATE)
+        if not timestamps:
+            return {**record, "status": "no_speech", "text": "", "seconds": time.perf_counter() - began}
+    result = transcribe(audio, model_size=_worker["model_size"], language=language, fp16=False, **decode_options)
+    return {
+        **record,
+        "status": "ok",
+        "language": result.get("language"),
+        "text": result["text"].strip(),
+        "segments": [{"start": round(s["start"], 3), "end": round(s["end"], 3), "text": s["text"].strip()}
+                     for s in result.get("segments", [])],
+        "seconds": time.perf_counter() - began,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-transcribe a directory of recordings")
+    parser.add_argument("input_dir")
+    parser.add_argument("--output", default="transcripts.jsonl", help="JSONL results, appended")
+    parser.add_argument("--manifest", help="Finished files (default: <output>.manifest)")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--language", help="Skip per-file language detection")
+    parser.add_argument("--workers", type=int, help="Processes (default: one per 2 CPUs)")
+    parser.add_argument("--threads", type=int, help="Torch threads per worker (default: CPUs / workers)")
+    parser.add_argument("--vad-gate", action="store_true", help="Skip files without speech")
+    parser.add_argument("--beam-size", type=int, help="Beam search instead of greedy decoding")
+    parser.add_argument("--retry-failed", action="store_true", help="Redo files that errored in a previous run")
+    args = parser.parse_args()
+
+    cpus = len(available_cpus())
+    workers = args.workers or max(1, cpus // 2)
+    threads = args.threads or max(1, cpus // workers)
+    manifest_path = args.manifest or f"{args.output}.manifest"
+    decode_options = {"beam_size": args.beam_size} if args.beam_size else {}
+
+    done = read_manifest(manifest_path)
+    if args.retry_failed:
+        done = {path: entry for path, entry in done.items() if entry["status"] != "error"}
+    files = [path for path in find_audio(os.path.abspath(args.input_dir)) if path not in done]
+    print(f"{len(files)} files to transcribe ({len(done)} already done), {workers} workers x {threads} threads",
+          file=sys.stderr)
+    if not files:
+        return
+
+    counts = {"ok": 0, "no_speech": 0, "error": 0}
+    audio_seconds = 0.0
+    began = time.perf_counter()
+    with open(args.output, "a", encoding="utf-8") as output, open(manifest_path, "a") as manifest, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                initargs=(args.model, threads, args.vad_gate)) as executor:
+        pending = {}
+        remaining = iter(files)
+
+        def submit():
+            path = next(remaining, None)
+            if path is not None:
+                pending[executor.submit(_transcribe_file, path, args.language, args.vad_gate,
+                                        decode_options)] = path
+
+        # A couple of files per worker in flight: workers never wait, memory stays bounded
+        for _ in range(2 * workers):
+            submit()
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                path = pending.pop(future)
+                try:
+                    record = future.result()
+                except BrokenProcessPool:
+                    raise  # a worker died (e.g. out of memory): leave the rest for the rerun
+                except Exception as e:
+                    record = {"path": path, "status": "error", "error": f"{type(e).__name__}: {e}"}
+                # Result first, then manifest: a crash in between redoes the file rather than losing it
+                if record["status"] != "error":
+                    append_line(output, record)
+                append_line(manifest, {key: record[key] for key in ("path", "status", "duration", "error")
+                                       if key in record})
+                counts[record["status"]] += 1
+                audio_seconds += record.get("duration", 0.0)
+                submit()
+
+                processed = sum(counts.values())
+                wall = time.perf_counter() - began
+                print(f"[{processed}/{len(files)}] {record['status']:<9} {os.path.relpath(path, args.input_dir)} "
+                      f"({audio_seconds / wall:.1f}x real time)", file=sys.stderr)
+
+    wall = time.perf_counter() - began
+    print(f"\n{counts['ok']} transcribed, {counts['no_speech']} without speech, {counts['error']} failed")
+    print(f"{audio_seconds / 3600:.2f} audio-hours in {wall / 3600:.3f} wall-hours: "
+          f"{audio_seconds / wall:.1f} audio-hours per wall-hour")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#bench_asr_fast
+"""
+Accuracy/speed report for the Whisper CPU modes: word error rate against the
+bundled test set, real-time factor (transcribe seconds / audio seconds), load
+time and model size for each model variant x decoding preset.
+
+The test set is ``vocomate_app/assets/asr_testset/sentences.txt`` rendered with
+MeloTTS (several speakers and speeds, cached under ``rendered/``); pass
+``--audio-dir`` to use real recordings instead (``name.wav`` + ``name.txt`` pairs).
+Language detection runs once and is reused for the rest of the set, as in a session.
+
+    python scripts/bench_asr_fast.py --models base,base-int8,small,small-int8 --decoding default,fast,accurate
+"""
+import argparse
+import csv
+import glob
+import os
+import re
+import sys
+import time
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+import soundfile as sf
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(REPO_ROOT)
+from vocomate_app.asr.whisper_asr import DECODING_PRESETS, decoding_preset, session_languages, transcribe
+from vocomate_app.utils.audio_frames import resample
+from vocomate_app.utils.model_registry import registry
+
+TESTSET_DIR = os.path.join(REPO_ROOT, 'vocomate_app', 'assets', 'asr_testset')
+COLUMNS = ["model", "decoding", "utterances", "audio_seconds", "wer", "rtf", "load_seconds", "model_mb"]
+
+
+def normalize(text):
+    text = re.sub(r"[^\w\s']", " ", text.lower())
+    return text.split()
+
+
+def word_errors(reference, hypothesis):
+    """Word-level edit distance (substitutions + deletions + insertions)."""
+    ref, hyp = normalize(reference), normalize(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, word in enumerate(ref, 1):
+        current = [i]
+        for j, guess in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (word != guess)))
+        previous = current
+    return previous[-1], len(ref)
+
+
+def render_testset(speakers, speeds):
+    """Renders the bundled sentences with MeloTTS once; returns ``[(wav path, reference text)]``."""
+    with open(os.path.join(TESTSET_DIR, "sentences.txt"), encoding="utf-8") as f:
+        sentences = [line.strip() for line in f if line.strip()]
+    out_dir = os.path.join(TESTSET_DIR, "rendered")
+    pairs = []
+    for speaker in speakers:
+        for speed in speeds:
+            for i, sentence in enumerate(sentences):
+                path = os.path.join(out_dir, f"{speaker}_{speed:g}_{i:02d}.wav")
+                if not os.path.exists(path):
+                    from vocomate_app.tts.melo_tts import synthesize_base
+                    os.makedirs(out_dir, exist_ok=True)
+                    audio, sr, _ = synthesize_base(sentence, "EN", speaker, speed)
+                    sf.write(path, audio, sr)
+                pairs.append((path, sentence))
+    return pairs
+
+
+def load_pairs(audio_dir):
+    pairs = []
+    for path in sorted(glob.glob(os.path.join(audio_dir, "*.wav"))):
+        with open(os.path.splitext(path)[0] + ".txt", encoding="utf-8") as f:
+            pairs.append((path, f.read().strip()))
+    return pairs
+
+
+def load_audio16(path):
+    audio, sr = sf.read(path, dtype="float32", always_2d=True)
+    return resample(audio.mean(axis=1), sr, 16000)
+
+
+def bench(model_size, presets, testset):
+    registry.evict("whisper", model_size)
+    began = time.perf_counter()
+    registry.get("whisper", model_size)
+    load_seconds = time.perf_counter() - began
+    entry = next(m for m in registry.stats()["models"] if m["kind"] == "whisper" and m["key"] == model_size)
+    model_mb = entry["bytes"] / (1024 * 1024)
+    audio_seconds = sum(len(audio) for audio, _ in testset) / 16000
+    transcribe(testset[0][0], model_size=model_size, fp16=False)  # warm-up pass
+    for preset in presets:
+        session_languages.forget("bench")
+        errors = words = 0
+        run = 0.0
+        for audio, reference in testset:
+            began = time.perf_counter()
+            result = transcribe(audio, model_size=model_size, session_id="bench", fp16=False,
+                                **decoding_preset(preset))
+            run += time.perf_counter() - began
+            e, n = word_errors(reference, result["text"])
+            errors += e
+            words += n
+        yield [model_size, preset, len(testset), audio_seconds, errors / max(1, words), run / audio_seconds,
+               load_seconds, model_mb]
+    registry.evict("whisper", model_size)
+
+
+def format_table(rows):
+    cells = [COLUMNS] + [[f"{v:.3f}" if isinstance(v, float) else str(v) for v in row] for row in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(COLUMNS))]
+    return "\n".join("  ".join(c.rjust(w) for c, w in zip(row, widths)) for row in cells)
+
+
+def _csv_list(value, cast=str):
+    return [cast(v) for v in value.split(",") if v]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Whisper CPU modes: WER vs real-time factor")
+    parser.add_argument("--models", default="base,base-int8,small,small-int8")
+    parser.add_argument("--decoding", default="default,fast,accurate", help=f"Presets: {','.join(DECODING_PRESETS)}")
+    parser.add_argument("--threads", type=int, help="torch threads (default: torch's choice)")
+    parser.add_argument("--audio-dir", help="Real recordings (name.wav + name.txt) instead of the rendered set")
+    parser.add_argument("--speakers", default="EN-Default,EN-US,EN-BR", help="MeloTTS speakers for the rendered set")
+    parser.add_argument("--speeds", default="0.9,1.1")
+    parser.add_argument("--csv", help="Also write the rows to this CSV file")
+    args = parser.parse_args()
+
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+    pairs = load_pairs(args.audio_dir) if args.audio_dir else render_testset(_csv_list(args.speakers),
+                                                                             _csv_list(args.speeds, float))
+    testset = [(load_audio16(path), reference) for path, reference in pairs]
+    rows = []
+    for model_size in _csv_list(args.models):
+        for row in bench(model_size, _csv_list(args.decoding), testset):
+            rows.append(row)
+            print(" ".join(f"{c}={v:.3f}" if isinstance(v, float) else f"{c}={v}" for c, v in zip(COLUMNS, row)),
+                  flush=True)
+    print()
+    print(format_table(rows))
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            writer.writerows(rows)
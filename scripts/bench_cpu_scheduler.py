@@ -0,0 +1,131 @@
+#bench_cpu_scheduler
+"""
+Throughput of concurrent voice sessions with and without per-stage CPU budgets.
+
+Every session runs turns of transcribe -> (synthesis -> conversion) x sentences on its
+own thread, the way overlapping sessions do in the UI/server. Modes:
+
+    default  -- no scheduling: every stage uses torch's default (all cores)
+    budgets  -- CpuScheduler thread budgets per stage
+    pinned   -- budgets plus disjoint CPU sets per stage (Linux)
+
+    python scripts/bench_cpu_scheduler.py --sessions 1,2,4 --turns 3
+    python scripts/bench_cpu_scheduler.py --models --sessions 2   # real Whisper/MeloTTS/OpenVoice
+
+Without --models each stage is a torch matmul workload of comparable shape, so the
+contention is real but no model downloads are needed.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(REPO_ROOT)
+from vocomate_app.utils.cpu_scheduler import CpuScheduler, cpu_stage, parse_plan, set_scheduler
+
+SENTENCES = [
+    "Sure, I can help with that.",
+    "The weather today is mild with a light breeze from the west.",
+    "Tomorrow should be sunny again, so it is a good day for a walk.",
+]
+# Matmul repetitions per synthetic stage call (roughly Whisper > OpenVoice > MeloTTS per sentence)
+SYNTHETIC_WORK = {"transcribe": 24, "synthesis": 8, "conversion": 10}
+
+
+def synthetic_stages(size=384):
+    import torch
+
+    a = torch.randn(size, size)
+
+    def work(stage):
+        with cpu_stage(stage):
+            for _ in range(SYNTHETIC_WORK[stage]):
+                torch.mm(a, a)
+
+    return {
+        "transcribe": lambda: work("transcribe"),
+        "speak": lambda text: (work("synthesis"), work("conversion")),
+    }
+
+
+def model_stages():
+    import numpy as np
+    from vocomate_app.asr.whisper_asr import transcribe
+    from vocomate_app.tts.melo_tts import synthesize_base
+    from vocomate_app.tts.pipeline import synthesize_speech
+    from vocomate_app.utils.audio_frames import resample
+
+    audio, sr, _ = synthesize_base(" ".join(SENTENCES))
+    audio16 = resample(np.asarray(audio, dtype=np.float32), sr, 16000)
+    return {
+        "transcribe": lambda: transcribe(audio16, fp16=False, language="en"),
+        "speak": lambda text: synthesize_speech(text),
+    }
+
+
+def run_sessions(stages, sessions, turns):
+    latencies = []
+    lock = threading.Lock()
+
+    def session():
+        for _ in range(turns):
+            began = time.perf_counter()
+            stages["transcribe"]()
+            for sentence in SENTENCES:
+                stages["speak"](sentence)
+            with lock:
+                latencies.append(time.perf_counter() - began)
+
+    threads = [threading.Thread(target=session) for _ in range(sessions)]
+    began = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - began
+    latencies.sort()
+    return {
+        "sessions": sessions,
+        "turns": len(latencies),
+        "wall_seconds": wall,
+        "turns_per_minute": 60 * len(latencies) / wall,
+        "turn_p50": latencies[len(latencies) // 2],
+        "turn_max": latencies[-1],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent-session throughput with per-stage CPU budgets")
+    parser.add_argument("--sessions", default="1,2,4")
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--modes", default="default,budgets,pinned")
+    parser.add_argument("--plan", default="", help='Explicit budgets, e.g. "transcribe=4,synthesis=2,conversion=2"')
+    parser.add_argument("--models", action="store_true", help="Use the real models instead of synthetic workloads")
+    args = parser.parse_args()
+
+    stages = model_stages() if args.models else synthetic_stages()
+    plan = parse_plan(args.plan) or None
+    schedulers = {
+        "default": None,
+        "budgets": CpuScheduler(plan=plan),
+        "pinned": CpuScheduler(plan=plan, pin=True),
+    }
+    set_scheduler(None)
+    stages["transcribe"]()  # warm-up (thread pools, model load)
+    results = []
+    for mode in args.modes.split(","):
+        set_scheduler(schedulers[mode])
+        for sessions in (int(n) for n in args.sessions.split(",")):
+            result = {"mode": mode, **run_sessions(stages, sessions, args.turns)}
+            results.append(result)
+            print(f"{mode:8s} sessions={sessions}  {result['turns_per_minute']:.1f} turns/min  "
+                  f"p50 {result['turn_p50']:.2f}s  max {result['turn_max']:.2f}s", flush=True)
+    set_scheduler(None)
+    print(json.dumps({
+        "cpus": os.cpu_count(),
+        "budgets": {mode: s.stats()["budgets"] for mode, s in schedulers.items() if s},
+        "results": results,
+    }, indent=2))
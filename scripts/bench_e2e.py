@@ -0,0 +1,286 @@
+#bench_e2e
+"""
+End-to-end latency benchmark of the voice loop: recording -> decode -> VAD ->
+Whisper -> streamed LLM -> sentence-pipelined MeloTTS + OpenVoice.
+
+The LLM is a local stand-in Ollama server (llm/stub_server.py) with a configurable
+token rate unless --ollama-url is given, so runs are reproducible. With
+--stub-models, ASR/VAD/TTS are simulated too and the harness runs in seconds
+without any model downloads.
+
+    python scripts/bench_e2e.py --stub-models --turns 20 --output bench.json
+    python scripts/bench_e2e.py --inputs recordings/*.wav --tokens-per-second 25
+    python scripts/bench_e2e.py --stub-models --compare bench.json   # diff against a previous run
+
+Reports p50/p95 per stage, time to first audio (from end of user speech) and peak RSS as JSON.
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import soundfile as sf
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(REPO_ROOT)
+from bench_sentence_pipeline import stub_synthesize
+from vocomate_app.context.conversation import ConversationContext
+from vocomate_app.llm.ollama_client import OllamaClient
+from vocomate_app.llm.stub_server import StubOllamaServer
+from vocomate_app.tts.pipeline import SentencePipeline, synthesize_speech
+from vocomate_app.utils.profiling import profile_thread, profiler, use_capture
+from vocomate_app.utils.vad import analyze_speech, decode_audio_bytes
+
+DEFAULT_PROMPTS = [
+    "What is the weather like today?",
+    "Can you tell me a short story about a cat?",
+    "How do I make a cup of green tea?",
+    "What are three good habits for a productive morning?",
+]
+STUB_REPLY = (
+    "Sure, here is a quick answer. The first part covers the basics you asked about. "
+    "Then I add a little more detail so the reply has several sentences. "
+    "Finally, I wrap up with a short summary and a friendly closing remark."
+)
+STAGES = ["decode", "vad", "transcribe", "llm_first_token", "llm_total", "tts_first_sentence",
+          "time_to_first_audio", "turn_total"]
+
+
+def percentile(values, q):
+    """Nearest-rank percentile (``q`` in 0-100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(values):
+    return {
+        "n": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "mean": sum(values) / len(values) if values else None,
+    }
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def wav_bytes(audio, sample_rate):
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, sample_rate, format="WAV")
+    return buffer.getvalue()
+
+
+def synthetic_inputs(prompts, stub_models):
+    """
+    One encoded recording per prompt. With real models the prompt is spoken by MeloTTS
+    (so VAD and Whisper see actual speech), otherwise a speech-like noise burst is used.
+    """
+    inputs = []
+    rng = np.random.default_rng(0)
+    for prompt in prompts:
+        if stub_models:
+            seconds = 0.4 + 0.06 * len(prompt)
+            t = np.arange(int(16000 * seconds)) / 16000
+            envelope = 0.5 * (1 + np.sin(2 * np.pi * 3 * t))
+            audio = (0.1 * envelope * rng.standard_normal(len(t))).astype(np.float32)
+            sample_rate = 16000
+        else:
+            from vocomate_app.tts.melo_tts import synthesize_base
+            audio, sample_rate, _ = synthesize_base(prompt)
+        padding = np.zeros(int(0.5 * sample_rate), dtype=np.float32)
+        inputs.append((prompt, wav_bytes(np.concatenate([padding, audio, padding]), sample_rate)))
+    return inputs
+
+
+def file_inputs(paths):
+    inputs = []
+    for path in paths:
+        with open(path, "rb") as f:
+            inputs.append((os.path.basename(path), f.read()))
+    return inputs
+
+
+class StubModels:
+    """Simulated ASR/VAD/TTS with costs proportional to input size (CPU-like real-time factors)."""
+
+    def __init__(self, asr_rtf=0.15):
+        self.asr_rtf = asr_rtf
+        self.next_text = ""
+
+    def vad(self, audio, sr):
+        return [{"start": 0, "end": len(audio)}], audio
+
+    def transcribe(self, audio):
+        time.sleep(self.asr_rtf * len(audio) / 16000)
+        return self.next_text
+
+    def synthesize(self, text, **kwargs):
+        return stub_synthesize(text)
+
+
+def run_turn(audio_bytes, context, client, models, workers, max_pending, speed):
+    timings = {}
+    # The recording ends now: this is where the user stopped speaking
+    began = time.perf_counter()
+    audio, sr = decode_audio_bytes(audio_bytes)
+    timings["decode"] = time.perf_counter() - began
+
+    mark = time.perf_counter()
+    if models:
+        _, speech = models.vad(audio, sr)
+    else:
+        _, speech = analyze_speech(audio, sr)
+    timings["vad"] = time.perf_counter() - mark
+    if speech is None:
+        return None
+
+    mark = time.perf_counter()
+    if models:
+        text = models.transcribe(speech)
+    else:
+        from vocomate_app.asr.whisper_asr import transcribe
+        text = transcribe(speech, fp16=False)["text"]
+    timings["transcribe"] = time.perf_counter() - mark
+    context.add_user(text)
+
+    messages = context.messages()
+    context.record_request(messages)
+    stream = client.stream(None, history=messages)
+    sentences = (event.text for event in stream if event.kind == "sentence")
+    synthesize = models.synthesize if models else synthesize_speech
+    pipeline = SentencePipeline(max_workers=workers, max_pending=max_pending, synthesize=synthesize,
+                                **({} if models else {"speed": speed}))
+    first_audio = None
+    for _ in pipeline.run(sentences):
+        if first_audio is None:
+            first_audio = time.perf_counter()
+    context.add_assistant(stream.text)
+
+    timings["llm_first_token"] = stream.stats.time_to_first_token
+    timings["llm_total"] = stream.stats.total_time
+    timings["tts_first_sentence"] = pipeline.stats.synthesis_seconds[0] if pipeline.stats.synthesis_seconds else None
+    timings["time_to_first_audio"] = first_audio - began if first_audio else None
+    timings["turn_total"] = time.perf_counter() - began
+    timings["transcript"] = text
+    return timings
+
+
+def run(inputs, turns, ollama_url=None, tokens_per_second=30.0, first_token_delay=0.15, stub_models=False,
+        workers=2, max_pending=4, speed=1.0, model="mistral"):
+    """Runs ``turns`` turns cycling over ``inputs`` and returns the JSON-ready report."""
+    server = None
+    if ollama_url is None:
+        server = StubOllamaServer(reply=STUB_REPLY, tokens_per_second=tokens_per_second,
+                                  first_token_delay=first_token_delay).start()
+        ollama_url = server.url
+    client = OllamaClient(base_url=ollama_url, model=model)
+    models = StubModels() if stub_models else None
+    context = ConversationContext()
+    samples = {stage: [] for stage in STAGES}
+    skipped = 0
+    try:
+        # Warm-up turn (model loading, connection setup) is not measured
+        if models:
+            models.next_text = inputs[0][0]
+        run_turn(inputs[0][1], context, client, models, workers, max_pending, speed)
+        context.clear()
+        for i in range(turns):
+            label, audio_bytes = inputs[i % len(inputs)]
+            if models:
+                models.next_text = label
+            capture = profiler.begin(f"bench-{i}")
+            with use_capture(capture), profile_thread():
+                timings = run_turn(audio_bytes, context, client, models, workers, max_pending, speed)
+            if capture is not None:
+                print(f"Profile written to {capture.end()['path']}", file=sys.stderr)
+            if timings is None:
+                skipped += 1
+                continue
+            for stage in STAGES:
+                if timings.get(stage) is not None:
+                    samples[stage].append(timings[stage])
+    finally:
+        client.close()
+        if server:
+            server.stop()
+    return {
+        "commit": git_commit(),
+        "config": {
+            "turns": turns, "inputs": len(inputs), "stub_models": stub_models, "stub_llm": server is not None,
+            "tokens_per_second": tokens_per_second if server else None, "workers": workers,
+            "max_pending": max_pending,
+        },
+        "stages": {stage: summarize(values) for stage, values in samples.items()},
+        "skipped_no_speech": skipped,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare(report, baseline):
+    """Per-stage p50/p95 change vs. a previous report, in percent."""
+    deltas = {}
+    for stage, current in report["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if not previous:
+            continue
+        deltas[stage] = {
+            q: round(100 * (current[q] - previous[q]) / previous[q], 1) if current[q] and previous[q] else None
+            for q in ("p50", "p95")
+        }
+    deltas["peak_rss_mb"] = round(report["peak_rss_mb"] - baseline.get("peak_rss_mb", 0), 1)
+    return deltas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end voice loop latency benchmark")
+    parser.add_argument("--inputs", nargs="*", help="Recorded WAV files (default: synthetic inputs)")
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--ollama-url", help="Benchmark a real Ollama instead of the stand-in server")
+    parser.add_argument("--model", default="mistral")
+    parser.add_argument("--tokens-per-second", type=float, default=30.0)
+    parser.add_argument("--first-token-delay", type=float, default=0.15)
+    parser.add_argument("--stub-models", action="store_true", help="Simulate VAD/ASR/TTS instead of loading models")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=4)
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--profile", type=int, default=0, metavar="N",
+                        help="Profile the first N measured turns (cProfile, torch ops, folded stacks)")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Previous JSON report to diff against")
+    args = parser.parse_args()
+
+    if args.profile:
+        profiler.arm(args.profile)
+    inputs = file_inputs(args.inputs) if args.inputs else synthetic_inputs(DEFAULT_PROMPTS, args.stub_models)
+    report = run(
+        inputs, args.turns, ollama_url=args.ollama_url, tokens_per_second=args.tokens_per_second,
+        first_token_delay=args.first_token_delay, stub_models=args.stub_models, workers=args.workers,
+        max_pending=args.max_pending, speed=args.speed, model=args.model,
+    )
+    if args.compare:
+        with open(args.compare) as f:
+            report["change_percent"] = compare(report, json.load(f))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
@@ -0,0 +1,79 @@
+#bench_import_time
+"""
+Measures how long `import vocomate_app...` takes in a fresh interpreter and checks
+that no heavy model library (torch, whisper, melo, openvoice) is pulled in at import.
+
+    python scripts/bench_import_time.py --budget-ms 300
+
+Exits with status 1 when a module is over budget or imports a heavy library, so it
+can be used as a CI/test gate (see check_import_budget).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+DEFAULT_MODULES = [
+    "vocomate_app.utils.vad",
+    "vocomate_app.utils.model_registry",
+    "vocomate_app.asr.whisper_asr",
+    "vocomate_app.llm.ollama_client",
+    "vocomate_app.context.conversation",
+    "vocomate_app.voice_cloning.se_store",
+    "vocomate_app.tts.pipeline",
+]
+HEAVY_MODULES = ["torch", "whisper", "melo", "openvoice", "torchaudio", "librosa"]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(module, repeats=3):
+    """Best-of-``repeats`` import time of ``module`` in a fresh interpreter, plus heavy libraries it loaded."""
+    best = None
+    for _ in range(repeats):
+        proc = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        )
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    return {"module": module, "ms": best["seconds"] * 1000, "heavy": best["heavy"]}
+
+
+def check_import_budget(modules=DEFAULT_MODULES, budget_ms=500.0, repeats=3):
+    """
+    Returns ``(ok, results)``; ``ok`` is False if any module exceeds ``budget_ms``
+    or imports one of HEAVY_MODULES.
+    """
+    results = [measure_import(m, repeats=repeats) for m in modules]
+    ok = all(r["ms"] <= budget_ms and not r["heavy"] for r in results)
+    return ok, results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import-time budget check for vocomate_app")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--budget-ms", type=float, default=500.0)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    ok, results = check_import_budget(args.modules, args.budget_ms, args.repeats)
+    if args.json:
+        print(json.dumps({"budget_ms": args.budget_ms, "ok": ok, "results": results}, indent=2))
+    else:
+        for r in results:
+            status = "OK  " if r["ms"] <= args.budget_ms and not r["heavy"] else "FAIL"
+            heavy = f"  heavy imports: {', '.join(r['heavy'])}" if r["heavy"] else ""
+            print(f"{status} {r['module']:<40} {r['ms']:8.1f} ms{heavy}")
+    sys.exit(0 if ok else 1)
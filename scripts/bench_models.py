@@ -0,0 +1,208 @@
+#bench_models
+"""
+Per-stage model microbenchmarks on CPU: load time, memory and real-time factor
+(processing seconds / audio seconds, lower is better) for every Whisper size,
+Silero VAD, MeloTTS per language/speed and the OpenVoice converter, across a grid
+of torch thread counts and input durations.
+
+Runs offline: models must already be downloaded/cached (HF_HUB_OFFLINE is set),
+and CUDA is hidden so every number is a CPU number. Input audio is the bundled
+reference recording (or --audio), tiled to each duration.
+
+    python scripts/bench_models.py --threads 1,2,4 --durations 5,15,30 --csv models.csv
+    python scripts/bench_models.py --stages whisper --whisper-sizes tiny,base,small
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+import numpy as np
+import soundfile as sf
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(REPO_ROOT)
+from vocomate_app.tts.pipeline import DEFAULT_REFERENCE_AUDIO
+from vocomate_app.utils.audio_frames import resample
+from vocomate_app.utils.model_registry import registry
+
+SAMPLE_TEXT = {
+    "EN": "The quick brown fox jumps over the lazy dog while the morning sun rises slowly over the hills.",
+    "ES": "El rápido zorro marrón salta sobre el perro perezoso mientras el sol sale lentamente.",
+    "FR": "Le renard brun rapide saute par-dessus le chien paresseux pendant que le soleil se lève.",
+    "ZH": "敏捷的棕色狐狸跳过了懒狗，早晨的太阳慢慢地从山上升起。",
+    "JP": "素早い茶色の狐が怠け者の犬を飛び越え、朝日がゆっくりと山の上に昇る。",
+    "KR": "빠른 갈색 여우가 게으른 개를 뛰어넘고 아침 해가 천천히 언덕 위로 떠오른다.",
+}
+# Rough speaking rate used to size MeloTTS input text for a target duration
+CHARS_PER_SECOND = {"ZH": 4, "JP": 6, "KR": 6}
+COLUMNS = ["stage", "variant", "threads", "input_seconds", "load_seconds", "model_mb", "rss_delta_mb",
+           "run_seconds", "audio_seconds", "rtf"]
+audio_source = DEFAULT_REFERENCE_AUDIO
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def reference_audio(seconds, sample_rate=16000):
+    audio, sr = sf.read(audio_source, dtype="float32", always_2d=True)
+    audio = resample(audio.mean(axis=1), sr, sample_rate)
+    reps = int(np.ceil(seconds * sample_rate / len(audio)))
+    return np.tile(audio, reps)[:int(seconds * sample_rate)].astype(np.float32)
+
+
+def sample_text(language, seconds):
+    base = SAMPLE_TEXT.get(language, SAMPLE_TEXT["EN"])
+    target = int(seconds * CHARS_PER_SECOND.get(language, 14))
+    separator = "" if language in CHARS_PER_SECOND else " "
+    text = base
+    while len(text) < target:
+        text += separator + base
+    return text
+
+
+def load(kind, key):
+    """Cold-loads a model through the registry; returns (model, load_seconds, model_mb, rss_delta_mb)."""
+    registry.evict(kind, key)
+    before = rss_mb()
+    began = time.perf_counter()
+    model = registry.get(kind, key)
+    load_seconds = time.perf_counter() - began
+    entry = next((m for m in registry.stats()["models"] if m["kind"] == kind and m["key"] == key), None)
+    model_mb = entry["bytes"] / (1024 * 1024) if entry else None
+    return model, load_seconds, model_mb, rss_mb() - before
+
+
+def timed(fn, repeats):
+    """Median wall time of ``repeats`` calls after one untimed warm-up; returns (seconds, last result)."""
+    result = fn()
+    times = []
+    for _ in range(repeats):
+        began = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - began)
+    return sorted(times)[len(times) // 2], result
+
+
+def bench_whisper(sizes, threads, durations, repeats):
+    import torch
+
+    for size in sizes:
+        model, load_seconds, model_mb, rss_delta = load("whisper", size)
+        for n in threads:
+            torch.set_num_threads(n)
+            for seconds in durations:
+                audio = reference_audio(seconds)
+                run, _ = timed(lambda: model.transcribe(audio, fp16=False, language="en", temperature=0.0), repeats)
+                yield ["whisper", size, n, seconds, load_seconds, model_mb, rss_delta, run, seconds, run / seconds]
+        registry.evict("whisper", size)
+
+
+def bench_silero(threads, durations, repeats):
+    import torch
+    from vocomate_app.utils.vad import analyze_speech
+
+    _, load_seconds, model_mb, rss_delta = load("silero", None)
+    for n in threads:
+        torch.set_num_threads(n)
+        for seconds in durations:
+            audio = reference_audio(seconds)
+            run, _ = timed(lambda: analyze_speech(audio, 16000), repeats)
+            yield ["silero", "vad", n, seconds, load_seconds, model_mb, rss_delta, run, seconds, run / seconds]
+
+
+def bench_melo(languages, speeds, threads, durations, repeats):
+    import torch
+    from vocomate_app.tts.melo_tts import synthesize_base
+
+    for language in languages:
+        _, load_seconds, model_mb, rss_delta = load("melo", language)
+        speaker = f"{language}-Default" if language == "EN" else language
+        for speed in speeds:
+            for n in threads:
+                torch.set_num_threads(n)
+                for seconds in durations:
+                    text = sample_text(language, seconds)
+                    run, (audio, sr, _) = timed(lambda: synthesize_base(text, language, speaker, speed), repeats)
+                    audio_seconds = len(audio) / sr
+                    yield ["melo", f"{language}@{speed:g}", n, seconds, load_seconds, model_mb, rss_delta, run,
+                           audio_seconds, run / audio_seconds]
+        registry.evict("melo", language)
+
+
+def bench_openvoice(threads, durations, repeats):
+    import torch
+    from vocomate_app.voice_cloning.tone_converter import convert_tone, extract_se_from_audio
+
+    converter, load_seconds, model_mb, rss_delta = load("openvoice", None)
+    sample_rate = converter.hps.data.sampling_rate
+    se = extract_se_from_audio(reference_audio(10, sample_rate), sample_rate, converter)
+    for n in threads:
+        torch.set_num_threads(n)
+        for seconds in durations:
+            audio = reference_audio(seconds, sample_rate)
+            run, _ = timed(lambda: convert_tone(audio, sample_rate, se, se, converter, message=None), repeats)
+            yield ["openvoice", "converter", n, seconds, load_seconds, model_mb, rss_delta, run, seconds, run / seconds]
+
+
+def format_table(rows):
+    cells = [COLUMNS] + [[f"{v:.3f}" if isinstance(v, float) else str(v) for v in row] for row in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(COLUMNS))]
+    return "\n".join("  ".join(c.rjust(w) for c, w in zip(row, widths)) for row in cells)
+
+
+def _csv_list(value, cast=str):
+    return [cast(v) for v in value.split(",") if v]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage CPU model benchmarks (RTF, load time, memory)")
+    parser.add_argument("--stages", default="whisper,silero,melo,openvoice")
+    parser.add_argument("--whisper-sizes", default="tiny,base,small")
+    parser.add_argument("--melo-languages", default="EN")
+    parser.add_argument("--melo-speeds", default="0.85,1.0")
+    parser.add_argument("--threads", default="1,2,4")
+    parser.add_argument("--durations", default="5,15,30", help="Input durations in seconds")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--audio", default=DEFAULT_REFERENCE_AUDIO, help="Speech recording used as input audio")
+    parser.add_argument("--csv", help="Also write the rows to this CSV file")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.audio):
+        sys.exit(f"Input audio not found: {args.audio} (pass --audio)")
+    audio_source = args.audio
+
+    stages = _csv_list(args.stages)
+    threads = _csv_list(args.threads, int)
+    durations = _csv_list(args.durations, float)
+    benches = {
+        "whisper": lambda: bench_whisper(_csv_list(args.whisper_sizes), threads, durations, args.repeats),
+        "silero": lambda: bench_silero(threads, durations, args.repeats),
+        "melo": lambda: bench_melo(_csv_list(args.melo_languages), _csv_list(args.melo_speeds, float), threads,
+                                   durations, args.repeats),
+        "openvoice": lambda: bench_openvoice(threads, durations, args.repeats),
+    }
+    rows = []
+    for stage in stages:
+        for row in benches[stage]():
+            rows.append(row)
+            print(" ".join(f"{c}={v:.3f}" if isinstance(v, float) else f"{c}={v}" for c, v in zip(COLUMNS, row)),
+                  flush=True)
+    print()
+    print(format_table(rows))
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            writer.writerows(rows)
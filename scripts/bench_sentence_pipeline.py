@@ -0,0 +1,63 @@
+#bench_sentence_pipeline
+"""
+Compares the serial TTS path (whole reply -> MeloTTS -> OpenVoice) with the
+pipelined sentence-level path: time to first audio and total wall time.
+
+    python scripts/bench_sentence_pipeline.py --workers 2
+    python scripts/bench_sentence_pipeline.py --stub   # no models, simulated synthesis cost
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from vocomate_app.tts.pipeline import SentencePipeline, synthesize_speech
+
+DEFAULT_TEXT = (
+    "Sure, I can help with that. The weather today is mild with a light breeze from the west. "
+    "In the afternoon, clouds will gather and there is a small chance of rain. "
+    "Tomorrow should be sunny again, so it is a good day for a walk. "
+    "Let me know if you would like a forecast for the weekend as well."
+)
+
+
+def stub_synthesize(text, seconds_per_char=0.004, **kwargs):
+    # Roughly linear in text length, like MeloTTS + conversion on CPU
+    time.sleep(0.05 + seconds_per_char * len(text))
+    return np.zeros(int(22050 * len(text) / 15), dtype=np.float32), 22050
+
+
+def run(text, workers, max_pending, synthesize, **speech_kwargs):
+    began = time.perf_counter()
+    synthesize(text, **speech_kwargs)
+    serial = time.perf_counter() - began
+
+    pipeline = SentencePipeline(max_workers=workers, max_pending=max_pending, synthesize=synthesize, **speech_kwargs)
+    for _ in pipeline.run(text):
+        pass
+    stats = pipeline.stats.as_dict()
+    return {
+        "serial": {"time_to_first_audio": serial, "total_time": serial},
+        "pipelined": {k: stats[k] for k in ("time_to_first_audio", "total_time", "sentences")},
+        "workers": workers,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serial vs sentence-pipelined TTS benchmark")
+    parser.add_argument("--text", default=DEFAULT_TEXT)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=4)
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--stub", action="store_true", help="Simulate synthesis instead of loading models")
+    args = parser.parse_args()
+
+    synthesize = stub_synthesize if args.stub else synthesize_speech
+    if not args.stub:
+        synthesize("Warm up.", speed=args.speed)  # exclude model loading from the comparison
+    kwargs = {} if args.stub else {"speed": args.speed}
+    print(json.dumps(run(args.text, args.workers, args.max_pending, synthesize, **kwargs), indent=2))
@@ -1,14 +1,21 @@
 #srcipt/clone_voice
 import os
-from openvoice.api import ToneColorConverter
-from openvoice import se_extractor
+import sys
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if repo_root not in sys.path:
+    sys.path.append(repo_root)
+from vocomate_app.utils.model_registry import get_tone_color_converter
+from vocomate_app.voice_cloning.se_store import se_store
 
 def clone_voice(
     base_audio_path="../vocomate_app/assets/cloned_outputs/base.wav",
     reference_audio_path="../vocomate_app/assets/audio_inputs/my_voic.wav",
     output_path="../vocomate_app/assets/cloned_outputs/final_cloned.wav",
     config_path="../OpenVoice/openvoice/checkpoints_v2/converter/config.json",
-    checkpoint_path="../OpenVoice/openvoice/checkpoints_v2/converter/checkpoint.pth"
+    checkpoint_path="../OpenVoice/openvoice/checkpoints_v2/converter/checkpoint.pth",
+    language="EN",
+    speaker="EN-Default"
 ):
       # Resolve paths relative to this script's location
     base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -39,21 +46,12 @@ def clone_voice(
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
     try:
-        # Initialize converter on CPU
-        print("Loading ToneColorConverter...")
-        converter = ToneColorConverter(config_path=config_path, device="cpu")
-        converter.load_ckpt(checkpoint_path)
-
-        # Extract speaker embeddings
-        print("Extracting source speaker embedding...")
-        source_se = se_extractor.get_se(base_audio_path, converter, vad=True)
-        if isinstance(source_se, tuple):
-            source_se = source_se[0]
+        # Reuse the resident converter (loaded on CPU on first use)
+        converter = get_tone_color_converter(config_path, checkpoint_path)
 
-        print("Extracting target speaker embedding...")
-        target_se = se_extractor.get_se(reference_audio_path, converter, vad=True)
-        if isinstance(target_se, tuple):
-            target_se = target_se[0]
+        # Speaker embeddings come from the persistent store (extracted once per reference/speaker)
+        source_se = se_store.source_se(language, speaker, converter, checkpoint_path, base_audio_path=base_audio_path)
+        target_se = se_store.target_se(reference_audio_path, converter, checkpoint_path)
 
         # Perform the voice cloning
         print("Converting voice...")
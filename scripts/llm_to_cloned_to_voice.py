@@ -1,23 +1,23 @@
 #llm_to_cloned_to_voice
+import argparse
+import json
 import os
 import sys
-import sounddevice as sd
 import soundfile as sf
 
 # --- Adjust sys.path for custom modules ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# Add ASR and LLM module paths
+# Add repo root, ASR and LLM module paths
+sys.path.append(os.path.abspath(os.path.join(SCRIPT_DIR, '..')))
 sys.path.append(os.path.abspath(os.path.join(SCRIPT_DIR, '..', 'vocomate_app', 'asr')))
 sys.path.append(os.path.abspath(os.path.join(SCRIPT_DIR, '..', 'vocomate_app', 'llm')))
 
 from whisper_asr import transcribe_audio           # Your custom ASR module
 from ollama_client import query_ollama            # Your custom LLM client
-
-# MeloTTS and OpenVoice imports
-from melo.api import TTS
-from openvoice.api import ToneColorConverter
-from openvoice import se_extractor
+from vocomate_app.utils.model_registry import get_melo_tts, get_tone_color_converter, warmup_from_env
+from vocomate_app.voice_cloning.se_store import se_store
+from vocomate_app.tts.pipeline import synthesize_speech
 
 # --- Configuration ---
 LLM_MODEL = "mistral"
@@ -44,7 +44,7 @@ print("Config path:", OPENVOICE_CONFIG)
 def generate_base_speech(text, output_path=BASE_AUDIO_PATH, language=LANGUAGE, speaker=SPEAKER, speed=1.0):
     output_dir = os.path.dirname(output_path)
     os.makedirs(output_dir, exist_ok=True)
-    tts = TTS(language=language, device="auto")
+    tts = get_melo_tts(language)
     speaker_ids = tts.hps.data.spk2id
     # --- FIXED SPEAKER SELECTION ---
     if speaker in speaker_ids:
@@ -66,14 +66,13 @@ def clone_voice(
     reference_audio_path=REFERENCE_AUDIO_PATH,
     output_path=CLONED_AUDIO_PATH,
     config_path=OPENVOICE_CONFIG,
-    checkpoint_path=OPENVOICE_CKPT
+    checkpoint_path=OPENVOICE_CKPT,
+    language=LANGUAGE,
+    speaker=SPEAKER
 ):
-    converter = ToneColorConverter(config_path=config_path, device="cpu")
-    converter.load_ckpt(checkpoint_path)
-    source_se = se_extractor.get_se(base_audio_path, converter, vad=True)
-    if isinstance(source_se, tuple): source_se = source_se[0]
-    target_se = se_extractor.get_se(reference_audio_path, converter, vad=True)
-    if isinstance(target_se, tuple): target_se = target_se[0]
+    converter = get_tone_color_converter(config_path, checkpoint_path)
+    source_se = se_store.source_se(language, speaker, converter, checkpoint_path, base_audio_path=base_audio_path)
+    target_se = se_store.target_se(reference_audio_path, converter, checkpoint_path)
     converter.convert(
         audio_src_path=base_audio_path,
         src_se=source_se,
@@ -84,23 +83,77 @@ def clone_voice(
     print(f"✅ Cloned speech saved at: {output_path}")
     return output_path
 
-def play_audio(file_path):
-    data, samplerate = sf.read(file_path)
+def play_audio(audio):
+    # Accepts a file path or an in-memory (samples, sample_rate) buffer
+    import sounddevice as sd  # imported lazily: opening PortAudio is slow and not needed to import this module
+    if isinstance(audio, str):
+        data, samplerate = sf.read(audio)
+    else:
+        data, samplerate = audio
     sd.play(data, samplerate)
     sd.wait()  # Wait until playback is finished
-    print(f"Played audio: {file_path}")
+    print(f"Played audio: {audio if isinstance(audio, str) else 'in-memory buffer'}")
+
+def render_batch_file(args):
+    """Batch mode: every text of a JSONL/CSV file rendered in the cloned voice, models loaded once."""
+    from vocomate_app.tts.batch import load_texts, render_batch, render_one_at_a_time
+
+    items = load_texts(args.batch)
+    speech_kwargs = dict(reference_audio_path=REFERENCE_AUDIO_PATH, language=LANGUAGE, speaker=SPEAKER,
+                         config_path=OPENVOICE_CONFIG, checkpoint_path=OPENVOICE_CKPT)
+    os.makedirs(args.output_dir, exist_ok=True)
+    stats = {}
+    with open(os.path.join(args.output_dir, "index.jsonl"), "w", encoding="utf-8") as index:
+        for record in render_batch(items, args.output_dir, batch_size=args.batch_size, writers=args.writers,
+                                   use_cache=not args.no_cache, stats=stats, **speech_kwargs):
+            index.write(json.dumps(record, ensure_ascii=False) + "\n")
+    padding = stats["padded_frames"] / max(1, stats["frames"] + stats["padded_frames"])
+    print(f"Batch: {stats['utterances']} utterances ({stats['cached']} from cache, {stats['batches']} converter "
+          f"batches, {padding:.0%} padding) in {stats['wall_seconds']:.1f}s = "
+          f"{stats['utterances_per_second']:.2f} utt/s, {stats['audio_seconds']:.1f}s of audio")
+    if args.compare:
+        baseline = {}
+        sample = items[:args.compare]
+        list(render_one_at_a_time(sample, os.path.join(args.output_dir, "one_at_a_time"), stats=baseline,
+                                  **speech_kwargs))
+        print(f"One at a time: {baseline['utterances']} utterances in {baseline['wall_seconds']:.1f}s = "
+              f"{baseline['utterances_per_second']:.2f} utt/s "
+              f"({stats['utterances_per_second'] / baseline['utterances_per_second']:.1f}x for batch)")
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LLM reply in your cloned voice, or batch rendering of a text file")
+    parser.add_argument("--batch", help="JSONL/CSV of texts (text, id, speaker, speed, output) to render")
+    parser.add_argument("--output-dir", default=os.path.join(SCRIPT_DIR, '..', 'vocomate_app', 'assets',
+                                                             'cloned_outputs', 'batch'))
+    parser.add_argument("--batch-size", type=int, default=8, help="Utterances per converter forward pass")
+    parser.add_argument("--writers", type=int, default=4, help="Threads writing WAV files")
+    parser.add_argument("--no-cache", action="store_true", help="Don't read/write the response audio cache")
+    parser.add_argument("--compare", type=int, metavar="N",
+                        help="Also render the first N texts one at a time and compare utterances/sec")
+    args = parser.parse_args()
+
+    warmup_from_env()
+    if args.batch:
+        render_batch_file(args)
+        sys.exit()
+
     # 1. Get user input (simulate ASR/LLM pipeline)
     user_text = input("Type user prompt (or paste ASR/LLM text): ")
     llm_response = query_ollama(user_text, model=LLM_MODEL)
     print("LLM Response:", llm_response)
 
-    # 2. Generate base speech with MeloTTS
-    base_audio = generate_base_speech(llm_response)
-
-    # 3. Clone the base speech into your own voice with OpenVoice
-    cloned_audio = clone_voice(base_audio_path=base_audio)
+    # 2-3. Generate base speech with MeloTTS and clone it into your own voice with OpenVoice,
+    # passing the waveform in memory (also saved to CLONED_AUDIO_PATH for reference)
+    cloned_audio = synthesize_speech(
+        llm_response,
+        reference_audio_path=REFERENCE_AUDIO_PATH,
+        language=LANGUAGE,
+        speaker=SPEAKER,
+        output_path=CLONED_AUDIO_PATH,
+        config_path=OPENVOICE_CONFIG,
+        checkpoint_path=OPENVOICE_CKPT,
+    )
 
     # 4. Play the cloned audio output automatically
     play_audio(cloned_audio)
@@ -0,0 +1,34 @@
+# tests/test_conversation_prefill.py
+import os
+import random
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(REPO_ROOT)
+from vocomate_app.context.conversation import ConversationContext
+
+WORDS = "the quick brown fox jumps over a lazy dog while we talk about weather music and travel plans".split()
+
+
+def _utterance(rng, low, high):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high))).capitalize() + "."
+
+
+def test_prefill_stays_bounded_and_only_new_turns_are_prefilled():
+    rng = random.Random(0)
+    context = ConversationContext(max_tokens=512, summary_tokens=96)
+    previous_folds = context.folds
+    for turn in range(300):
+        # Some replies are longer than the whole window, to exercise truncation too
+        context.add_user(_utterance(rng, 3, 40))
+        appended = [context.turns[-1]]
+        request = context.record_request()
+        assert request["prompt_tokens"] <= context.max_tokens, f"turn {turn}: {request}"
+        if turn and context.folds == previous_folds:
+            # No fold since the last request: the prefix is unchanged and only the previous
+            # reply plus the new user message have to be prefilled
+            new = [context.turns[-2]] + appended
+            assert request["new_tokens"] == sum(context._message_tokens(m) for m in new), f"turn {turn}: {request}"
+        previous_folds = context.folds
+        context.add_assistant(_utterance(rng, 5, 600 if turn % 50 == 0 else 80))
+    assert context.folds > 0
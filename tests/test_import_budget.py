@@ -0,0 +1,18 @@
+# tests/test_import_budget.py
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(REPO_ROOT, 'scripts'))
+from bench_import_time import check_import_budget
+
+BUDGET_MS = float(os.environ.get("VOCOMATE_IMPORT_BUDGET_MS", 500))
+
+
+def test_imports_stay_within_budget_and_load_no_models():
+    ok, results = check_import_budget(budget_ms=BUDGET_MS)
+    report = "\n".join(
+        f"{r['module']:<40} {r['ms']:8.1f} ms" + (f"  heavy imports: {', '.join(r['heavy'])}" if r["heavy"] else "")
+        for r in results
+    )
+    assert ok, f"import budget of {BUDGET_MS:g} ms exceeded or a model library was imported:\n{report}"
@@ -0,0 +1,260 @@
+# asr/incremental.py
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if repo_root not in sys.path:
+    sys.path.append(repo_root)
+from vocomate_app.asr.whisper_asr import transcribe
+from vocomate_app.utils.audio_frames import av_frame_to_mono, resample, to_float32
+
+SAMPLE_RATE = 16000
+
+logger = logging.getLogger(__name__)
+
+
+class RingBuffer:
+    """Fixed-capacity float32 ring buffer addressed by absolute sample index."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.total = 0
+        self._data = np.zeros(capacity, dtype=np.float32)
+
+    @property
+    def oldest(self):
+        return max(0, self.total - self.capacity)
+
+    def append(self, samples):
+        n = len(samples)
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+        start = (self.total + n - len(samples)) % self.capacity
+        first = min(len(samples), self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        self._data[:len(samples) - first] = samples[first:]
+        self.total += n
+
+    def read(self, start, end=None):
+        end = self.total if end is None else end
+        start = max(start, self.oldest)
+        if start >= end:
+            return np.zeros(0, dtype=np.float32)
+        return self._data[np.arange(start, end) % self.capacity]
+
+
+def _common_prefix(a, b):
+    n = 0
+    for x, y in zip(a, b):
+        if x.lower().strip(".,!?") != y.lower().strip(".,!?"):
+            break
+        n += 1
+    return n
+
+
+class IncrementalTranscriber:
+    """
+    Live transcription: audio frames go into a ring buffer and a background worker
+    periodically re-decodes the uncommitted window with Whisper.
+
+    Words that two consecutive decodes agree on are "stable"; whole Whisper
+    segments inside the stable prefix are committed and their audio dropped from
+    the window, so only the unstable tail is ever revised. If decoding falls behind
+    real time, intermediate steps are merged into the next decode (counted in
+    ``skipped_steps``); if the buffer overflows, the oldest uncommitted audio is
+    dropped. The frame callback itself only copies audio.
+
+    Args:
+        model_size (str), language (str, optional): Whisper settings
+        step_s (float): Re-decode after this much new audio
+        max_window_s (float): Force a commit when the uncommitted window grows beyond this
+        buffer_s (float): Ring buffer capacity
+        on_update (callable, optional): Called with the transcriber after every decode
+        transcribe_fn (callable, optional): ``(audio, prompt) -> whisper result``; defaults to Whisper
+        max_failures (int): Consecutive failed decodes after which the worker stops (see ``stats()``)
+    """
+
+    def __init__(self, model_size="base", language=None, step_s=1.0, max_window_s=12.0, buffer_s=30.0,
+                 on_update=None, transcribe_fn=None, max_failures=5):
+        self.model_size = model_size
+        self.language = language
+        self.step_samples = int(step_s * SAMPLE_RATE)
+        self.max_window_s = max_window_s
+        self.on_update = on_update
+        self.max_failures = max_failures
+        self._transcribe_fn = transcribe_fn or self._whisper
+        self._ring = RingBuffer(int(buffer_s * SAMPLE_RATE))
+        self._cond = threading.Condition()
+        self._window_start = 0
+        self._last_decoded = 0
+        self._arrivals = deque()
+        self._previous_words = []
+        self._running = False
+        self._thread = None
+        self.committed = []
+        self.stable = ""
+        self.tentative = ""
+        self.decodes = 0
+        self.skipped_steps = 0
+        self.dropped_samples = 0
+        self.errors = 0
+        self.last_error = None
+        self.failed = False
+        self._consecutive_failures = 0
+        self.rtf = deque(maxlen=50)
+        self.partial_latency_ms = deque(maxlen=50)
+
+    def _whisper(self, audio, prompt):
+        return transcribe(
+            audio, model_size=self.model_size, language=self.language, temperature=0.0,
+            condition_on_previous_text=False, initial_prompt=prompt or None, fp16=False,
+        )
+
+    # --- Input side (called from the audio/frame callback) ---
+
+    def push(self, samples, sample_rate=SAMPLE_RATE):
+        samples = resample(to_float32(samples), sample_rate, SAMPLE_RATE)
+        with self._cond:
+            self._ring.append(samples)
+            self._arrivals.append((self._ring.total, time.monotonic()))
+            if self._window_start < self._ring.oldest:
+                # Decoding fell too far behind: drop the oldest uncommitted audio
+                self.dropped_samples += self._ring.oldest - self._window_start
+                self._window_start = self._ring.oldest
+            while len(self._arrivals) > 1 and self._arrivals[1][0] <= self._window_start:
+                self._arrivals.popleft()
+            self._cond.notify()
+
+    def push_av_frame(self, frame):
+        self.push(av_frame_to_mono(frame, SAMPLE_RATE))
+
+    # --- Worker ---
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, flush=True):
+        """Stops the worker; with ``flush`` the remaining window is decoded and committed."""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread:
+            self._thread.join()
+        if flush:
+            with self._cond:
+                start, end = self._window_start, self._ring.total
+                audio = self._ring.read(start, end)
+            if len(audio) > SAMPLE_RATE // 10:
+                self._decode(audio, start, end, time.monotonic(), final=True)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: not self._running or self._ring.total - self._last_decoded >= self.step_samples,
+                    timeout=0.5,
+                )
+                if not self._running:
+                    return
+                pending = self._ring.total - self._last_decoded
+                if pending < self.step_samples:
+                    continue
+                # Backpressure: everything that arrived while we were busy is merged into one decode
+                self.skipped_steps += pending // self.step_samples - 1
+                start, end = self._window_start, self._ring.total
+                audio = self._ring.read(start, end)
+                arrived_at = self._arrivals[-1][1] if self._arrivals else time.monotonic()
+                self._last_decoded = end
+            try:
+                self._decode(audio, start, end, arrived_at)
+            except Exception as e:
+                logger.exception("Incremental transcription failed")
+                with self._cond:
+                    self.errors += 1
+                    self.last_error = f"{type(e).__name__}: {e}"
+                    self._consecutive_failures += 1
+                    if self._consecutive_failures >= self.max_failures:
+                        # Persistent failure (missing model, broken transcribe_fn): stop instead of spinning
+                        logger.error("Stopping incremental transcription after %d consecutive failures",
+                                     self._consecutive_failures)
+                        self.failed = True
+                        self._running = False
+                        return
+            else:
+                self._consecutive_failures = 0
+
+    def _decode(self, audio, start, end, arrived_at, final=False):
+        window_s = len(audio) / SAMPLE_RATE
+        began = time.perf_counter()
+        result = self._transcribe_fn(audio, " ".join(self.committed)[-200:])
+        elapsed = time.perf_counter() - began
+        segments = result.get("segments", [])
+        words = result["text"].split()
+        agreed = len(words) if final else _common_prefix(self._previous_words, words)
+
+        # Commit whole segments that lie inside the agreed prefix (never the last, still-growing one)
+        commit_words, commit_end, commit_text, forced = 0, 0.0, [], False
+        candidates = segments if final else segments[:-1]
+        for seg in candidates:
+            seg_words = seg["text"].split()
+            if commit_words + len(seg_words) > agreed:
+                break
+            commit_words += len(seg_words)
+            commit_end = seg["end"]
+            commit_text.append(seg["text"].strip())
+        if not commit_text and window_s > self.max_window_s:
+            # Window too long and nothing agreed: force-commit to keep decode cost bounded.
+            # With no segments (silence) the whole window is dropped, so it never grows to the buffer size
+            forced = True
+            head = segments[:-1] or segments
+            commit_words = sum(len(seg["text"].split()) for seg in head)
+            commit_end = head[-1]["end"] if head else window_s
+            commit_text = [seg["text"].strip() for seg in head]
+
+        with self._cond:
+            self.decodes += 1
+            self.rtf.append(elapsed / max(window_s, 1e-6))
+            self.partial_latency_ms.append((time.monotonic() - arrived_at) * 1000)
+            if commit_text or forced:
+                self.committed.extend(t for t in commit_text if t)
+                self._window_start = max(self._window_start, start + int(commit_end * SAMPLE_RATE))
+            remaining = words[commit_words:]
+            stable_count = max(0, agreed - commit_words)
+            self.stable = " ".join(remaining[:stable_count])
+            self.tentative = " ".join(remaining[stable_count:])
+            self._previous_words = remaining
+        if self.on_update:
+            self.on_update(self)
+
+    # --- Output ---
+
+    def text(self):
+        """Committed text followed by the current partial (stable + tentative) words."""
+        with self._cond:
+            parts = self.committed + [self.stable, self.tentative]
+        return " ".join(p for p in parts if p)
+
+    def stats(self):
+        with self._cond:
+            latencies = sorted(self.partial_latency_ms)
+            return {
+                "decodes": self.decodes,
+                "skipped_steps": self.skipped_steps,
+                "dropped_seconds": self.dropped_samples / SAMPLE_RATE,
+                "errors": self.errors,
+                "last_error": self.last_error,
+                "failed": self.failed,
+                "window_seconds": (self._ring.total - self._window_start) / SAMPLE_RATE,
+                "real_time_factor": sum(self.rtf) / len(self.rtf) if self.rtf else None,
+                "partial_latency_ms_p50": latencies[len(latencies) // 2] if latencies else None,
+                "partial_latency_ms_max": latencies[-1] if latencies else None,
+            }
@@ -0,0 +1,246 @@
+# asr/long_form.py
+"""
+Long-form transcription (meetings, hour-long recordings).
+
+The file is decoded by ffmpeg as a stream of bounded blocks, Silero VAD cuts
+it into speech segments at silences (no word is split between two segments),
+and the segments are transcribed in parallel by worker processes, each with
+its own resident Whisper. Results are stitched back in order with absolute
+timestamps. Peak memory depends on the block/segment size and the number of
+workers, not on the length of the file.
+
+    python vocomate_app/asr/long_form.py meeting.m4a --workers 4 --output meeting.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if repo_root not in sys.path:
+    sys.path.append(repo_root)
+from vocomate_app.utils.cpu_scheduler import available_cpus
+from vocomate_app.utils.vad import get_speech_timestamps_vad, stream_decode
+
+SAMPLE_RATE = 16000
+
+
+class SpeechSegment:
+    """A stretch of speech cut from the stream: samples plus its absolute start (seconds)."""
+
+    __slots__ = ("index", "start", "audio")
+
+    def __init__(self, index, start, audio):
+        self.index = index
+        self.start = start
+        self.audio = audio
+
+    @property
+    def end(self):
+        return self.start + len(self.audio) / SAMPLE_RATE
+
+
+def segment_stream(blocks, max_segment_seconds=30.0, pad_seconds=0.2, threshold=0.5, min_silence_duration_ms=300):
+    """
+    Cuts a stream of 16 kHz blocks into speech segments at silences.
+
+    Speech that runs into the end of a block is carried over to the next one, so
+    cuts only fall in pauses; the carry is bounded (a monologue without any pause
+    is cut once it reaches ``2 * max_segment_seconds``).
+
+    Args:
+        blocks (iterable[np.ndarray]): e.g. ``stream_decode(path)``
+        max_segment_seconds (float): Target segment length (Whisper works on 30 s windows)
+        pad_seconds (float): Context kept around each segment
+        threshold (float), min_silence_duration_ms (int): Silero settings
+
+    Yields:
+        SpeechSegment: In stream order
+    """
+    max_samples = int(max_segment_seconds * SAMPLE_RATE)
+    pad = int(pad_seconds * SAMPLE_RATE)
+    carry = np.zeros(0, dtype=np.float32)
+    offset = 0  # absolute sample index of carry[0]
+    index = 0
+    blocks = iter(blocks)
+    block = next(blocks, None)
+    while block is not None:
+        following = next(blocks, None)
+        final = following is None
+        buffer = np.concatenate([carry, block]) if len(carry) else block
+        timestamps = get_speech_timestamps_vad(buffer, threshold=threshold,
+                                               min_silence_duration_ms=min_silence_duration_ms, sr=SAMPLE_RATE)
+        # Greedily group consecutive speech regions into segments of at most max_samples
+        groups = []
+        for ts in timestamps:
+            if groups and ts["end"] - groups[-1][0] <= max_samples:
+                groups[-1][1] = ts["end"]
+            else:
+                groups.append([ts["start"], ts["end"]])
+        keep_from = len(buffer)
+        if not final and groups and len(buffer) - groups[-1][0] < 2 * max_samples:
+            # The last group may continue in the next block: hold it back
+            keep_from = groups.pop()[0]
+        elif not final and not groups:
+            keep_from = max(0, len(buffer) - pad)  # speech may start right at the boundary
+        for start, end in groups:
+            start, end = max(0, start - pad), min(len(buffer), end + pad)
+            yield SpeechSegment(index, (offset + start) / SAMPLE_RATE, buffer[start:end].copy())
+            index += 1
+        keep_from = max(0, keep_from - pad)
+        carry = buffer[keep_from:].copy()
+        offset += keep_from
+        block = following
+
+
+# --- Worker processes: one resident Whisper each ---
+
+_worker = {}
+
+
+def _init_worker(model_size, threads):
+    from vocomate_app.utils.cpu_scheduler import CpuScheduler, set_scheduler
+    from vocomate_app.utils.model_registry import get_whisper_model
+
+    # Split the cores between workers instead of every process using all of them
+    set_scheduler(CpuScheduler(plan={"transcribe": threads}))
+    _worker["model_size"] = model_size
+    get_whisper_model(model_size)
+
+
+def _transcribe_segment(audio, start, language, decode_options, model_size=None):
+    from vocomate_app.asr.whisper_asr import transcribe
+
+    result = transcribe(audio, model_size=model_size or _worker["model_size"], language=language,
+                        fp16=False, **decode_options)
+    segments = [
+        {"start": round(start + s["start"], 3), "end": round(start + s["end"], 3), "text": s["text"].strip()}
+        for s in result.get("segments", [])
+    ]
+    return {"start": start, "end": start + len(audio) / SAMPLE_RATE, "language": result.get("language"),
+            "text": result["text"].strip(), "segments": segments}
+
+
+def iter_transcribe_long(audio_path, model_size="base", language=None, workers=None, max_segment_seconds=30.0,
+                         block_seconds=60.0, threshold=0.5, stats=None, **decode_options):
+    """
+    Transcribes a long file and yields one result per speech segment, in order, as soon as it is done.
+
+    Args:
+        audio_path (str): Any ffmpeg-readable file
+        model_size (str): Whisper size
+        language (str, optional): Language code; detected on the first segment and reused otherwise
+        workers (int, optional): Worker processes (default: half the CPUs); 1 transcribes in-process
+        max_segment_seconds (float), block_seconds (float): Segment and decode block sizes
+        threshold (float): Silero speech threshold
+        stats (dict, optional): Filled with ``audio_seconds``, ``speech_seconds``, ``segments``
+        **decode_options: Passed to Whisper (beam_size, temperature, ...)
+
+    Yields:
+        dict: ``start``, ``end``, ``text``, ``language`` and Whisper ``segments`` with absolute timestamps
+    """
+    cpus = len(available_cpus())
+    workers = workers or max(1, cpus // 2)
+    stats = stats if stats is not None else {}
+    stats.update(audio_seconds=0.0, speech_seconds=0.0, segments=0)
+
+    def blocks():
+        for block in stream_decode(audio_path, SAMPLE_RATE, block_seconds):
+            stats["audio_seconds"] += len(block) / SAMPLE_RATE
+            yield block
+
+    segments = segment_stream(blocks(), max_segment_seconds=max_segment_seconds, threshold=threshold)
+
+    def account(segment):
+        stats["segments"] += 1
+        stats["speech_seconds"] += len(segment.audio) / SAMPLE_RATE
+
+    if workers == 1:
+        for segment in segments:
+            account(segment)
+            result = _transcribe_segment(segment.audio, segment.start, language, decode_options, model_size)
+            language = language or result["language"]
+            yield result
+        return
+
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(model_size, max(1, cpus // workers)))
+    pending = deque()
+    try:
+        if language is None:
+            # Detect once on the first segment so every worker decodes in the same language
+            first = next(segments, None)
+            if first is None:
+                return
+            account(first)
+            result = executor.submit(_transcribe_segment, first.audio, first.start, None, decode_options).result()
+            language = result["language"]
+            yield result
+        for segment in segments:
+            account(segment)
+            pending.append(executor.submit(_transcribe_segment, segment.audio, segment.start, language,
+                                           decode_options))
+            # Bounded in flight: memory stays flat however long the file is
+            while len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def transcribe_long(audio_path, model_size="base", language=None, workers=None, **options):
+    """
+    Long-form counterpart of ``transcribe``: returns ``text``, ``segments`` (absolute
+    timestamps), ``language`` and ``stats`` (audio/speech seconds, wall time, real-time factor).
+    """
+    stats = {}
+    began = time.perf_counter()
+    chunks = list(iter_transcribe_long(audio_path, model_size, language, workers, stats=stats, **options))
+    stats["wall_seconds"] = time.perf_counter() - began
+    stats["rtf"] = stats["wall_seconds"] / stats["audio_seconds"] if stats["audio_seconds"] else None
+    return {
+        "text": " ".join(chunk["text"] for chunk in chunks if chunk["text"]),
+        "segments": [segment for chunk in chunks for segment in chunk["segments"]],
+        "language": chunks[0]["language"] if chunks else language,
+        "stats": stats,
+    }
+
+
+def format_timestamp(seconds):
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{seconds:06.3f}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunked parallel transcription of long recordings")
+    parser.add_argument("audio")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--language")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--max-segment", type=float, default=30.0, help="Target segment length in seconds")
+    parser.add_argument("--output", help="Write text, timestamped segments and stats as JSON")
+    args = parser.parse_args()
+
+    stats = {}
+    began = time.perf_counter()
+    chunks = []
+    for chunk in iter_transcribe_long(args.audio, args.model, args.language, args.workers,
+                                      max_segment_seconds=args.max_segment, stats=stats):
+        chunks.append(chunk)
+        for segment in chunk["segments"]:
+            print(f"[{format_timestamp(segment['start'])} --> {format_timestamp(segment['end'])}] {segment['text']}")
+    stats["wall_seconds"] = time.perf_counter() - began
+    print(f"{stats['audio_seconds']:.1f}s of audio ({stats['speech_seconds']:.1f}s speech, "
+          f"{stats['segments']} segments) in {stats['wall_seconds']:.1f}s", file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"segments": [s for c in chunks for s in c["segments"]], "stats": stats}, f, indent=2)
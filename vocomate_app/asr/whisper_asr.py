@@ -1,22 +1,159 @@
 import os
-import whisper
+import sys
+import threading
+from collections import OrderedDict, defaultdict
 
-def transcribe_audio(audio_path, model_size="base", language=None):
+# Make the vocomate_app package importable when this file is run or imported standalone
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if repo_root not in sys.path:
+    sys.path.append(repo_root)
+from vocomate_app.utils.model_registry import get_whisper_model
+from vocomate_app.utils.cpu_scheduler import cpu_stage
+from vocomate_app.utils.tracing import span
+
+# Whisper installs kv-cache hooks on the shared model during decoding, so
+# concurrent decodes on the same resident model must be serialized.
+_model_locks = defaultdict(threading.Lock)
+
+def decoding_options(beam_size=None, temperature_fallback=True, condition_on_previous_text=True):
+    """
+    Whisper decoding settings, from fastest to most robust.
+
+    Args:
+        beam_size (int, optional): Beam search width; None decodes greedily
+        temperature_fallback (bool): Re-decode at higher temperatures when a window looks
+            like a failure (repetitive or low log-prob); off, every window is decoded once
+        condition_on_previous_text (bool): Prompt each 30 s window with the previous one's
+            text (helps long audio, costs decoder time and can propagate a bad window)
+    """
+    options = {"condition_on_previous_text": condition_on_previous_text}
+    if beam_size:
+        options["beam_size"] = beam_size
+    if not temperature_fallback:
+        options["temperature"] = 0.0
+    return options
+
+DECODING_PRESETS = {
+    "default": {},
+    "fast": decoding_options(temperature_fallback=False, condition_on_previous_text=False),
+    "accurate": decoding_options(beam_size=5),
+}
+
+def decoding_preset(name):
+    """The ``DECODING_PRESETS`` entry for ``name`` (case-insensitive); ValueError lists the valid ones."""
+    key = (name or "default").strip().lower()
+    if key not in DECODING_PRESETS:
+        raise ValueError(f"Unknown Whisper decoding preset {name!r}; expected one of: {', '.join(DECODING_PRESETS)}")
+    return DECODING_PRESETS[key]
+
+# VOCOMATE_WHISPER_DECODING=fast|accurate changes the decoding of every transcription
+DEFAULT_DECODING = decoding_preset(os.environ.get("VOCOMATE_WHISPER_DECODING", "default"))
+
+def fast_model(model_size):
+    """ "base" -> "base-int8": the dynamically quantized variant of a Whisper size."""
+    return model_size if model_size.endswith("-int8") else f"{model_size}-int8"
+
+class LanguageCache:
+    """
+    Language detected for each session, so Whisper only runs detection on a session's
+    first utterances (detection is an extra encoder pass per call).
+
+    Short utterances are too ambiguous to trust: a language is remembered once a
+    transcript has at least ``min_words`` words.
+    """
+
+    def __init__(self, max_sessions=1024, min_words=3):
+        self.max_sessions = max_sessions
+        self.min_words = min_words
+        self._languages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        with self._lock:
+            language = self._languages.get(session_id)
+            if language is not None:
+                self._languages.move_to_end(session_id)
+            return language
+
+    def remember(self, session_id, result):
+        if not result.get("language") or len(result["text"].split()) < self.min_words:
+            return
+        with self._lock:
+            self._languages[session_id] = result["language"]
+            self._languages.move_to_end(session_id)
+            while len(self._languages) > self.max_sessions:
+                self._languages.popitem(last=False)
+
+    def forget(self, session_id):
+        with self._lock:
+            self._languages.pop(session_id, None)
+
+session_languages = LanguageCache()
+
+def transcribe(audio, model_size="base", language=None, session_id=None, **decode_options):
+    """
+    Runs Whisper on a path or 16 kHz float32 array and returns the full result
+    (``text``, ``segments`` with timestamps, ``language``).
+
+    Extra keyword arguments are passed to ``model.transcribe`` (temperature, initial_prompt, ...)
+    on top of ``DEFAULT_DECODING``. With ``session_id`` and no ``language``, the language
+    detected earlier in that session is reused.
+    """
+    model = get_whisper_model(model_size)
+    detect = not language
+    if detect and session_id is not None:
+        language = session_languages.get(session_id)
+    decode_options = {**DEFAULT_DECODING, **decode_options}
+    if language:
+        decode_options["language"] = language
+    with span("transcribe"), _model_locks[model_size], cpu_stage("transcribe"):
+        result = model.transcribe(audio, **decode_options)
+    if detect and session_id is not None and language is None:
+        session_languages.remember(session_id, result)
+    return result
+
+def transcribe_audio(audio_path, model_size="base", language=None, long_form=False, fast=False, session_id=None,
+                     **decode_options):
     """
     Transcribes the given audio file using OpenAI Whisper.
 
     Args:
-        audio_path (str): Path to the audio file (wav, mp3, m4a, etc.)
-        model_size (str): Whisper model size ("tiny", "base", "small", "medium", "large")
+        audio_path (str | np.ndarray): Path to the audio file (wav, mp3, m4a, etc.), or
+            mono float32 samples at 16 kHz (no ffmpeg decode, e.g. from ``vad.process_recording``)
+        model_size (str): Whisper model size ("tiny", "base", "small", "medium", "large"),
+            or "<size>-int8" for the quantized CPU variant
         language (str, optional): Language code (e.g., "en" for English)
+        long_form (bool): Stream the file and transcribe VAD-cut segments in parallel
+            processes (``asr.long_form``), for recordings too long to decode at once; needs a path
+        fast (bool): int8 model, greedy decoding, no temperature fallback and no
+            conditioning on previous text (``scripts/bench_asr_fast.py`` measures the accuracy cost)
+        session_id (str, optional): Reuse the language detected earlier in this session
+        **decode_options: Whisper decoding settings, e.g. ``decoding_options(beam_size=5)``
 
     Returns:
         str: Transcribed text
     """
-    print(f"Loading Whisper model ({model_size})...")
-    model = whisper.load_model(model_size)
-    print(f"Transcribing {audio_path}...")
-    result = model.transcribe(audio_path, language=language) if language else model.transcribe(audio_path)
+    if fast:
+        model_size = fast_model(model_size)
+        decode_options = {**DECODING_PRESETS["fast"], **decode_options}
+    if long_form:
+        if not isinstance(audio_path, (str, os.PathLike)):
+            raise ValueError("long_form=True streams a file through ffmpeg: pass a path, not in-memory samples")
+        from vocomate_app.asr.long_form import transcribe_long
+        # Same per-session language reuse as transcribe()
+        detect = not language
+        if detect and session_id is not None:
+            language = session_languages.get(session_id)
+        result = transcribe_long(audio_path, model_size=model_size, language=language, **decode_options)
+        if detect and session_id is not None and language is None:
+            session_languages.remember(session_id, result)
+        return result["text"]
+    if isinstance(audio_path, str):
+        print(f"Transcribing {audio_path}...")
+    else:
+        print(f"Transcribing {len(audio_path) / 16000:.1f}s of in-memory audio...")
+    result = transcribe(audio_path, model_size=model_size, language=language, session_id=session_id,
+                        **decode_options)
     return result["text"]
 
 if __name__ == "__main__":
@@ -0,0 +1,189 @@
+# context/conversation.py
+import math
+from collections import deque
+
+DEFAULT_SYSTEM_PROMPT = "You are a helpful assistant. Answer all parts of the user's question."
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+# Chat templates add a few tokens per message for role markers
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token for English with Llama/Mistral tokenizers)."""
+    return max(1, math.ceil(len(text) / 4)) if text else 0
+
+
+def extractive_summary(previous_summary, turns, max_tokens, count_tokens=estimate_tokens):
+    """
+    Default summarizer: appends the first sentence of every folded turn to the running
+    summary and keeps the most recent part that fits in ``max_tokens``.
+    """
+    lines = [previous_summary] if previous_summary else []
+    for turn in turns:
+        first_sentence = turn["content"].strip().split(". ")[0].rstrip(".")
+        lines.append(f"{turn['role'].capitalize()}: {first_sentence}.")
+    summary = " ".join(lines)
+    while count_tokens(summary) > max_tokens and " " in summary:
+        summary = summary.split(" ", 1)[1]
+    return summary
+
+
+def llm_summarizer(client, model=None):
+    """
+    Builds a summarizer that asks the LLM to fold turns into the running summary.
+
+    Args:
+        client: An ``OllamaClient`` (or anything with a compatible ``chat``)
+        model (str, optional): Model to use instead of the client's default
+    """
+    def summarize(previous_summary, turns, max_tokens, count_tokens=estimate_tokens):
+        transcript = "\n".join(f"{t['role'].capitalize()}: {t['content']}" for t in turns)
+        prompt = (
+            f"Update the summary of a conversation in at most {max_tokens * 3 // 4} words. "
+            "Keep names, facts, decisions and open questions.\n\n"
+            f"Current summary:\n{previous_summary or '(empty)'}\n\nNew turns:\n{transcript}\n\nUpdated summary:"
+        )
+        summary = client.chat(prompt, model=model).strip()
+        return extractive_summary(summary, [], max_tokens, count_tokens)
+    return summarize
+
+
+class ConversationContext:
+    """
+    Token-budgeted conversation window for the chat LLM.
+
+    The prompt sent every turn is: the system prompt, a running summary of
+    folded-out turns, then the most recent turns verbatim. Its size never
+    exceeds ``max_tokens``, so prefill cost stays flat however long the session runs.
+
+    Older turns are folded into the summary in batches (down to ``low_water`` of
+    the window budget) rather than one per turn. Between folds the message list
+    only grows at the end, so the prompt prefix is byte-identical from turn to
+    turn and Ollama can reuse its prompt/KV cache instead of re-prefilling it.
+
+    Args:
+        system_prompt (str): Stable instructions placed first in every request
+        max_tokens (int): Upper bound for the whole prompt
+        summary_tokens (int): Upper bound for the running summary
+        low_water (float): Fraction of the window budget kept after a fold
+        summarizer (callable, optional): ``(previous_summary, turns, max_tokens, count_tokens) -> str``
+        count_tokens (callable, optional): Token counter, defaults to ``estimate_tokens``
+    """
+
+    def __init__(self, system_prompt=DEFAULT_SYSTEM_PROMPT, max_tokens=2048, summary_tokens=256,
+                 low_water=0.5, summarizer=None, count_tokens=estimate_tokens):
+        if summary_tokens >= max_tokens:
+            raise ValueError("summary_tokens must be smaller than max_tokens")
+        self.system_prompt = system_prompt
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.low_water = low_water
+        self.summarizer = summarizer or extractive_summary
+        self.count_tokens = count_tokens
+        self.summary = ""
+        self.turns = []
+        self.folds = 0
+        self.folded_turns = 0
+        self._last_sent = []
+        self.prefill_log = deque(maxlen=256)
+
+    # --- Building the window ---
+
+    def _message_tokens(self, message):
+        return self.count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+    def _prefix(self):
+        prefix = [{"role": "system", "content": self.system_prompt}]
+        if self.summary:
+            prefix.append({"role": "system", "content": SUMMARY_PREFIX + self.summary})
+        return prefix
+
+    def _window_budget(self):
+        # Reserve the full summary allowance up front so a growing summary never pushes us over
+        system_tokens = self._message_tokens({"content": self.system_prompt})
+        summary_message = self.summary_tokens + self.count_tokens(SUMMARY_PREFIX) + 1 + MESSAGE_OVERHEAD_TOKENS
+        return self.max_tokens - system_tokens - summary_message
+
+    def _truncate(self, message):
+        budget = self._window_budget() - MESSAGE_OVERHEAD_TOKENS
+        content = message["content"]
+        if self.count_tokens(content) <= budget:
+            return message
+        while self.count_tokens(content) > budget and " " in content:
+            content = content.rsplit(" ", 1)[0]
+        return {"role": message["role"], "content": content}
+
+    def add(self, role, content):
+        self.turns.append(self._truncate({"role": role, "content": content}))
+        self._maybe_fold()
+
+    def add_user(self, content):
+        self.add("user", content)
+
+    def add_assistant(self, content):
+        self.add("assistant", content)
+
+    def _window_tokens(self):
+        return sum(self._message_tokens(m) for m in self.turns)
+
+    def _maybe_fold(self):
+        budget = self._window_budget()
+        if self._window_tokens() <= budget:
+            return
+        target = budget * self.low_water
+        folded = []
+        # Always keep the newest turn verbatim
+        while len(self.turns) > 1 and self._window_tokens() > target:
+            folded.append(self.turns.pop(0))
+        if folded:
+            self.summary = self.summarizer(self.summary, folded, self.summary_tokens, self.count_tokens)
+            self.folds += 1
+            self.folded_turns += len(folded)
+
+    # --- Output ---
+
+    def messages(self):
+        """Structured ``messages`` for Ollama's /api/chat (stable prefix first, newest turn last)."""
+        return self._prefix() + list(self.turns)
+
+    def prompt_tokens(self):
+        return sum(self._message_tokens(m) for m in self.messages())
+
+    def record_request(self, messages=None):
+        """
+        Records a request about to be sent and returns its prefill accounting.
+
+        Returns:
+            dict: ``prompt_tokens`` (whole prompt, always <= max_tokens) and
+            ``new_tokens`` (tokens after the prefix shared with the previous request,
+            i.e. what Ollama has to prefill when its prompt cache is warm)
+        """
+        messages = messages if messages is not None else self.messages()
+        shared = 0
+        for previous, current in zip(self._last_sent, messages):
+            if previous != current:
+                break
+            shared += 1
+        entry = {
+            "prompt_tokens": sum(self._message_tokens(m) for m in messages),
+            "new_tokens": sum(self._message_tokens(m) for m in messages[shared:]),
+        }
+        self._last_sent = list(messages)
+        self.prefill_log.append(entry)
+        return entry
+
+    def stats(self):
+        return {
+            "turns_in_window": len(self.turns),
+            "prompt_tokens": self.prompt_tokens(),
+            "max_tokens": self.max_tokens,
+            "summary_tokens": self.count_tokens(self.summary),
+            "folds": self.folds,
+            "folded_turns": self.folded_turns,
+            "last_request": self.prefill_log[-1] if self.prefill_log else None,
+        }
+
+    def clear(self):
+        self.summary = ""
+        self.turns = []
+        self._last_sent = []
@@ -0,0 +1,254 @@
+# context/store.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+from vocomate_app.utils.model_registry import REPO_ROOT
+
+DEFAULT_DB_PATH = os.path.join(REPO_ROOT, 'logs', 'conversations.db')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    last_active REAL NOT NULL,
+    turns INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS turns (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    text TEXT NOT NULL,
+    created REAL NOT NULL,
+    latencies TEXT,
+    audio_path TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS turns_session_seq ON turns(session_id, seq);
+CREATE INDEX IF NOT EXISTS sessions_last_active ON sessions(last_active);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS turns_fts USING fts5(text, content='turns', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS turns_fts_insert AFTER INSERT ON turns BEGIN
+    INSERT INTO turns_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS turns_fts_delete AFTER DELETE ON turns BEGIN
+    INSERT INTO turns_fts(turns_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+_TURN_COLUMNS = "id, session_id, seq, role, text, created, latencies, audio_path"
+
+
+def _turn(row):
+    turn = dict(zip(("id", "session_id", "seq", "role", "text", "created", "latencies", "audio_path"), row))
+    turn["latencies"] = json.loads(turn["latencies"]) if turn["latencies"] else None
+    return turn
+
+
+def _escape_like(word):
+    return word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class ConversationStore:
+    """
+    SQLite-backed conversation history: sessions, turns (transcripts and replies),
+    per-turn latencies and references to saved audio.
+
+    Only the last ``tail_size`` turns of a session are kept in memory (for the
+    latest reply and recent context); everything older is read back a page at a
+    time through the ``(session_id, seq)`` index, so rendering a page costs the
+    same however long the session is. ``search`` runs an FTS5 full-text query over
+    every stored turn (plain substring matching where SQLite lacks FTS5).
+
+    Args:
+        path (str): Database file (created on first use); ":memory:" for a throwaway store
+        tail_size (int): Turns per session kept in memory
+        max_tails (int): Sessions whose tail is kept in memory (least recently used dropped)
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, tail_size=20, max_tails=256):
+        self.path = path
+        self.tail_size = tail_size
+        self.max_tails = max_tails
+        self.fts = None
+        self._db = None
+        self._tails = OrderedDict()  # session_id -> deque of recent turns
+        self._lock = threading.RLock()
+
+    def _conn(self):
+        # Connect lazily: importing the module (or an unused UI) never touches disk
+        if self._db is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA foreign_keys=ON")
+            db.executescript(_SCHEMA)
+            try:
+                db.executescript(_FTS_SCHEMA)
+                self.fts = True
+            except sqlite3.OperationalError:
+                self.fts = False  # SQLite built without FTS5
+            db.commit()
+            self._db = db
+        return self._db
+
+    # --- Writing ---
+
+    def add_turn(self, session_id, role, text, latencies=None, audio_path=None):
+        """Appends a turn and returns its id."""
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            tail = self._tail(session_id)  # loaded before the insert, so the new turn isn't read back twice
+            db.execute("INSERT OR IGNORE INTO sessions (id, created, last_active) VALUES (?, ?, ?)",
+                       (session_id, now, now))
+            db.execute("UPDATE sessions SET turns = turns + 1, last_active = ? WHERE id = ?", (now, session_id))
+            seq = db.execute("SELECT turns FROM sessions WHERE id = ?", (session_id,)).fetchone()[0]
+            cursor = db.execute(
+                "INSERT INTO turns (session_id, seq, role, text, created, latencies, audio_path) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (session_id, seq, role, text, now, json.dumps(latencies) if latencies else None, audio_path))
+            db.commit()
+            turn = {"id": cursor.lastrowid, "session_id": session_id, "seq": seq, "role": role, "text": text,
+                    "created": now, "latencies": latencies, "audio_path": audio_path}
+            tail.append(turn)
+            return turn["id"]
+
+    def update_turn(self, turn_id, latencies=None, audio_path=None):
+        """Attaches latencies (e.g. the finished turn's trace) or an audio reference to a stored turn."""
+        with self._lock:
+            db = self._conn()
+            if latencies is not None:
+                db.execute("UPDATE turns SET latencies = ? WHERE id = ?", (json.dumps(latencies), turn_id))
+            if audio_path is not None:
+                db.execute("UPDATE turns SET audio_path = ? WHERE id = ?", (audio_path, turn_id))
+            db.commit()
+            for tail in self._tails.values():
+                for turn in tail:
+                    if turn["id"] == turn_id:
+                        turn["latencies"] = latencies if latencies is not None else turn["latencies"]
+                        turn["audio_path"] = audio_path or turn["audio_path"]
+
+    def delete_session(self, session_id):
+        with self._lock:
+            db = self._conn()
+            db.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+            deleted = db.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount
+            db.commit()
+            self._tails.pop(session_id, None)
+            return deleted > 0
+
+    # --- Reading ---
+
+    def _tail(self, session_id):
+        # Caller holds the lock
+        tail = self._tails.get(session_id)
+        if tail is None:
+            rows = self._conn().execute(
+                f"SELECT {_TURN_COLUMNS} FROM turns WHERE session_id = ? ORDER BY seq DESC LIMIT ?",
+                (session_id, self.tail_size)).fetchall()
+            tail = self._tails[session_id] = deque((_turn(row) for row in reversed(rows)), maxlen=self.tail_size)
+            while len(self._tails) > self.max_tails:
+                self._tails.popitem(last=False)
+        self._tails.move_to_end(session_id)
+        return tail
+
+    def tail(self, session_id, n=None):
+        """The last ``n`` (default ``tail_size``) turns of a session, oldest first, from memory."""
+        with self._lock:
+            turns = list(self._tail(session_id))
+        return turns[-n:] if n else turns
+
+    def count(self, session_id):
+        with self._lock:
+            row = self._conn().execute("SELECT turns FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return row[0] if row else 0
+
+    def page(self, session_id, page=0, page_size=10):
+        """
+        One page of a session's turns, oldest first; page 0 is the most recent.
+
+        Pages are ranges of the per-session sequence number, so any page is one index seek.
+        """
+        with self._lock:
+            total = self.count(session_id)
+            high = total - page * page_size
+            rows = self._conn().execute(
+                f"SELECT {_TURN_COLUMNS} FROM turns WHERE session_id = ? AND seq > ? AND seq <= ? ORDER BY seq",
+                (session_id, max(0, high - page_size), high)).fetchall()
+        return [_turn(row) for row in rows]
+
+    def pages(self, session_id, page_size=10):
+        return max(1, -(-self.count(session_id) // page_size))
+
+    def search(self, query, session_id=None, limit=20):
+        """
+        Full-text search over stored turns, best matches first.
+
+        Args:
+            query (str): Words to find (FTS5 syntax is not required: each word is quoted)
+            session_id (str, optional): Restrict to one session
+
+        Returns:
+            list[dict]: Turns with a ``snippet`` that highlights the matches with ``**``
+        """
+        words = [w for w in query.split() if w]
+        if not words:
+            return []
+        with self._lock:
+            db = self._conn()
+            scope, params = ("AND t.session_id = ?", [session_id]) if session_id else ("", [])
+            columns = ", ".join("t." + c for c in _TURN_COLUMNS.split(", "))
+            if self.fts:
+                match = " ".join('"' + w.replace('"', '""') + '"' for w in words)
+                rows = db.execute(
+                    f"SELECT {columns}, snippet(turns_fts, 0, '**', '**', '…', 12) "
+                    "FROM turns_fts JOIN turns t ON t.id = turns_fts.rowid "
+                    f"WHERE turns_fts MATCH ? {scope} ORDER BY rank LIMIT ?",
+                    [match, *params, limit]).fetchall()
+            else:
+                # Words are matched literally, as with FTS5: escape LIKE's wildcards
+                like = " AND ".join("t.text LIKE ? ESCAPE '\\'" for _ in words)
+                rows = db.execute(
+                    f"SELECT {columns}, t.text FROM turns t "
+                    f"WHERE {like} {scope} ORDER BY t.id DESC LIMIT ?",
+                    [*(f"%{_escape_like(w)}%" for w in words), *params, limit]).fetchall()
+        results = []
+        for row in rows:
+            turn = _turn(row[:-1])
+            turn["snippet"] = row[-1]
+            results.append(turn)
+        return results
+
+    def sessions(self, limit=20, offset=0):
+        """Most recently active sessions first."""
+        with self._lock:
+            rows = self._conn().execute(
+                "SELECT id, created, last_active, turns FROM sessions ORDER BY last_active DESC LIMIT ? OFFSET ?",
+                (limit, offset)).fetchall()
+        return [dict(zip(("id", "created", "last_active", "turns"), row)) for row in rows]
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+            self._tails.clear()
+
+
+def store_from_env():
+    """VOCOMATE_HISTORY_DB (database file, default ``logs/conversations.db``) and VOCOMATE_HISTORY_TAIL."""
+    return ConversationStore(
+        path=os.environ.get("VOCOMATE_HISTORY_DB", DEFAULT_DB_PATH),
+        tail_size=int(os.environ.get("VOCOMATE_HISTORY_TAIL", 20)),
+    )
+
+
+conversation_store = store_from_env()
@@ -1,21 +1,428 @@
+import asyncio
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Make the vocomate_app package importable when this file is run or imported standalone
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if repo_root not in sys.path:
+    sys.path.append(repo_root)
+from vocomate_app.utils.sentences import SentenceSplitter
+from vocomate_app.utils.tracing import current_trace
+
+DEFAULT_BASE_URL = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+if not DEFAULT_BASE_URL.startswith("http"):
+    DEFAULT_BASE_URL = f"http://{DEFAULT_BASE_URL}"
+
+
+class OllamaBusyError(RuntimeError):
+    """Raised when the client's request queue is full (or the queue wait times out)."""
+
+
+class StreamEvent:
+    """A streamed piece of the reply: ``kind`` is "token" or "sentence"."""
+
+    __slots__ = ("kind", "text")
+
+    def __init__(self, kind, text):
+        self.kind = kind
+        self.text = text
+
+    def __repr__(self):
+        return f"StreamEvent({self.kind!r}, {self.text!r})"
+
+
+class StreamStats:
+    """Per-call timing of a streamed reply."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.time_to_first_token = None
+        self.total_time = None
+        self.tokens = 0
+        self.prompt_tokens = None
+        self.tokens_per_second = None
+
+    def as_dict(self):
+        return {
+            "time_to_first_token": self.time_to_first_token,
+            "total_time": self.total_time,
+            "tokens": self.tokens,
+            "prompt_tokens": self.prompt_tokens,
+            "tokens_per_second": self.tokens_per_second,
+        }
+
+
+class OllamaStream:
+    """
+    Iterates over a streamed Ollama chat reply.
+
+    Yields ``StreamEvent("token", ...)`` for every fragment Ollama sends and
+    ``StreamEvent("sentence", ...)`` as soon as a sentence (or clause, with
+    ``clauses=True``) is complete, so speech synthesis can start on the first one.
+    After iteration ``text`` holds the full reply and ``stats`` the timings.
+    """
+
+    def __init__(self, response, on_token=None, on_sentence=None, clauses=False, min_chars=20, on_close=None):
+        self._response = response
+        self._on_close = on_close
+        self._closed = False
+        self._exhausted = False
+        self._on_token = on_token
+        self._on_sentence = on_sentence
+        self._splitter = SentenceSplitter(clauses=clauses, min_chars=min_chars)
+        self._parts = []
+        self.stats = StreamStats()
+        # Captured here because the stream is often consumed on another thread (e.g. SentencePipeline)
+        self._trace = current_trace()
+
+    @property
+    def text(self):
+        return "".join(self._parts)
+
+    def __iter__(self):
+        try:
+            for line in self._response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if "error" in chunk:
+                    raise RuntimeError(f"Ollama error: {chunk['error']}")
+                token = chunk.get("message", {}).get("content", "")
+                if token:
+                    yield from self._handle_token(token)
+                if chunk.get("done"):
+                    self._finish(chunk)
+                    break
+            for sentence in self._splitter.flush():
+                yield from self._emit_sentence(sentence)
+            self._exhausted = True
+        finally:
+            self.close()
+        if self.stats.total_time is None:
+            self._finish({})
+
+    def _handle_token(self, token):
+        if self.stats.time_to_first_token is None:
+            self.stats.time_to_first_token = time.perf_counter() - self.stats.started_at
+            if self._trace:
+                self._trace.record("prefill", self.stats.time_to_first_token, self.stats.started_at)
+                self._trace.mark("first_token")
+        self.stats.tokens += 1
+        self._parts.append(token)
+        if self._on_token:
+            self._on_token(token)
+        yield StreamEvent("token", token)
+        for sentence in self._splitter.feed(token):
+            yield from self._emit_sentence(sentence)
+
+    def _emit_sentence(self, sentence):
+        if self._on_sentence:
+            self._on_sentence(sentence)
+        yield StreamEvent("sentence", sentence)
+
+    def _finish(self, chunk):
+        stats = self.stats
+        stats.total_time = time.perf_counter() - stats.started_at
+        if self._trace and stats.time_to_first_token is not None:
+            self._trace.record("generation", stats.total_time - stats.time_to_first_token)
+        stats.prompt_tokens = chunk.get("prompt_eval_count")
+        if chunk.get("eval_count") and chunk.get("eval_duration"):
+            # Ollama reports exact generation counts/durations (ns) in the final chunk
+            stats.tokens = chunk["eval_count"]
+            stats.tokens_per_second = chunk["eval_count"] / (chunk["eval_duration"] / 1e9)
+        elif stats.time_to_first_token is not None and stats.total_time > stats.time_to_first_token:
+            stats.tokens_per_second = stats.tokens / (stats.total_time - stats.time_to_first_token)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._response.close()
+        if not self._exhausted and self._trace:
+            # Closed mid-reply (turn cancelled): whatever was generated is thrown away
+            self._trace.waste("llm", time.perf_counter() - self.stats.started_at)
+        if self._on_close:
+            self._on_close()
+
+
+class AsyncOllamaStream:
+    """
+    Async-iterator counterpart of ``OllamaStream`` (same events, ``text`` and ``stats``).
+
+    The blocking HTTP stream is consumed on a worker thread and relayed to the
+    event loop, so the loop is never blocked while waiting for tokens.
+    """
+
+    def __init__(self, open_stream):
+        self._open_stream = open_stream
+        self._stream = None
+
+    @property
+    def text(self):
+        return self._stream.text if self._stream else ""
+
+    @property
+    def stats(self):
+        return self._stream.stats if self._stream else None
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        done = object()
+        cancelled = threading.Event()
+
+        def pump():
+            try:
+                self._stream = self._open_stream()
+                for event in self._stream:
+                    if cancelled.is_set():
+                        self._stream.close()
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, event)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        # Run in a copy of the caller's context so the turn's trace follows the stream
+        worker = loop.run_in_executor(None, contextvars.copy_context().run, pump)
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            cancelled.set()
+            if self._stream is not None:
+                self._stream.close()  # unblocks the worker if it is waiting on the socket
+            await worker
+
 
-def query_ollama(prompt, model="mistral", history=None, base_url="http://localhost:11434"):
+class OllamaClient:
+    """
+    Reusable Ollama chat client.
+
+    Keeps a pooled keep-alive HTTP session, applies connect/read timeouts,
+    retries transient failures with exponential backoff and bounds the number of
+    concurrent requests (extra callers queue up to ``max_queue``).
+
+    Args:
+        base_url (str): Ollama server URL
+        model (str): Default model name
+        connect_timeout (float), read_timeout (float): Seconds; read applies between streamed chunks too
+        max_concurrency (int): Requests allowed in flight at once
+        max_queue (int): Callers allowed to wait for a slot before OllamaBusyError is raised
+        queue_timeout (float, optional): Max seconds to wait for a slot
+        retries (int): Retries for connection errors and 502/503/504 responses
+        backoff_factor (float): Backoff between retries (0.5 -> 0.5s, 1s, 2s, ...)
+        keep_alive (str | int, optional): Passed to Ollama so the model stays loaded between turns
+        options (dict, optional): Default Ollama model options (temperature, num_ctx, ...)
+    """
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, model="mistral", connect_timeout=3.05, read_timeout=120.0,
+                 max_concurrency=2, max_queue=32, queue_timeout=None, retries=3, backoff_factor=0.5,
+                 keep_alive="30m", options=None):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.timeout = (connect_timeout, read_timeout)
+        self.keep_alive = keep_alive
+        self.options = options or {}
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,  # never replay a request once Ollama may have started generating
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "POST"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(max_concurrency, 1), max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._in_flight = 0
+
+    # --- Concurrency control ---
+
+    def _acquire(self):
+        # A free slot is taken at once; only callers that actually have to wait count against max_queue
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                if self._waiting >= self.max_queue:
+                    raise OllamaBusyError(f"Ollama request queue is full ({self.max_queue} waiting)")
+                self._waiting += 1
+            try:
+                acquired = self._slots.acquire(timeout=self.queue_timeout)
+            finally:
+                with self._lock:
+                    self._waiting -= 1
+            if not acquired:
+                raise OllamaBusyError(f"Timed out after {self.queue_timeout}s waiting for an Ollama slot")
+        with self._lock:
+            self._in_flight += 1
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def queue_stats(self):
+        with self._lock:
+            return {"in_flight": self._in_flight, "waiting": self._waiting}
+
+    # --- Requests ---
+
+    def _payload(self, prompt, history, model, options, stream):
+        # Copy so the caller's history is never modified
+        messages = list(history) if history else []
+        if prompt is not None:
+            messages.append({"role": "user", "content": prompt})
+        payload = {"model": model or self.model, "messages": messages, "stream": stream}
+        merged = {**self.options, **(options or {})}
+        if merged:
+            payload["options"] = merged
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        return payload
+
+    def chat(self, prompt, history=None, model=None, options=None):
+        """
+        Sends a chat request and returns the full reply text.
+
+        Args:
+            prompt (str | None): Appended as a user message; None when ``history`` already ends with it
+            history (list, optional): Previous chat messages ({"role", "content"} dicts), not modified
+            model (str, optional): Overrides the client's default model
+            options (dict, optional): Per-call Ollama options
+
+        Returns:
+            str: Assistant reply
+        """
+        self._acquire()
+        try:
+            response = self.session.post(
+                f"{self.base_url}/api/chat",
+                json=self._payload(prompt, history, model, options, stream=False),
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            return response.json()["message"]["content"]
+        finally:
+            self._release()
+
+    def stream(self, prompt, history=None, model=None, options=None, on_token=None, on_sentence=None,
+               clauses=False):
+        """
+        Streams a chat reply; same arguments as ``chat`` plus the streaming callbacks.
+
+        Returns:
+            OllamaStream: Iterable of StreamEvent. The concurrency slot is held until the
+            stream is exhausted or closed.
+        """
+        self._acquire()
+        try:
+            response = self.session.post(
+                f"{self.base_url}/api/chat",
+                json=self._payload(prompt, history, model, options, stream=True),
+                timeout=self.timeout,
+                stream=True,
+            )
+            response.raise_for_status()
+        except Exception:
+            self._release()
+            raise
+        return OllamaStream(response, on_token=on_token, on_sentence=on_sentence, clauses=clauses,
+                            on_close=self._release)
+
+    async def achat(self, prompt, history=None, model=None, options=None):
+        """Asyncio variant of ``chat``; the blocking request runs on a worker thread."""
+        return await asyncio.to_thread(self.chat, prompt, history, model, options)
+
+    def astream(self, prompt, history=None, model=None, options=None, **kwargs):
+        """Asyncio variant of ``stream``; returns an AsyncOllamaStream."""
+        return AsyncOllamaStream(lambda: self.stream(prompt, history, model, options, **kwargs))
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url=DEFAULT_BASE_URL):
+    """Returns the process-wide client for ``base_url`` so every caller shares one connection pool."""
+    with _clients_lock:
+        if base_url not in _clients:
+            _clients[base_url] = OllamaClient(base_url=base_url)
+        return _clients[base_url]
+
+
+def query_ollama(prompt, model="mistral", history=None, base_url=DEFAULT_BASE_URL):
     """
     Sends a prompt to a local Ollama LLM and returns the response.
     """
-    url = f"{base_url}/api/chat"
-    messages = history if history else []
-    messages.append({"role": "user", "content": prompt})
-    payload = {
-        "model": model,
-        "messages": messages,
-        "stream": False
-    }
-    response = requests.post(url, json=payload)
-    response.raise_for_status()
-    data = response.json()
-    return data["message"]["content"]
+    return get_client(base_url).chat(prompt, history=history, model=model)
+
+
+def stream_ollama(prompt, model="mistral", history=None, base_url=DEFAULT_BASE_URL,
+                  on_token=None, on_sentence=None, clauses=False):
+    """
+    Streams a reply from a local Ollama LLM.
+
+    Args:
+        prompt (str): User message
+        model (str): Ollama model name
+        history (list, optional): Previous chat messages ({"role", "content"} dicts)
+        base_url (str): Ollama server URL
+        on_token (callable, optional): Called with every raw token
+        on_sentence (callable, optional): Called with every completed sentence
+        clauses (bool): Also emit on clause boundaries for earlier speech
+
+    Returns:
+        OllamaStream: Iterable of StreamEvent; ``.text`` and ``.stats`` are filled as it is consumed
+    """
+    return get_client(base_url).stream(prompt, history=history, model=model, on_token=on_token,
+                                       on_sentence=on_sentence, clauses=clauses)
+
+
+def astream_ollama(prompt, **kwargs):
+    """
+    Async-iterator variant of ``stream_ollama``; takes the same arguments.
+
+    Usage:
+        stream = astream_ollama("Hi")
+        async for event in stream:
+            ...
+        print(stream.stats.as_dict())
+    """
+    return AsyncOllamaStream(lambda: stream_ollama(prompt, **kwargs))
+
 
 if __name__ == "__main__":
     reply = query_ollama("Hello! What can you do?")
@@ -0,0 +1,205 @@
+# llm/stub_server.py
+"""
+Local stand-in for the Ollama HTTP API.
+
+Replays canned replies (or canned NDJSON lines) on /api/chat and /api/generate
+at a configurable token rate, so the streaming client, benchmarks and UIs can
+be exercised without a running Ollama.
+
+    python vocomate_app/llm/stub_server.py --port 11434 --tokens-per-second 30
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = (
+    "Hello! I am a local stand-in for the language model. "
+    "I can answer questions, tell short stories, and help you test the voice pipeline."
+)
+
+
+def tokenize(text):
+    """Rough word-piece tokenization used to pace the stream (whitespace stays attached)."""
+    return re.findall(r"\S+\s*", text)
+
+
+class StubOllamaServer:
+    """
+    Threaded HTTP server that speaks enough of the Ollama API for local testing.
+
+    Args:
+        reply (str | callable): Reply text, or ``reply(messages) -> str``
+        tokens_per_second (float, optional): Streaming pace; unlimited when None
+        first_token_delay (float): Extra delay (s) before the first token, to mimic prefill
+        ndjson_lines (list[str], optional): Exact NDJSON lines to replay for streaming requests
+        host (str), port (int): Bind address; port 0 picks a free port
+    """
+
+    def __init__(self, reply=DEFAULT_REPLY, tokens_per_second=None, first_token_delay=0.0,
+                 ndjson_lines=None, host="127.0.0.1", port=0):
+        self.reply = reply
+        self.tokens_per_second = tokens_per_second
+        self.first_token_delay = first_token_delay
+        self.ndjson_lines = ndjson_lines
+        self.requests = []
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reply_for(self, messages):
+        return self.reply(messages) if callable(self.reply) else self.reply
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client dropped a keep-alive connection
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._send_json({"models": [{"name": "stub"}]})
+                else:
+                    self._send_json({"error": "not found"}, status=404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                stub.requests.append({"path": self.path, "body": body})
+                if self.path == "/api/chat":
+                    messages = body.get("messages", [])
+                elif self.path == "/api/generate":
+                    messages = [{"role": "user", "content": body.get("prompt", "")}]
+                else:
+                    self._send_json({"error": "not found"}, status=404)
+                    return
+                model = body.get("model", "stub")
+                text = stub.reply_for(messages)
+                chat = self.path == "/api/chat"
+                if body.get("stream", True):
+                    self._stream(model, text, chat, prompt_tokens=self._count_prompt(messages))
+                else:
+                    time.sleep(stub.first_token_delay)
+                    if stub.tokens_per_second:
+                        time.sleep(len(tokenize(text)) / stub.tokens_per_second)
+                    chunk = self._chunk(model, text, chat, done=True)
+                    chunk.update(eval_count=len(tokenize(text)), prompt_eval_count=self._count_prompt(messages))
+                    self._send_json(chunk)
+
+            def _count_prompt(self, messages):
+                return sum(len(tokenize(m.get("content", ""))) for m in messages)
+
+            def _chunk(self, model, text, chat, done):
+                chunk = {"model": model, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"), "done": done}
+                if chat:
+                    chunk["message"] = {"role": "assistant", "content": text}
+                else:
+                    chunk["response"] = text
+                return chunk
+
+            def _stream(self, model, text, chat, prompt_tokens):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    time.sleep(stub.first_token_delay)
+                    delay = 1.0 / stub.tokens_per_second if stub.tokens_per_second else 0.0
+                    if stub.ndjson_lines is not None:
+                        for line in stub.ndjson_lines:
+                            self._write_chunk(line.rstrip("\n") + "\n")
+                            time.sleep(delay)
+                    else:
+                        started = time.perf_counter()
+                        tokens = tokenize(text)
+                        for token in tokens:
+                            self._write_chunk(json.dumps(self._chunk(model, token, chat, done=False)) + "\n")
+                            time.sleep(delay)
+                        final = self._chunk(model, "", chat, done=True)
+                        final.update(
+                            eval_count=len(tokens),
+                            eval_duration=int((time.perf_counter() - started) * 1e9),
+                            prompt_eval_count=prompt_tokens,
+                        )
+                        self._write_chunk(json.dumps(final) + "\n")
+                    self._write_chunk("")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client closed the stream early
+
+            def _write_chunk(self, text):
+                data = text.encode("utf-8")
+                self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def _send_json(self, data, status=200):
+                payload = json.dumps(data).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    parser.add_argument("--first-token-delay", type=float, default=0.0)
+    parser.add_argument("--reply", default=DEFAULT_REPLY)
+    parser.add_argument("--ndjson", help="File of NDJSON lines to replay for streaming requests")
+    args = parser.parse_args()
+
+    ndjson_lines = None
+    if args.ndjson:
+        with open(args.ndjson) as f:
+            ndjson_lines = [line for line in f if line.strip()]
+    server = StubOllamaServer(
+        reply=args.reply,
+        tokens_per_second=args.tokens_per_second,
+        first_token_delay=args.first_token_delay,
+        ndjson_lines=ndjson_lines,
+        host=args.host,
+        port=args.port,
+    )
+    print(f"Stub Ollama listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,252 @@
+# main.py
+"""
+Multi-session voice server: one process holds the models, any number of thin
+clients (Streamlit/Gradio with VOCOMATE_SERVER_URL, browsers, scripts) share it.
+
+    uvicorn vocomate_app.main:app
+    python vocomate_app/main.py --stub-llm    # local testing without Ollama
+
+Endpoints:
+    GET  /health                     liveness
+    POST /sessions                   -> {"session_id"}
+    GET/DELETE /sessions/{id}
+    POST /sessions/{id}/cancel       cancel the turn in progress
+    POST /transcribe                 recording bytes -> {"text", "has_speech", "audio_seconds"}
+    POST /chat                       {"session_id", "text"} -> {"reply"}
+    POST /speak                      {"text", "speaker", "speed"} -> audio/wav
+    POST /turn?session_id=...        recording bytes (or {"text"}) -> NDJSON turn events
+    WS   /ws/{session_id}            binary recording or {"text"} per turn -> JSON turn events
+    GET  /metrics                    Prometheus (stage latencies, queue depths, sessions)
+    GET  /stats                      the same as JSON
+
+Turn events are ``transcript``, ``audio`` (one per sentence, base64 16-bit WAV),
+``reply``, ``done`` (with the turn's trace), or ``no_speech``/``error``. A new turn
+in the same session supersedes the running one, which ends with ``cancelled``.
+Full queues and the session limit answer 503 with Retry-After.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+from contextlib import asynccontextmanager
+from typing import Optional
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if repo_root not in sys.path:
+    sys.path.append(repo_root)
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel
+
+from vocomate_app.llm.ollama_client import DEFAULT_BASE_URL, OllamaBusyError, OllamaClient
+from vocomate_app.server.service import VoiceService, encode_wav
+from vocomate_app.server.sessions import SessionLimitError
+from vocomate_app.server.workers import ServerBusyError
+from vocomate_app.utils.model_registry import warmup_from_env
+from vocomate_app.utils.tracing import tracer
+
+BUSY_ERRORS = (ServerBusyError, OllamaBusyError, SessionLimitError)
+
+
+class ChatRequest(BaseModel):
+    text: str
+    session_id: Optional[str] = None
+
+
+class SpeakRequest(BaseModel):
+    text: str
+    language: str = "EN"
+    speaker: str = "EN-Default"
+    speed: float = 1.0
+
+
+def service_from_env(llm=None):
+    """
+    VOCOMATE_ASR_WORKERS / VOCOMATE_TTS_WORKERS size the stage pools, VOCOMATE_MAX_QUEUE bounds
+    their queues, VOCOMATE_MAX_SESSIONS / VOCOMATE_SESSION_TTL bound sessions,
+    VOCOMATE_LLM_MODEL and VOCOMATE_WHISPER_MODEL pick the models.
+    """
+    env = os.environ.get
+    return VoiceService(
+        llm=llm or OllamaClient(base_url=DEFAULT_BASE_URL, model=env("VOCOMATE_LLM_MODEL", "mistral")),
+        asr_workers=int(env("VOCOMATE_ASR_WORKERS", 1)),
+        tts_workers=int(env("VOCOMATE_TTS_WORKERS", 2)),
+        max_queue=int(env("VOCOMATE_MAX_QUEUE", 16)),
+        max_sessions=int(env("VOCOMATE_MAX_SESSIONS", 100)),
+        session_ttl=float(env("VOCOMATE_SESSION_TTL", 1800)),
+        whisper_model=env("VOCOMATE_WHISPER_MODEL", "base"),
+    )
+
+
+def encode_event(event):
+    """Turn event -> JSON-ready dict (audio as base64 WAV)."""
+    if event["type"] != "audio":
+        return event
+    return {
+        "type": "audio",
+        "sentence": event["sentence"],
+        "sample_rate": event["sample_rate"],
+        "wav": base64.b64encode(encode_wav(event["audio"], event["sample_rate"])).decode("ascii"),
+    }
+
+
+def create_app(service=None):
+    service = service or service_from_env()
+
+    @asynccontextmanager
+    async def lifespan(app):
+        # Load the models once, before the first request comes in
+        await asyncio.to_thread(warmup_from_env)
+        yield
+        service.shutdown()
+
+    app = FastAPI(title="vocomate", lifespan=lifespan)
+    app.state.service = service
+
+    @app.exception_handler(ServerBusyError)
+    @app.exception_handler(OllamaBusyError)
+    @app.exception_handler(SessionLimitError)
+    async def busy(request, exc):
+        return JSONResponse({"error": str(exc)}, status_code=503, headers={"Retry-After": "1"})
+
+    def session_or_404(session_id):
+        session = service.sessions.get(session_id, create=False)
+        if session is None:
+            raise HTTPException(404, f"Unknown session {session_id}")
+        return session
+
+    @app.get("/health")
+    async def health():
+        return {"ok": True, "service": "vocomate"}
+
+    @app.post("/sessions")
+    async def create_session():
+        return {"session_id": service.sessions.create().id}
+
+    @app.get("/sessions/{session_id}")
+    async def session_info(session_id: str):
+        return session_or_404(session_id).info()
+
+    @app.delete("/sessions/{session_id}")
+    async def delete_session(session_id: str):
+        if not service.sessions.delete(session_id):
+            raise HTTPException(404, f"Unknown session {session_id}")
+        return {"deleted": session_id}
+
+    @app.post("/sessions/{session_id}/cancel")
+    async def cancel_turn(session_id: str):
+        return {"cancelled": service.cancel_turn(session_or_404(session_id))}
+
+    @app.post("/transcribe")
+    async def transcribe(request: Request, language: Optional[str] = None):
+        return await service.transcribe(await request.body(), language)
+
+    @app.post("/chat")
+    async def chat(body: ChatRequest):
+        session = service.sessions.get(body.session_id)
+        return {"session_id": session.id, "reply": await service.chat(session, body.text)}
+
+    @app.post("/speak")
+    async def speak(body: SpeakRequest):
+        audio, sample_rate = await service.speak(body.text, language=body.language, speaker=body.speaker,
+                                                 speed=body.speed)
+        return Response(encode_wav(audio, sample_rate), media_type="audio/wav")
+
+    @app.post("/turn")
+    async def turn(request: Request, session_id: Optional[str] = None, language: Optional[str] = None,
+                   speed: float = 1.0):
+        session = service.sessions.get(session_id)
+        if request.headers.get("content-type", "").startswith("application/json"):
+            audio, text = None, (await request.json())["text"]
+        else:
+            audio, text = await request.body(), None
+        events = service.turn_events(session, audio=audio, text=text, language=language, speed=speed)
+        # Run up to the first event before answering, so admission errors still become a 503
+        first = await events.__anext__()
+
+        async def body():
+            yield json.dumps({"type": "session", "session_id": session.id}) + "\n"
+            yield json.dumps(encode_event(first)) + "\n"
+            try:
+                async for event in events:
+                    yield json.dumps(encode_event(event)) + "\n"
+            except Exception as e:
+                yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+            finally:
+                await events.aclose()
+
+        return StreamingResponse(body(), media_type="application/x-ndjson")
+
+    @app.websocket("/ws/{session_id}")
+    async def websocket_turns(websocket: WebSocket, session_id: str, speed: float = 1.0):
+        await websocket.accept()
+        try:
+            session = service.sessions.get(session_id)
+        except SessionLimitError as e:
+            await websocket.close(code=1013, reason=str(e))
+            return
+        current = None
+
+        async def run_turn(audio, text):
+            try:
+                async for event in service.turn_events(session, audio=audio, text=text, speed=speed):
+                    await websocket.send_json(encode_event(event))
+            except BUSY_ERRORS as e:
+                await websocket.send_json({"type": "error", "error": str(e), "busy": True})
+            except Exception as e:
+                await websocket.send_json({"type": "error", "error": str(e)})
+
+        # Keep reading while a turn runs: a new utterance (or {"type": "cancel"}) cancels it
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes") is not None:
+                    audio, text = message["bytes"], None
+                else:
+                    payload = json.loads(message["text"])
+                    if payload.get("type") == "cancel":
+                        service.cancel_turn(session)
+                        continue
+                    audio, text = None, payload["text"]
+                current = asyncio.ensure_future(run_turn(audio, text))
+        except WebSocketDisconnect:
+            pass
+        finally:
+            if current is not None:
+                current.cancel()
+
+    @app.get("/metrics")
+    async def metrics():
+        return PlainTextResponse(tracer.export_prometheus() + service.export_prometheus(),
+                                 media_type="text/plain; version=0.0.4")
+
+    @app.get("/stats")
+    async def stats():
+        return {**service.stats(), "latency": tracer.summary()}
+
+    return app
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="vocomate voice server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--stub-llm", action="store_true", help="Answer with a local stand-in Ollama")
+    args = parser.parse_args()
+
+    service = None
+    if args.stub_llm:
+        from vocomate_app.llm.stub_server import StubOllamaServer
+        stub = StubOllamaServer(tokens_per_second=30.0, first_token_delay=0.15).start()
+        service = service_from_env(OllamaClient(base_url=stub.url))
+        print(f"Stand-in Ollama at {stub.url}")
+    uvicorn.run(create_app(service) if service else app, host=args.host, port=args.port)
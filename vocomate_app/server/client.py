@@ -0,0 +1,161 @@
+# server/client.py
+import base64
+import io
+import json
+import queue
+import threading
+
+import requests
+import soundfile as sf
+
+from vocomate_app.utils.cancellation import TurnCancelled
+
+
+def decode_wav(data):
+    samples, sample_rate = sf.read(io.BytesIO(data), dtype="float32")
+    return samples, sample_rate
+
+
+class TurnStream:
+    """
+    One streamed ``/turn`` response, read on a background thread.
+
+    Iterating yields ``(sentence, samples, sample_rate)`` chunks in order, so it
+    can go straight to ``AudioPlayer.play``. ``transcript``/``reply`` are filled
+    as their events arrive (``wait_transcript``/``reply_ready`` to block on them),
+    ``trace`` holds the server-side trace once the turn is done.
+
+    A turn the server cancelled (e.g. superseded by a newer turn of the same
+    session) sets ``cancelled``/``reason`` and raises TurnCancelled from
+    ``wait_transcript`` and iteration, unless this client closed it itself.
+    """
+
+    def __init__(self, response):
+        self._response = response
+        self._chunks = queue.Queue()
+        self.session_id = None
+        self.transcript = None
+        self.no_speech = False
+        self.reply = None
+        self.llm_stats = None
+        self.trace = None
+        self.error = None
+        self.cancelled = False
+        self.reason = None
+        self.transcript_ready = threading.Event()
+        self.reply_ready = threading.Event()
+        self._closed = False
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def _read(self):
+        try:
+            for line in self._response.iter_lines():
+                if not line:
+                    continue
+                event = json.loads(line)
+                kind = event["type"]
+                if kind == "session":
+                    self.session_id = event["session_id"]
+                elif kind == "transcript":
+                    self.transcript = event["text"]
+                    self.transcript_ready.set()
+                elif kind == "no_speech":
+                    self.no_speech = True
+                    self.transcript_ready.set()
+                elif kind == "audio":
+                    samples, sample_rate = decode_wav(base64.b64decode(event["wav"]))
+                    self._chunks.put((event["sentence"], samples, sample_rate))
+                elif kind == "reply":
+                    self.reply = event["text"]
+                    self.llm_stats = event.get("llm")
+                    self.reply_ready.set()
+                elif kind == "done":
+                    self.trace = event["trace"]
+                elif kind == "error":
+                    self.error = event["error"]
+                elif kind == "cancelled":
+                    self.cancelled = True
+                    self.reason = event.get("reason", "cancelled")
+                    self.transcript_ready.set()
+                    self.reply_ready.set()
+        except Exception as e:
+            if not self._closed:
+                self.error = str(e)
+        finally:
+            self.transcript_ready.set()
+            self.reply_ready.set()
+            self._chunks.put(None)
+
+    def wait_transcript(self, timeout=None):
+        """
+        Blocks until the server transcribed the recording; None when it had no speech.
+        Raises TurnCancelled if the turn was superseded before it was transcribed.
+        """
+        self.transcript_ready.wait(timeout)
+        if self.transcript is None:
+            if self.cancelled and not self._closed:
+                raise TurnCancelled(self.reason)
+            if self.error:
+                raise RuntimeError(self.error)
+        return self.transcript
+
+    def __iter__(self):
+        while (chunk := self._chunks.get()) is not None:
+            yield chunk
+        if self._closed:
+            return
+        if self.cancelled:
+            raise TurnCancelled(self.reason)
+        if self.error:
+            raise RuntimeError(self.error)
+
+    def close(self):
+        """Drops the connection; the server stops the turn (LLM stream and queued sentences)."""
+        self._closed = True
+        self._response.close()
+
+
+class VoiceClient:
+    """
+    Thin client for the voice server (``vocomate_app/main.py``).
+
+    Args:
+        base_url (str): Server URL, e.g. ``http://localhost:8000``
+        timeout (tuple): (connect, read) seconds
+    """
+
+    def __init__(self, base_url, timeout=(3.05, 300.0)):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def _post(self, path, **kwargs):
+        response = self.session.post(f"{self.base_url}{path}", timeout=self.timeout, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def create_session(self):
+        return self._post("/sessions").json()["session_id"]
+
+    def transcribe(self, audio_bytes, language=None):
+        return self._post("/transcribe", data=audio_bytes, params={"language": language} if language else None).json()
+
+    def chat(self, text, session_id=None):
+        return self._post("/chat", json={"text": text, "session_id": session_id}).json()["reply"]
+
+    def speak(self, text, **speech_kwargs):
+        """Returns ``(samples, sample_rate)`` of the cloned speech."""
+        return decode_wav(self._post("/speak", json={"text": text, **speech_kwargs}).content)
+
+    def turn(self, audio_bytes=None, text=None, session_id=None, speed=1.0):
+        """Starts a full turn (recording or text) and returns its TurnStream."""
+        params = {"session_id": session_id, "speed": speed}
+        if audio_bytes is not None:
+            response = self._post("/turn", data=audio_bytes, params=params, stream=True)
+        else:
+            response = self._post("/turn", json={"text": text}, params=params, stream=True)
+        return TurnStream(response)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,282 @@
+# server/service.py
+import asyncio
+import io
+
+import numpy as np
+import soundfile as sf
+
+from vocomate_app.llm.ollama_client import OllamaClient
+from vocomate_app.server.sessions import SessionStore
+from vocomate_app.server.workers import StagePool
+from vocomate_app.utils.cancellation import CancelToken, check_cancelled, use_token
+from vocomate_app.utils.response_cache import response_cache
+from vocomate_app.utils.sentences import split_sentences
+from vocomate_app.utils.tracing import tracer, use_trace
+
+
+def encode_wav(audio, sample_rate):
+    """float32 samples -> 16-bit PCM WAV bytes."""
+    buffer = io.BytesIO()
+    sf.write(buffer, np.asarray(audio, dtype=np.float32), sample_rate, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+def _transcribe_bytes(data, model_size, language, session_id=None):
+    from vocomate_app.asr.whisper_asr import transcribe
+    from vocomate_app.utils.vad import process_recording
+
+    speech = process_recording(data)
+    if not speech.has_speech:
+        return {"text": "", "has_speech": False, "audio_seconds": 0.0}
+    check_cancelled()  # turn superseded during decode/VAD: don't start Whisper
+    result = transcribe(speech.audio, model_size=model_size, language=language, session_id=session_id, fp16=False)
+    return {"text": result["text"].strip(), "has_speech": True, "audio_seconds": len(speech.audio) / speech.sample_rate,
+            "language": result.get("language")}
+
+
+def _synthesize(text, **speech_kwargs):
+    from vocomate_app.tts.pipeline import synthesize_speech
+    return synthesize_speech(text, **speech_kwargs)
+
+
+class VoiceService:
+    """
+    The voice pipeline behind the HTTP/WebSocket server.
+
+    One process holds the models once (model registry); sessions share two stage
+    pools (ASR, TTS+cloning) with admission limits, while the LLM goes through a
+    pooled ``OllamaClient`` with its own concurrency/queue bound. Each session has
+    its own conversation context and its turns run one at a time; a new turn
+    cancels the one in progress (``turn_events``).
+
+    Args:
+        llm (OllamaClient): Chat client (point it at ``StubOllamaServer`` for local testing)
+        asr_workers (int), tts_workers (int): Stage pool sizes
+        max_queue (int): Calls allowed to wait per stage before requests are rejected
+        max_sessions (int), session_ttl (float): Session admission and idle expiry
+        whisper_model (str): Whisper size used for transcription ("base-int8" for the quantized variant)
+        max_pending_sentences (int): Sentences of one turn in TTS at once
+        transcribe_fn, synthesize_fn (callable, optional): Replace the model calls
+            (``transcribe_fn(bytes, model_size, language, session_id) -> dict``,
+            ``synthesize_fn(text, **kw) -> (audio, sr)``)
+        cache (ResponseCache, optional): Reply/audio cache (default: the process-wide one)
+    """
+
+    def __init__(self, llm=None, asr_workers=1, tts_workers=2, max_queue=16, max_sessions=100, session_ttl=1800.0,
+                 whisper_model="base", max_pending_sentences=4, transcribe_fn=None, synthesize_fn=None, cache=None):
+        self.llm = llm or OllamaClient()
+        self.asr = StagePool("asr", asr_workers, max_queue)
+        self.tts = StagePool("tts", tts_workers, max_queue)
+        self.sessions = SessionStore(max_sessions, session_ttl)
+        self.whisper_model = whisper_model
+        self.max_pending_sentences = max_pending_sentences
+        self.cancelled_turns = 0
+        self._transcribe = transcribe_fn or _transcribe_bytes
+        self._synthesize = synthesize_fn or _synthesize
+        self.cache = cache or response_cache
+
+    # --- Single stages ---
+
+    async def transcribe(self, data, language=None, session_id=None):
+        """``session_id`` reuses the language Whisper detected earlier in that session."""
+        return await self.asr.run(self._transcribe, data, self.whisper_model, language, session_id)
+
+    async def speak(self, text, **speech_kwargs):
+        return await self.tts.run(self._synthesize, text, **speech_kwargs)
+
+    async def chat(self, session, text):
+        async with session.lock:
+            session.turns += 1
+            session.context.add_user(text)
+            messages = session.context.messages()
+            session.context.record_request(messages)
+            reply = self.cache.get_reply(text, messages[:-1], self.llm.model)
+            if reply is None:
+                reply = await self.llm.achat(None, history=messages)
+                self.cache.put_reply(text, messages[:-1], self.llm.model, reply)
+            session.context.add_assistant(reply)
+            return reply
+
+    # --- Full turn ---
+
+    async def turn_events(self, session, audio=None, text=None, language=None, supersede=True, **speech_kwargs):
+        """
+        Runs one turn and yields its events as they happen:
+
+        ``{"type": "transcript"}``, ``{"type": "audio", "sentence", "audio", "sample_rate"}``
+        (in sentence order, as soon as each sentence is cloned), ``{"type": "reply"}``
+        once the LLM is done, then ``{"type": "done", "trace"}``. A recording without
+        speech yields ``{"type": "no_speech"}`` only.
+
+        With ``supersede`` a turn already running in the session is cancelled: its
+        LLM stream is closed, its queued sentences dropped, and its consumer gets
+        ``{"type": "cancelled", "reason": "superseded"}`` instead of any further
+        (stale) events. Stage compute it had already started is recorded as wasted.
+        """
+        if supersede and session.turn is not None:
+            self.cancel_turn(session, "superseded")
+        token = CancelToken()
+        session.turn = token
+        trace = tracer.start_turn(session.id)
+        loop = asyncio.get_running_loop()
+        # The turn runs as its own task (trace and token bound in its context), so the
+        # consumer may iterate from any task, e.g. a streaming response
+        outbox = asyncio.Queue()
+        task = asyncio.ensure_future(
+            self._run_turn(session, trace, token, audio, text, language, speech_kwargs, outbox.put_nowait))
+        task.add_done_callback(lambda _: outbox.put_nowait(None))
+        # On cancel, stop the work and wake the consumer at once (it reports "cancelled" first)
+        token.on_cancel(lambda: loop.call_soon_threadsafe(task.cancel))
+        token.on_cancel(lambda: loop.call_soon_threadsafe(outbox.put_nowait, None))
+        try:
+            while (event := await outbox.get()) is not None and not token.cancelled:
+                yield event
+            if token.cancelled:
+                trace.finish(outcome=token.reason)
+                yield {"type": "cancelled", "reason": token.reason}
+                return
+            task.result()
+        except (GeneratorExit, asyncio.CancelledError):
+            token.cancel("disconnected")  # consumer gone: stop the work nobody will receive
+            trace.finish(outcome="disconnected")
+            raise
+        except BaseException:
+            token.cancel("error")
+            trace.finish(outcome="error")
+            raise
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            if session.turn is token:
+                session.turn = None
+        trace.finish()
+        yield {"type": "done", "trace": trace.as_dict()}
+
+    def cancel_turn(self, session, reason="cancelled"):
+        """Cancels the session's turn in progress; returns False if there is none."""
+        token = session.turn
+        if token is None or not token.cancel(reason):
+            return False
+        session.cancelled_turns += 1
+        self.cancelled_turns += 1
+        return True
+
+    async def _run_turn(self, session, trace, token, audio, text, language, speech_kwargs, emit):
+        def emit_current(event):
+            if not token.cancelled:  # never hand out results of a cancelled turn
+                emit(event)
+
+        # The previous turn of this session (if superseded) releases the lock once it stopped
+        async with session.lock:
+            session.turns += 1
+            with use_trace(trace), use_token(token):
+                await self._turn_stages(session, trace, audio, text, language, speech_kwargs, emit_current)
+
+    async def _turn_stages(self, session, trace, audio, text, language, speech_kwargs, emit):
+        if audio is not None:
+            result = await self.transcribe(audio, language, session.id)
+            if not result["has_speech"]:
+                trace.attributes["outcome"] = "no_speech"
+                emit({"type": "no_speech"})
+                return
+            text = result["text"]
+        emit({"type": "transcript", "text": text})
+
+        context = session.context
+        context.add_user(text)
+        messages = context.messages()
+        trace.attributes.update(context.record_request(messages))
+        # Repeated prompt in the same context (greetings, help): reuse the reply, skip the LLM
+        cached = self.cache.get_reply(text, messages[:-1], self.llm.model)
+        trace.attributes["reply_cache"] = "miss" if cached is None else "hit"
+        stream = self.llm.astream(None, history=messages)
+        pending = asyncio.Queue(maxsize=self.max_pending_sentences)
+
+        async def sentences():
+            if cached is not None:
+                for sentence in split_sentences(cached):
+                    yield sentence
+                return
+            async for event in stream:
+                if event.kind == "sentence":
+                    yield event.text
+
+        async def produce():
+            # LLM sentences -> TTS tasks, started right away but delivered in order
+            async for sentence in sentences():
+                task = asyncio.ensure_future(self.speak(sentence, **speech_kwargs))
+                await pending.put((sentence, task))
+            reply = stream.text if cached is None else cached
+            if cached is None:
+                self.cache.put_reply(text, messages[:-1], self.llm.model, reply)
+            context.add_assistant(reply)
+            emit({"type": "reply", "text": reply, "llm": stream.stats.as_dict() if stream.stats else None})
+            await pending.put(None)
+
+        async def deliver():
+            while (item := await pending.get()) is not None:
+                sentence, task = item
+                samples, sample_rate = await task
+                trace.mark("first_audio")
+                emit({"type": "audio", "sentence": sentence, "audio": samples, "sample_rate": sample_rate})
+
+        producer = asyncio.ensure_future(produce())
+        deliverer = asyncio.ensure_future(deliver())
+        try:
+            await asyncio.gather(producer, deliverer)
+        finally:
+            # Client gone or a stage failed: close the LLM stream and drop queued sentences
+            producer.cancel()
+            deliverer.cancel()
+            while not pending.empty():
+                item = pending.get_nowait()
+                if item is not None:
+                    item[1].cancel()
+            await asyncio.gather(producer, deliverer, return_exceptions=True)
+
+    def stats(self):
+        return {
+            "sessions": self.sessions.stats(),
+            "pools": {"asr": self.asr.stats(), "tts": self.tts.stats()},
+            "llm": self.llm.queue_stats(),
+            "cancelled_turns": self.cancelled_turns,
+            "cache": self.cache.stats(),
+        }
+
+    def export_prometheus(self):
+        """Queue-depth and admission gauges/counters in Prometheus text format."""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{labels} {value}" for labels, value in samples)
+
+        pools = {"asr": self.asr.stats(), "tts": self.tts.stats()}
+        for key, kind, help_text in (
+            ("queued", "gauge", "Calls waiting for a stage worker."),
+            ("active", "gauge", "Calls running on a stage worker."),
+            ("workers", "gauge", "Stage pool size."),
+            ("completed", "counter", "Stage calls completed."),
+            ("rejected", "counter", "Stage calls rejected because the queue was full."),
+            ("abandoned", "counter", "Stage calls whose turn was cancelled while they ran."),
+            ("wasted_seconds", "counter", "Seconds of stage compute thrown away by cancelled turns."),
+        ):
+            suffix = "_total" if kind == "counter" else ""
+            metric(f"vocomate_pool_{key}{suffix}", kind, help_text,
+                   [(f'{{stage="{name}"}}', stats[key]) for name, stats in pools.items()])
+        lines.append(self.cache.export_prometheus().rstrip("\n"))
+        sessions = self.sessions.stats()
+        metric("vocomate_sessions_active", "gauge", "Live sessions.", [("", sessions["active"])])
+        metric("vocomate_sessions_busy", "gauge", "Sessions with a turn in progress.", [("", sessions["busy"])])
+        metric("vocomate_turns_cancelled_total", "counter", "Turns cancelled or superseded.",
+               [("", self.cancelled_turns)])
+        llm = self.llm.queue_stats()
+        metric("vocomate_llm_in_flight", "gauge", "Ollama requests in flight.", [("", llm["in_flight"])])
+        metric("vocomate_llm_waiting", "gauge", "Ollama requests waiting for a slot.", [("", llm["waiting"])])
+        return "\n".join(lines) + "\n"
+
+    def shutdown(self):
+        self.asr.shutdown()
+        self.tts.shutdown()
+        self.llm.close()
@@ -0,0 +1,96 @@
+# server/sessions.py
+import asyncio
+import time
+import uuid
+
+from vocomate_app.context.conversation import ConversationContext
+
+
+class Session:
+    """
+    Per-user state kept by the server: conversation window and turn bookkeeping.
+
+    Nothing here is shared between sessions; audio only lives in the request that
+    carries it. ``lock`` serializes turns of the same session and ``turn`` is the
+    cancel token of the one in progress (a new utterance supersedes it).
+    """
+
+    def __init__(self, session_id, context=None):
+        self.id = session_id
+        self.context = context or ConversationContext()
+        self.lock = asyncio.Lock()
+        self.created = time.time()
+        self.last_used = self.created
+        self.turns = 0
+        self.turn = None
+        self.cancelled_turns = 0
+
+    def touch(self):
+        self.last_used = time.time()
+
+    def info(self):
+        return {
+            "session_id": self.id,
+            "created": self.created,
+            "last_used": self.last_used,
+            "turns": self.turns,
+            "cancelled_turns": self.cancelled_turns,
+            "turn_in_progress": self.turn is not None,
+            "context": self.context.stats(),
+        }
+
+
+class SessionLimitError(RuntimeError):
+    """Raised when ``max_sessions`` are live; the server answers 503."""
+
+
+class SessionStore:
+    """
+    In-memory sessions with idle expiry.
+
+    Args:
+        max_sessions (int): Live sessions allowed at once (admission control)
+        ttl (float): Seconds of inactivity after which a session is dropped
+    """
+
+    def __init__(self, max_sessions=100, ttl=1800.0):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = {}
+        self.expired = 0
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        for session_id in [sid for sid, s in self._sessions.items() if s.last_used < cutoff and not s.lock.locked()]:
+            del self._sessions[session_id]
+            self.expired += 1
+
+    def create(self, session_id=None):
+        self._expire()
+        if len(self._sessions) >= self.max_sessions:
+            raise SessionLimitError(f"{self.max_sessions} sessions already active")
+        session = Session(session_id or uuid.uuid4().hex)
+        self._sessions[session.id] = session
+        return session
+
+    def get(self, session_id, create=True):
+        """Returns the session (created on first use when ``create``), or None."""
+        session = self._sessions.get(session_id) if session_id else None
+        if session is None:
+            return self.create(session_id) if create else None
+        session.touch()
+        return session
+
+    def delete(self, session_id):
+        return self._sessions.pop(session_id, None) is not None
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def stats(self):
+        return {
+            "active": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "busy": sum(1 for s in self._sessions.values() if s.lock.locked()),
+            "expired": self.expired,
+        }
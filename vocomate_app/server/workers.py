@@ -0,0 +1,134 @@
+# server/workers.py
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from vocomate_app.utils.tracing import current_trace
+
+
+class ServerBusyError(RuntimeError):
+    """Raised when a stage's queue is full; the server answers 503 with Retry-After."""
+
+    def __init__(self, stage, queued):
+        super().__init__(f"{stage} queue is full ({queued} waiting)")
+        self.stage = stage
+        self.queued = queued
+
+
+class StagePool:
+    """
+    Bounded worker pool for one model stage (ASR, TTS, ...) shared by all sessions.
+
+    Models are process-wide (model registry), so a pool is just the threads
+    allowed to run that stage at once plus an admission limit: at most
+    ``max_queue`` calls may wait for a worker, beyond that ``ServerBusyError``
+    is raised immediately instead of letting latency grow without bound.
+
+    Cancelling the awaiting task (turn superseded, client gone) drops a call
+    that is still queued; a call already running can't be interrupted, so it
+    finishes and its compute is counted as wasted (pool stats and the turn's trace).
+
+    Args:
+        name (str): Stage name used in metrics
+        max_workers (int): Concurrent calls
+        max_queue (int): Calls allowed to wait for a free worker
+    """
+
+    def __init__(self, name, max_workers=1, max_queue=16):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-worker")
+        self._lock = threading.Lock()
+        self.active = 0
+        self.queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.max_queued = 0
+        self.abandoned = 0
+        self.wasted_seconds = 0.0
+
+    def _admit(self):
+        with self._lock:
+            # Calls that will start at once on an idle worker don't count against max_queue
+            waiting = self.active + self.queued - self.max_workers
+            if waiting >= self.max_queue:
+                self.rejected += 1
+                raise ServerBusyError(self.name, max(0, waiting))
+            self.queued += 1
+            self.max_queued = max(self.max_queued, waiting + 1)
+
+    def _call(self, state, fn, args, kwargs):
+        with self._lock:
+            if state["cancelled"]:
+                return None  # caller went away while this call was queued
+            state["started"] = True
+            self.queued -= 1
+            self.active += 1
+        began = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - began
+            with self._lock:
+                self.active -= 1
+                state["seconds"] = seconds
+                abandoned = state["abandoned"]
+            if abandoned:
+                self._waste(state, seconds)
+
+    def _waste(self, state, seconds):
+        with self._lock:
+            self.abandoned += 1
+            self.wasted_seconds += seconds
+        if state["trace"] is not None:
+            state["trace"].waste(self.name, seconds)
+
+    async def run(self, fn, *args, **kwargs):
+        """Runs ``fn`` on the pool (in the caller's contextvars context, so traces follow)."""
+        self._admit()
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        state = {"started": False, "cancelled": False, "abandoned": False, "seconds": None,
+                 "trace": current_trace()}
+        try:
+            result = await loop.run_in_executor(self._executor, context.run, self._call, state, fn, args, kwargs)
+        except asyncio.CancelledError:
+            with self._lock:
+                if not state["started"]:
+                    state["cancelled"] = True
+                    self.queued -= 1
+                else:
+                    state["abandoned"] = True  # still running: _call counts it when it ends
+                seconds = state["seconds"]
+            if seconds is not None:
+                self._waste(state, seconds)  # finished, but the result arrived after the cancel
+            raise
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        with self._lock:
+            self.completed += 1
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "active": self.active,
+                "queued": self.queued,
+                "max_queued": self.max_queued,
+                "max_queue": self.max_queue,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "abandoned": self.abandoned,
+                "wasted_seconds": self.wasted_seconds,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
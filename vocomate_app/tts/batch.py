@@ -0,0 +1,189 @@
+# tts/batch.py
+import csv
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+
+import soundfile as sf
+
+from vocomate_app.tts.melo_tts import synthesize_base
+from vocomate_app.tts.pipeline import DEFAULT_REFERENCE_AUDIO, audio_cache_key
+from vocomate_app.utils.cpu_scheduler import cpu_stage
+from vocomate_app.utils.model_registry import DEFAULT_CONVERTER_CKPT, DEFAULT_CONVERTER_CONFIG, get_tone_color_converter
+from vocomate_app.utils.response_cache import response_cache
+from vocomate_app.utils.tracing import span
+from vocomate_app.voice_cloning.se_store import se_store
+from vocomate_app.voice_cloning.tone_converter import convert_tone_batch
+
+
+def load_texts(path):
+    """
+    Reads the utterances to render: JSONL or CSV with a ``text`` field/column and optional
+    ``id``, ``language``, ``speaker``, ``speed`` and ``output``; any other file is one text per line.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        elif path.endswith((".jsonl", ".json")):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = [{"text": line.strip()} for line in f if line.strip()]
+    return [{key: value for key, value in row.items() if value not in (None, "")} for row in rows]
+
+
+def _output_name(item, index):
+    name = re.sub(r"[^\w.-]+", "_", str(item.get("id", f"{index:05d}")))
+    return f"{name}.wav"
+
+
+def render_batch(
+    items,
+    output_dir,
+    reference_audio_path=DEFAULT_REFERENCE_AUDIO,
+    language="EN",
+    speaker="EN-Default",
+    speed=1.0,
+    config_path=DEFAULT_CONVERTER_CONFIG,
+    checkpoint_path=DEFAULT_CONVERTER_CKPT,
+    tau=0.3,
+    watermark="@MyShell",
+    batch_size=8,
+    window=64,
+    writers=4,
+    use_cache=True,
+    stats=None,
+):
+    """
+    Renders many texts in the cloned voice with the models kept resident.
+
+    The target speaker embedding is computed once for the whole run. Texts are
+    sorted by length and processed in windows of ``window``: MeloTTS synthesizes
+    each one, then base waveforms of the same language/speaker are converted
+    ``batch_size`` at a time (similar lengths, so little padding) and the WAV
+    files are written by a pool of ``writers`` threads while the next window is
+    synthesized. Outputs share the response audio cache with ``synthesize_speech``.
+
+    Args:
+        items (list[dict]): ``text`` plus optional ``id``, ``language``, ``speaker``, ``speed``, ``output``
+            (see ``load_texts``)
+        output_dir (str): Where ``<id>.wav`` files go when an item has no ``output``
+        language (str), speaker (str), speed (float): Defaults for items that don't set them
+        stats (dict, optional): Filled with counts and timings (``utterances_per_second``, ...)
+
+    Yields:
+        dict: One record per item (``id``, ``text``, ``path``, ``duration``, ``cached``), in write order
+    """
+    stats = stats if stats is not None else {}
+    stats.update(utterances=0, cached=0, batches=0, audio_seconds=0.0, padded_frames=0, frames=0,
+                 synthesis_seconds=0.0, conversion_seconds=0.0)
+    began = time.perf_counter()
+    cache = response_cache.audio if use_cache else None
+    converter = get_tone_color_converter(config_path, checkpoint_path)
+    target_se = se_store.target_se(reference_audio_path, converter, checkpoint_path)
+    hop_length = converter.hps.data.hop_length
+
+    jobs = []
+    for index, item in enumerate(items):
+        job = {
+            "id": item.get("id", f"{index:05d}"),
+            "text": item["text"],
+            "language": item.get("language", language),
+            "speaker": item.get("speaker", speaker),
+            "speed": float(item.get("speed", speed)),
+            "path": item.get("output") or os.path.join(output_dir, _output_name(item, index)),
+        }
+        if cache is not None:
+            job["key"] = audio_cache_key(job["text"], reference_audio_path, job["language"], job["speaker"],
+                                         job["speed"], tau, watermark, checkpoint_path)
+        jobs.append(job)
+    jobs.sort(key=lambda job: (job["language"], job["speaker"], len(job["text"])))
+
+    def write(job, audio, sample_rate, cached):
+        os.makedirs(os.path.dirname(os.path.abspath(job["path"])), exist_ok=True)
+        sf.write(job["path"], audio, sample_rate)
+        return {"id": job["id"], "text": job["text"], "path": job["path"],
+                "duration": round(len(audio) / sample_rate, 3), "cached": cached}
+
+    def drain(futures):
+        for future in futures:
+            record = future.result()
+            stats["audio_seconds"] += record["duration"]
+            yield record
+
+    with ThreadPoolExecutor(max_workers=writers, thread_name_prefix="wav-writer") as pool:
+        writes = []
+        for start in range(0, len(jobs), window):
+            synthesized = []
+            for job in jobs[start:start + window]:
+                cached = cache.get(job["key"]) if cache is not None else None
+                if cached is not None:
+                    stats["cached"] += 1
+                    writes.append(pool.submit(write, job, *cached, True))
+                    continue
+                synthesis_began = time.perf_counter()
+                with span("synthesis"), cpu_stage("synthesis"):
+                    audio, sample_rate, resolved = synthesize_base(job["text"], job["language"], job["speaker"],
+                                                                   job["speed"])
+                stats["synthesis_seconds"] += time.perf_counter() - synthesis_began
+                synthesized.append((job, audio, sample_rate, resolved))
+
+            # Records of the previous window are ready by now: hand them out while this one converts
+            yield from drain(writes)
+            writes = []
+
+            synthesized.sort(key=lambda entry: (entry[0]["language"], entry[3], len(entry[1])))
+            for (job_language, resolved, sample_rate), group in groupby(
+                    synthesized, key=lambda entry: (entry[0]["language"], entry[3], entry[2])):
+                group = list(group)
+                source_se = se_store.source_se(job_language, resolved, converter, checkpoint_path,
+                                               base_audio=(group[0][1], sample_rate))
+                for offset in range(0, len(group), batch_size):
+                    batch = group[offset:offset + batch_size]
+                    conversion_began = time.perf_counter()
+                    with span("conversion"), cpu_stage("conversion"):
+                        converted = convert_tone_batch([entry[1] for entry in batch], sample_rate, source_se,
+                                                       target_se, converter, tau=tau, message=watermark)
+                    stats["conversion_seconds"] += time.perf_counter() - conversion_began
+                    stats["batches"] += 1
+                    frames = [len(audio) // hop_length for audio, _ in converted]
+                    stats["frames"] += sum(frames)
+                    stats["padded_frames"] += max(frames) * len(frames) - sum(frames)
+                    for (job, *_), (audio, out_sr) in zip(batch, converted):
+                        if cache is not None:
+                            cache.put(job["key"], (audio, out_sr))
+                        writes.append(pool.submit(write, job, audio, out_sr, False))
+        yield from drain(writes)
+
+    # Only reached once every record was consumed
+    wall = time.perf_counter() - began
+    stats["utterances"] = len(jobs)
+    stats["wall_seconds"] = wall
+    stats["utterances_per_second"] = len(jobs) / wall if wall else None
+
+
+def render_one_at_a_time(items, output_dir, stats=None, **speech_kwargs):
+    """
+    Baseline for ``render_batch``: ``synthesize_speech`` per item (no batching, no cache).
+
+    Yields:
+        dict: ``id``, ``path``, ``duration`` per item
+    """
+    from vocomate_app.tts.pipeline import synthesize_speech
+
+    stats = stats if stats is not None else {}
+    began = time.perf_counter()
+    for index, item in enumerate(items):
+        path = item.get("output") or os.path.join(output_dir, _output_name(item, index))
+        kwargs = {key: item[key] for key in ("language", "speaker") if key in item}
+        if "speed" in item:
+            kwargs["speed"] = float(item["speed"])
+        audio, sample_rate = synthesize_speech(item["text"], output_path=path, use_cache=False,
+                                               **{**speech_kwargs, **kwargs})
+        yield {"id": item.get("id", f"{index:05d}"), "path": path, "duration": round(len(audio) / sample_rate, 3)}
+    wall = time.perf_counter() - began
+    stats["utterances"] = len(items)
+    stats["wall_seconds"] = wall
+    stats["utterances_per_second"] = len(items) / wall if wall else None
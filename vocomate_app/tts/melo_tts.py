@@ -0,0 +1,33 @@
+# tts/melo_tts.py
+import numpy as np
+
+from vocomate_app.utils.model_registry import get_melo_tts
+
+
+def resolve_speaker(tts, speaker):
+    """Returns ``(speaker_name, speaker_id)``, falling back to the first available speaker."""
+    speaker_ids = tts.hps.data.spk2id
+    if speaker in speaker_ids:
+        return speaker, speaker_ids[speaker]
+    fallback = list(speaker_ids.keys())[0]
+    print(f"Speaker '{speaker}' not found. Using first available speaker: {fallback}")
+    return fallback, speaker_ids[fallback]
+
+
+def synthesize_base(text, language="EN", speaker="EN-Default", speed=1.0):
+    """
+    Synthesizes base speech with the resident MeloTTS model, without touching disk.
+
+    Args:
+        text (str): Text to speak
+        language (str): MeloTTS language ("EN", "ES", "FR", "ZH", "JP", "KR")
+        speaker (str): MeloTTS speaker name (e.g. "EN-Default", "EN-US")
+        speed (float): Speaking rate
+
+    Returns:
+        tuple[np.ndarray, int, str]: float32 samples, sample rate and the speaker actually used
+    """
+    tts = get_melo_tts(language)
+    speaker, speaker_id = resolve_speaker(tts, speaker)
+    audio = tts.tts_to_file(text, speaker_id, output_path=None, speed=speed, quiet=True)
+    return np.asarray(audio, dtype=np.float32), tts.hps.data.sampling_rate, speaker
@@ -0,0 +1,250 @@
+# tts/pipeline.py
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import soundfile as sf
+
+from vocomate_app.tts.melo_tts import synthesize_base
+from vocomate_app.utils.cancellation import CancelToken, TurnCancelled, check_cancelled, current_token, use_token
+from vocomate_app.utils.cpu_scheduler import cpu_stage
+from vocomate_app.utils.model_registry import (
+    DEFAULT_CONVERTER_CKPT,
+    DEFAULT_CONVERTER_CONFIG,
+    REPO_ROOT,
+    get_tone_color_converter,
+)
+from vocomate_app.voice_cloning.se_store import file_digest, se_store
+from vocomate_app.utils.response_cache import response_cache
+from vocomate_app.utils.sentences import split_sentences
+from vocomate_app.utils.profiling import current_capture, profile_thread, use_capture
+from vocomate_app.utils.tracing import current_trace, span, use_trace
+from vocomate_app.voice_cloning.tone_converter import convert_tone
+
+DEFAULT_REFERENCE_AUDIO = os.path.join(REPO_ROOT, 'vocomate_app', 'assets', 'audio_inputs', 'my_voic.wav')
+
+
+def synthesize_speech(
+    text,
+    reference_audio_path=DEFAULT_REFERENCE_AUDIO,
+    language="EN",
+    speaker="EN-Default",
+    speed=1.0,
+    output_path=None,
+    config_path=DEFAULT_CONVERTER_CONFIG,
+    checkpoint_path=DEFAULT_CONVERTER_CKPT,
+    tau=0.3,
+    watermark="@MyShell",
+    use_cache=True,
+):
+    """
+    Text -> MeloTTS -> OpenVoice tone conversion, entirely in memory.
+
+    Waveforms are handed from MeloTTS to the converter as arrays, so no shared
+    base.wav / final_cloned.wav is written and concurrent sessions can't clobber
+    each other's audio. Results are kept in the response audio cache
+    (``utils/response_cache.py``), keyed by the text, speech settings and the
+    reference recording's content hash; a hit returns without touching any model.
+
+    Args:
+        text (str): Text to speak
+        reference_audio_path (str): Recording of the voice to clone
+        language (str), speaker (str), speed (float): MeloTTS settings
+        output_path (str, optional): Also write the cloned speech to this WAV file
+        use_cache (bool): Look up / store the result in the audio cache
+
+    Returns:
+        tuple[np.ndarray, int]: Cloned float32 samples and their sample rate, ready for playback
+    """
+    cache = response_cache.audio if use_cache else None
+    if cache is not None:
+        key = audio_cache_key(text, reference_audio_path, language, speaker, speed, tau, watermark, checkpoint_path)
+        with span("audio_cache"):
+            cached = cache.get(key)
+        if cached is not None:
+            audio, sample_rate = cached
+            _write_output(output_path, audio, sample_rate)
+            return audio, sample_rate
+    with span("synthesis"), cpu_stage("synthesis"):
+        base_audio, base_sr, speaker = synthesize_base(text, language=language, speaker=speaker, speed=speed)
+    check_cancelled()  # turn superseded while MeloTTS ran: skip the conversion
+    with span("conversion"), cpu_stage("conversion"):
+        converter = get_tone_color_converter(config_path, checkpoint_path)
+        source_se = se_store.source_se(language, speaker, converter, checkpoint_path, base_audio=(base_audio, base_sr))
+        target_se = se_store.target_se(reference_audio_path, converter, checkpoint_path)
+        audio, sample_rate = convert_tone(base_audio, base_sr, source_se, target_se, converter, tau=tau, message=watermark)
+    if cache is not None:
+        cache.put(key, (audio, sample_rate))
+    _write_output(output_path, audio, sample_rate)
+    return audio, sample_rate
+
+
+def audio_cache_key(text, reference_audio_path, language, speaker, speed, tau, watermark, checkpoint_path):
+    """Key of one cloned utterance in ``response_cache.audio`` (shared with ``tts/batch.py``)."""
+    return response_cache.audio_key(text, file_digest(reference_audio_path), language, speaker, speed, tau=tau,
+                                    watermark=watermark, checkpoint=file_digest(checkpoint_path))
+
+
+def _write_output(output_path, audio, sample_rate):
+    if output_path:
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        sf.write(output_path, audio, sample_rate)
+
+
+class PipelineStats:
+    """Timing of one pipelined response: time to first audio, total wall time, per-sentence synthesis."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.time_to_first_audio = None
+        self.total_time = None
+        self.sentences = 0
+        self.synthesis_seconds = []
+
+    def as_dict(self):
+        return {
+            "time_to_first_audio": self.time_to_first_audio,
+            "total_time": self.total_time,
+            "sentences": self.sentences,
+            "synthesis_seconds": list(self.synthesis_seconds),
+        }
+
+
+class SentencePipeline:
+    """
+    Sentence-level TTS + cloning on a bounded worker pool, delivered in order.
+
+    Text is split into sentences (or a sentence stream, e.g. from ``stream_ollama``,
+    is consumed as it arrives); each sentence is synthesized and tone-converted on
+    the pool, and ``run`` yields the audio in sentence order as soon as the next one
+    is ready, so playback starts after the first sentence instead of the whole reply.
+    At most ``max_pending`` sentences are in flight, so a long reply can't queue
+    unbounded work. Closing the iterator, or cancelling the caller's turn token
+    (``utils/cancellation.py``), drops queued sentences; synthesis already running
+    when that happens is recorded as wasted on the trace.
+
+    Args:
+        max_workers (int): Concurrent synthesis workers
+        max_pending (int): Sentences submitted but not yet handed to the consumer
+        synthesize (callable, optional): ``synthesize(text, **speech_kwargs) -> (samples, sample_rate)``;
+            defaults to ``synthesize_speech``
+        **speech_kwargs: Passed to ``synthesize`` (speaker, speed, reference_audio_path, ...)
+    """
+
+    def __init__(self, max_workers=2, max_pending=4, synthesize=None, **speech_kwargs):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.synthesize = synthesize or synthesize_speech
+        self.speech_kwargs = speech_kwargs
+        self.stats = None
+        self.source_done = threading.Event()
+
+    def _synthesize_timed(self, sentence, trace, capture, token):
+        began = time.perf_counter()
+        try:
+            with use_trace(trace), use_capture(capture), use_token(token), profile_thread():
+                audio, sample_rate = self.synthesize(sentence, **self.speech_kwargs)
+        except TurnCancelled:
+            audio, sample_rate = None, None  # stopped between MeloTTS and conversion
+        return audio, sample_rate, time.perf_counter() - began
+
+    def run(self, text_or_sentences):
+        """
+        Returns an iterator over ``(sentence, samples, sample_rate)`` in sentence order.
+
+        Args:
+            text_or_sentences (str | iterable[str]): Full text, or an iterable of sentences
+                that may still be being produced
+        """
+        # Bind the caller's trace/profile/turn now: the generator body runs on whichever thread consumes it
+        return self._run(text_or_sentences, current_trace(), current_capture(), current_token())
+
+    def _run(self, text_or_sentences, trace, capture, turn_token):
+        sentences = split_sentences(text_or_sentences) if isinstance(text_or_sentences, str) else text_or_sentences
+        self.stats = PipelineStats()
+        self.source_done.clear()
+        futures = queue.Queue(maxsize=self.max_pending)
+        end = object()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tts")
+        # Set when the consumer stops early; the turn's token (if any) cancels it too
+        cancelled = CancelToken()
+        if turn_token is not None:
+            turn_token.on_cancel(lambda: cancelled.cancel(turn_token.reason))
+        undelivered = set()
+        # The producer adds futures while the consumer's cleanup cancels them
+        undelivered_lock = threading.Lock()
+
+        def count_waste(future):
+            # Synthesis that ran (fully or up to the cancel check) for a sentence never delivered
+            if trace and not future.cancelled() and future.exception() is None:
+                trace.waste("tts", future.result()[2])
+
+        def get():
+            while not cancelled.cancelled:
+                try:
+                    return futures.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            return None, end
+
+        def put(item):
+            # Blocks while max_pending sentences are in flight, but gives up once cancelled
+            while not cancelled.cancelled:
+                try:
+                    futures.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        def produce():
+            try:
+                for sentence in sentences:
+                    if not sentence.strip():
+                        continue
+                    with undelivered_lock:
+                        # Checked under the lock: once cleanup took its snapshot nothing more is submitted
+                        if cancelled.cancelled:
+                            break
+                        future = executor.submit(self._synthesize_timed, sentence, trace, capture, cancelled)
+                        undelivered.add(future)
+                    put((sentence, future))
+            except Exception as e:
+                put((None, e))
+            finally:
+                self.source_done.set()
+                put((None, end))
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        try:
+            while True:
+                sentence, item = get()
+                if item is end:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                audio, sample_rate, seconds = item.result()
+                if cancelled.cancelled:
+                    break  # turn cancelled while this sentence was synthesized: never deliver it
+                with undelivered_lock:
+                    undelivered.discard(item)
+                self.stats.sentences += 1
+                self.stats.synthesis_seconds.append(seconds)
+                if self.stats.time_to_first_audio is None:
+                    self.stats.time_to_first_audio = time.perf_counter() - self.stats.started_at
+                    if trace:
+                        trace.mark("first_audio")
+                yield sentence, audio, sample_rate
+        finally:
+            # Consumer stopped (finished, error or interrupted): drop queued sentences
+            cancelled.cancel("closed")
+            with undelivered_lock:
+                pending = list(undelivered)
+                undelivered.clear()
+            for future in pending:
+                future.cancel()
+                future.add_done_callback(count_waste)
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.stats.total_time = time.perf_counter() - self.stats.started_at
@@ -1,6 +1,11 @@
+import os
+import sys
+import time
 import streamlit as st
 from streamlit_webrtc import webrtc_streamer, AudioProcessorBase
-import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from vocomate_app.asr.incremental import IncrementalTranscriber
 
 st.set_page_config(page_title="Real-Time Speech-to-Text", page_icon="🎤")
 st.title("🎤 Real-Time Speech-to-Text Demo")
@@ -12,27 +17,25 @@ This demo streams your microphone audio to the backend and displays a running tr
 - The transcript will update in real time.
 """)
 
-# --- Dummy ASR function (replace with your real ASR engine) ---
-def dummy_asr(audio_chunk: np.ndarray) -> str:
-    # For demonstration: just return a placeholder string.
-    # Replace this with your ASR model (e.g., Whisper, DeepSpeech, AssemblyAI, etc.)
-    return "[transcribed text]"
-
 # --- Audio Processor for streamlit-webrtc ---
 class AudioProcessor(AudioProcessorBase):
     def __init__(self) -> None:
-        self.transcript = ""
+        # Decoding runs on the transcriber's background worker, never in the frame callback
+        self.engine = IncrementalTranscriber(
+            model_size=os.environ.get("VOCOMATE_LIVE_MODEL", "base"),
+            language=os.environ.get("VOCOMATE_LIVE_LANGUAGE") or None,
+        ).start()
 
     def recv(self, frame):
-        # frame.to_ndarray() gives you the audio data as a numpy array
-        audio = frame.to_ndarray()
-        # Process audio chunk with your ASR
-        text = dummy_asr(audio)
-        self.transcript += f" {text}"
+        # Only resample and copy the frame into the ring buffer here
+        self.engine.push_av_frame(frame)
         return frame
 
+    def on_ended(self):
+        self.engine.stop(flush=True)
+
     def get_transcript(self):
-        return self.transcript.strip()
+        return self.engine.text()
 
 # --- Streamlit WebRTC streamer ---
 ctx = webrtc_streamer(
@@ -45,4 +48,18 @@ ctx = webrtc_streamer(
 # --- Display the transcript in real time ---
 if ctx.audio_processor:
     st.markdown("### Live Transcription")
-    st.write(ctx.audio_processor.get_transcript())
+    transcript_box = st.empty()
+    stats_box = st.empty()
+    while ctx.state.playing:
+        engine = ctx.audio_processor.engine
+        committed = " ".join(engine.committed)
+        partial = " ".join(p for p in (engine.stable, engine.tentative) if p)
+        transcript_box.markdown(f"{committed} *{partial}*" if partial else committed)
+        stats = engine.stats()
+        rtf = stats["real_time_factor"]
+        latency = stats["partial_latency_ms_p50"]
+        stats_box.caption(
+            f"RTF: {rtf:.2f} · partial latency: {latency:.0f} ms · skipped steps: {stats['skipped_steps']}"
+            if rtf is not None else "Waiting for audio..."
+        )
+        time.sleep(0.3)
@@ -1,25 +1,58 @@
 # ui/web_interface_gradio.py
 import gradio as gr
+import numpy as np
 import os
 import sys
 
 # Adjust sys.path to import your modules
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'vocomate_app', 'asr')))
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'vocomate_app', 'llm')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'asr')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'llm')))
 from whisper_asr import transcribe_audio
 from ollama_client import query_ollama
-from scripts.llm_to_cloned_to_voice import generate_base_speech, clone_voice, play_audio
+from vocomate_app.tts.pipeline import synthesize_speech
+from vocomate_app.utils.model_registry import warmup_from_env
+from vocomate_app.server.client import VoiceClient
+from vocomate_app.utils.cancellation import TurnCancelled
+from vocomate_app.utils.tracing import span, tracer, use_trace
 
-def process_audio(audio_path):
-    # 1. Transcribe
-    text = transcribe_audio(audio_path, language="en")
-    # 2. LLM
-    response = query_ollama(text)
-    # 3. MeloTTS + OpenVoice
-    base_audio = generate_base_speech(response)
-    cloned_audio = clone_voice(base_audio_path=base_audio)
-    # 4. Return (transcription, response, audio path for playback)
-    return text, response, cloned_audio
+# Thin-client mode: ASR/LLM/TTS run on the voice server (vocomate_app/main.py)
+SERVER_URL = os.environ.get("VOCOMATE_SERVER_URL")
+client = VoiceClient(SERVER_URL) if SERVER_URL else None
+
+# Load the models once, before the first request comes in
+if client is None:
+    warmup_from_env()
+
+def process_remote(audio_path, session_id):
+    with open(audio_path, "rb") as f:
+        turn = client.turn(f.read(), session_id=session_id)
+    try:
+        chunks = list(turn)
+    except TurnCancelled as e:
+        # Superseded by a newer turn of this session: say so instead of returning an empty reply
+        raise gr.Error(f"Turn cancelled ({e})")
+    if not chunks:
+        return turn.transcript or "", turn.reply or "", None
+    return turn.transcript, turn.reply, (chunks[0][2], np.concatenate([chunk[1] for chunk in chunks]))
+
+def process_audio(audio_path, request: gr.Request):
+    # One server session per browser tab: its own conversation, and a new turn only supersedes its own
+    session_id = f"gradio-{request.session_hash}"
+    if client is not None:
+        return process_remote(audio_path, session_id)
+    trace = tracer.start_turn(session_id)
+    with use_trace(trace):
+        # 1. Transcribe
+        text = transcribe_audio(audio_path, language="en")
+        # 2. LLM
+        with span("llm"):
+            response = query_ollama(text)
+        # 3. MeloTTS + OpenVoice, in memory (no shared output files between sessions)
+        cloned_audio, sample_rate = synthesize_speech(response)
+    trace.finish()
+    # 4. Return (transcription, response, audio buffer for playback)
+    return text, response, (sample_rate, cloned_audio)
 
 iface = gr.Interface(
     fn=process_audio,
@@ -1,50 +1,40 @@
 import streamlit as st
 from streamlit_realtime_audio_recorder import audio_recorder
+import io
 import os
 import sys
 import time
-import tempfile
+import uuid
 import logging
 from pathlib import Path
-import threading
 import soundfile as sf
-import sounddevice as sd
 
 # Adjust sys.path to import your modules
-scripts_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'scripts'))
-if scripts_path not in sys.path:
-    sys.path.append(scripts_path)
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
-from utils.vad import has_speech, trim_silence
+from utils.vad import process_recording, io_stats
 from asr.whisper_asr import transcribe_audio
-from llm.ollama_client import query_ollama
-from base_speech import generate_base_speech
-from clone_voice import clone_voice
-
-# --- TTSPlayer class for threaded playback ---
-class TTSPlayer:
-    def __init__(self):
-        self.stop_event = threading.Event()
-        self.thread = None
-
-    def play(self, file_path):
-        self.stop_event.clear()
-        self.thread = threading.Thread(target=self._play_audio, args=(file_path,))
-        self.thread.start()
-
-    def _play_audio(self, file_path):
-        data, samplerate = sf.read(file_path)
-        sd.play(data, samplerate)
-        while sd.get_stream().active:
-            if self.stop_event.is_set():
-                sd.stop()
-                break
-
-    def stop(self):
-        self.stop_event.set()
-        if self.thread and self.thread.is_alive():
-            self.thread.join()
+from llm.ollama_client import get_client
+from vocomate_app.context.conversation import ConversationContext
+from vocomate_app.context.store import conversation_store
+from vocomate_app.tts.pipeline import SentencePipeline
+from vocomate_app.utils.model_registry import registry, warmup_from_env
+from vocomate_app.utils.playback import AudioPlayer, BargeInMonitor
+from vocomate_app.server.client import VoiceClient
+from vocomate_app.utils.cancellation import CancelToken, use_token
+from vocomate_app.utils.profiling import profile_thread, profiler, use_capture
+from vocomate_app.utils.response_cache import response_cache
+from vocomate_app.utils.sentences import split_sentences
+from vocomate_app.utils.tracing import tracer, use_trace
+
+# With a voice server (vocomate_app/main.py) this UI is a thin client: recording and
+# playback stay here, ASR/LLM/TTS run on the server's shared models
+SERVER_URL = os.environ.get("VOCOMATE_SERVER_URL")
+
+# Models stay resident across reruns and sessions; warm them up once per process
+if not SERVER_URL:
+    warmup_from_env()
 
 # --- Logging setup ---
 log_dir = Path("logs")
@@ -56,34 +46,90 @@ logger = logging.getLogger(__name__)
 # --- Session state initialization ---
 if 'state' not in st.session_state:
     st.session_state['state'] = "waiting"
-if 'history' not in st.session_state:
-    st.session_state['history'] = []
+if 'context' not in st.session_state:
+    st.session_state['context'] = ConversationContext()
 if 'tts_player' not in st.session_state:
-    st.session_state['tts_player'] = TTSPlayer()
+    st.session_state['tts_player'] = AudioPlayer()
 if 'tts_playing' not in st.session_state:
     st.session_state['tts_playing'] = False
+if 'session_id' not in st.session_state:
+    st.session_state['session_id'] = uuid.uuid4().hex  # full 128 bits: it keys the persistent history
+if SERVER_URL and 'voice_client' not in st.session_state:
+    st.session_state['voice_client'] = VoiceClient(SERVER_URL)
 
 debug_mode = st.checkbox("Enable Debug/Verbose Mode")
 
+# Seconds of silence before the browser recorder stops. Lower values end turns sooner;
+# for sub-second endpointing on a local mic see utils/endpointing.StreamingEndpointer.
+PAUSE_THRESHOLD = float(os.environ.get("VOCOMATE_PAUSE_THRESHOLD", 2.0))
+# Listen on the local mic while speaking and cut playback as soon as the user talks
+BARGE_IN = os.environ.get("VOCOMATE_BARGE_IN", "0") == "1"
+# Turns shown per history page; older turns stay in SQLite (context/store.py), not in session state
+HISTORY_PAGE_SIZE = 10
+# History search covers the visitor's own session; VOCOMATE_HISTORY_SEARCH_ALL=1 (admin deployments only)
+# offers searching every stored session
+HISTORY_SEARCH_ALL = os.environ.get("VOCOMATE_HISTORY_SEARCH_ALL", "0") == "1"
+
 def add_turn(role, text):
-    st.session_state['history'].append({"role": role, "text": text})
+    turn_id = conversation_store.add_turn(st.session_state['session_id'], role, text)
+    if role == "assistant":
+        st.session_state['latency_turn_id'] = turn_id  # gets the turn's latencies once its trace is finished
+
+def cancel_turn(reason):
+    # Stops everything still working on the current turn: LLM stream, queued/running
+    # sentence synthesis and playback; results that arrive later are never played
+    token = st.session_state.pop('turn_token', None)
+    if token is not None:
+        token.cancel(reason)
+    st.session_state['tts_player'].stop()
+
+def finish_trace(**attributes):
+    # Folds the turn's spans into the process-wide latency histograms
+    trace = st.session_state.pop('trace', None)
+    if trace is not None:
+        trace.finish(**attributes)
+        logger.info(f"Turn trace: {trace.as_dict()['stages']} events={trace.events}")
+        turn_id = st.session_state.pop('latency_turn_id', None)
+        if turn_id is not None:
+            summary = trace.as_dict()
+            latencies = {"total": summary["total"], "stages": summary["stages"], "events": summary["events"],
+                         "outcome": summary["attributes"].get("outcome")}
+            conversation_store.update_turn(turn_id, latencies=latencies)
+    capture = st.session_state.pop('profile_capture', None)
+    if capture is not None:
+        summary = capture.end()
+        logger.info(f"Turn profile written to {summary['path']}")
 
-def log_and_time(func, *args, **kwargs):
-    start_time = time.time()
-    result = func(*args, **kwargs)
-    latency = time.time() - start_time
-    logger.info(f"{func.__name__} took {latency:.2f} seconds")
-    return result, latency
+def show_metrics():
+    summary = tracer.summary()
+    rows = [{"name": f"{kind[:-1]}:{name}", **stats}
+            for kind in ("stages", "events", "wasted") for name, stats in summary[kind].items()]
+    st.write("Turns:", summary["turns"], "Outcomes:", summary["outcomes"])
+    if rows:
+        st.dataframe(rows)
+    last = st.session_state.get('trace') or (tracer.recent[-1] if tracer.recent else None)
+    st.write("Current/last turn:", last.as_dict() if hasattr(last, "as_dict") else last)
+    st.write("Response cache:", response_cache.stats())
+    with st.expander("Prometheus metrics"):
+        st.code(tracer.export_prometheus(), language="text")
+    with st.expander("Profiling"):
+        # cProfile + torch profiler + folded stacks for the next N turns (see utils/profiling.py)
+        turns = st.number_input("Turns to profile", min_value=1, max_value=20, value=1)
+        if st.button("Profile next turns"):
+            profiler.arm(turns)
+        st.write("Armed turns:", profiler.remaining)
+        if profiler.captures and profiler.captures[-1].summary:
+            st.write("Last profile:", profiler.captures[-1].summary)
 
 # --- State Machine ---
 
 # 1. WAITING: Show listening message and record audio with auto-stop on silence
 if st.session_state['state'] == "waiting":
     st.markdown("🎤 **Click the button to start recording. Recording will auto-stop after a long pause (no double-tap needed).**")
-    st.info("Recording will stop automatically after 1.8 seconds of silence, or you can click 'Stop'.")
+    st.info(f"Recording will stop automatically after {PAUSE_THRESHOLD:g} seconds of silence, or you can click 'Stop'.")
 
     audio = audio_recorder(
-        pause_threshold=2.0,    # seconds of silence to auto-stop
+        pause_threshold=PAUSE_THRESHOLD,    # seconds of silence to auto-stop
         sample_rate=16000,
         icon_size="2x",
         neutral_color="#6c757d",
@@ -93,106 +139,152 @@ if st.session_state['state'] == "waiting":
         icon_name="microphone",
         key="recorder_waiting"
     )
+    if debug_mode:
+        show_metrics()
 
     if audio and audio['audio']:
         st.session_state['audio_bytes'] = audio['audio']
         st.session_state['tts_playing'] = False
-        if 'cloned_audio' in st.session_state:
-            del st.session_state['cloned_audio']
         st.session_state['state'] = "processing"
         st.rerun()
 
 # 2. PROCESSING: Handle ASR, LLM, TTS, etc.
+elif st.session_state['state'] == "processing" and st.session_state.get('audio_bytes') and SERVER_URL:
+    st.markdown("⏳ **Processing your input...**")
+    # The server runs the whole turn and streams cloned sentences back as they are ready
+    with st.spinner("Transcribing..."):
+        turn = st.session_state['voice_client'].turn(
+            st.session_state['audio_bytes'], session_id=st.session_state['session_id'], speed=0.85)
+        # Dropping the connection makes the server cancel the turn
+        st.session_state['turn_token'] = CancelToken()
+        st.session_state['turn_token'].on_cancel(turn.close)
+        transcription = turn.wait_transcript()
+    st.session_state['audio_bytes'] = None
+    if transcription is None:
+        turn.close()
+        st.warning("No speech detected in the recording. Please try again.")
+        st.session_state['state'] = "waiting"
+        st.rerun()
+    else:
+        add_turn("user", transcription)
+        with st.spinner("Generating response..."):
+            st.session_state['tts_player'].play(turn)
+            st.session_state['tts_playing'] = True
+            if BARGE_IN:
+                if 'barge_in' not in st.session_state:
+                    st.session_state['barge_in'] = BargeInMonitor(st.session_state['tts_player'])
+                st.session_state['barge_in'].start()
+            turn.reply_ready.wait()
+        if turn.cancelled:
+            logger.info(f"Turn cancelled by the server: {turn.reason}")
+        else:
+            add_turn("assistant", turn.reply or "")
+        logger.info(f"LLM response: {turn.reply}")
+        st.session_state['state'] = "speaking"
+        st.rerun()
+
 elif st.session_state['state'] == "processing" and st.session_state.get('audio_bytes'):
     st.markdown("⏳ **Processing your input...**")
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-        tmp.write(st.session_state['audio_bytes'])
-        audio_path = tmp.name
+    # One trace per turn: decode/VAD/ASR/LLM/TTS spans are recorded by the pipeline itself
+    trace = tracer.start_turn(st.session_state['session_id'])
+    st.session_state['trace'] = trace
+    token = CancelToken()
+    st.session_state['turn_token'] = token
+    capture = profiler.begin(st.session_state['session_id'])  # None unless profiling is armed
+    st.session_state['profile_capture'] = capture
+    with use_trace(trace), use_capture(capture), profile_thread():
+        # Decode once, run VAD once and keep the trimmed speech in memory (no temp files)
+        speech = process_recording(st.session_state['audio_bytes'])
 
     # --- VAD check: Only proceed if speech is detected ---
-    if not has_speech(audio_path):
+    if not speech.has_speech:
         st.warning("No speech detected in the recording. Please try again.")
-        os.unlink(audio_path)
+        finish_trace(outcome="no_speech")
         st.session_state['audio_bytes'] = None
         st.session_state['state'] = "waiting"
         st.rerun()
     else:
-        # (Optional) Trim silence for cleaner ASR input
-        trimmed_audio_path = audio_path.replace(".wav", "_trimmed.wav")
-        trimmed = trim_silence(audio_path, output_path=trimmed_audio_path)
-        if trimmed:
-            audio_for_asr = trimmed_audio_path
-        else:
-            audio_for_asr = audio_path  # fallback to original if trimming failed
-
-        # --- Transcribe ---
-        with st.spinner("Transcribing..."):
-            transcription, latency_transcribe = log_and_time(transcribe_audio, audio_for_asr)
+        # --- Transcribe (trimmed samples go straight to Whisper) ---
+        with st.spinner("Transcribing..."), use_trace(trace), use_capture(capture), profile_thread():
+            transcription = transcribe_audio(speech.audio, model_size=os.environ.get("VOCOMATE_WHISPER_MODEL", "base"),
+                                             session_id=st.session_state['session_id'])
         add_turn("user", transcription)
+        context = st.session_state['context']
+        context.add_user(transcription)
 
-        # --- Generate LLM Response ---
-        with st.spinner("Generating response..."):
-            prompt = "You are a helpful assistant. Answer all parts of the user's question.\n\n"
-            for turn in st.session_state['history']:
-                prompt += f"{turn['role'].capitalize()}: {turn['text']}\n"
-            prompt += "Assistant:"
-            response, latency_llm = log_and_time(query_ollama, prompt)
+        # --- Generate LLM Response, synthesize + clone it sentence by sentence ---
+        # Sentences are cloned on a small worker pool while the LLM is still streaming
+        # and played in order, so audio starts after the first sentence (all in memory).
+        with st.spinner("Generating response..."), use_trace(trace), use_capture(capture), use_token(token), profile_thread():
+            # Token-budgeted window with a stable system/summary prefix (keeps Ollama's prompt cache warm)
+            messages = context.messages()
+            prefill = context.record_request(messages)
+            trace.attributes.update(prefill)
+            # Repeated prompt in the same context: cached reply (and usually cached audio)
+            client = get_client()
+            cached = response_cache.get_reply(transcription, messages[:-1], client.model)
+            trace.attributes["reply_cache"] = "miss" if cached is None else "hit"
+            if cached is None:
+                stream = client.stream(None, history=messages)
+                token.on_cancel(stream.close)
+                sentences = (event.text for event in stream if event.kind == "sentence")
+            else:
+                stream, sentences = None, split_sentences(cached)
+            pipeline = SentencePipeline(speed=0.85)
+            st.session_state['tts_player'].play(pipeline.run(sentences))
+            st.session_state['tts_playing'] = True
+            if BARGE_IN:
+                if 'barge_in' not in st.session_state:
+                    st.session_state['barge_in'] = BargeInMonitor(st.session_state['tts_player'])
+                st.session_state['barge_in'].start()
+            pipeline.source_done.wait()
+        response = cached if stream is None else stream.text
         add_turn("assistant", response)
+        context.add_assistant(response)
         logger.info(f"LLM response: {response}")
+        if stream is not None:
+            if not token.cancelled:
+                response_cache.put_reply(transcription, messages[:-1], client.model, response)
+            trace.attributes.update(tokens=stream.stats.tokens, tokens_per_second=stream.stats.tokens_per_second)
+        if capture is not None:
+            # The capture ends in a later rerun, possibly on another thread; torch's profiler
+            # has to be stopped on the thread that started it
+            capture.stop_torch()
 
-        # --- Synthesize Speech ---
-        with st.spinner("Synthesizing speech..."):
-            base_audio = generate_base_speech(response, speed=0.85)
-        if base_audio is None or not os.path.exists(base_audio):
-            logger.error("Failed to generate base speech audio. Please check your TTS setup.")
-            st.error("Failed to generate base speech audio. Please check your TTS setup.")
-            st.session_state['state'] = "waiting"
-            st.rerun()
-        else:
-            logger.info("Base speech audio generated successfully.")
-            # --- Clone Voice ---
-            with st.spinner("Cloning voice..."):
-                cloned_audio, latency_tts = log_and_time(clone_voice, base_audio_path=base_audio)
-            if cloned_audio is None or not os.path.exists(cloned_audio):
-                logger.error("Voice cloning failed or output file not found.")
-                st.error("Voice cloning failed or output file not found.")
-                st.session_state['state'] = "waiting"
-                st.rerun()
-            else:
-                logger.info("Voice cloning succeeded.")
-                st.session_state['cloned_audio'] = cloned_audio
-                st.session_state['latency_transcribe'] = latency_transcribe
-                st.session_state['latency_llm'] = latency_llm
-                st.session_state['latency_tts'] = latency_tts
-                st.session_state['state'] = "speaking"
-                st.rerun()
-
-        # Clean up temp files
-        os.unlink(audio_path)
-        if trimmed and os.path.exists(trimmed_audio_path) and trimmed_audio_path != audio_path:
-            os.unlink(trimmed_audio_path)
+        st.session_state['state'] = "speaking"
         st.session_state['audio_bytes'] = None
+        st.rerun()
 
 # 3. SPEAKING: Play TTS, allow interruption, then return to waiting
-elif st.session_state['state'] == "speaking" and 'cloned_audio' in st.session_state:
+elif st.session_state['state'] == "speaking":
+    # One page of history per rerun (an indexed SQLite read), however long the session is
+    session_id = st.session_state['session_id']
     st.subheader("Conversation History")
-    for turn in st.session_state['history']:
+    pages = conversation_store.pages(session_id, HISTORY_PAGE_SIZE)
+    page = 0
+    if pages > 1:
+        page = st.number_input("Page (1 = most recent)", min_value=1, max_value=pages, value=1, key="history_page") - 1
+    for turn in conversation_store.page(session_id, page, HISTORY_PAGE_SIZE):
         st.markdown(f"**{turn['role'].capitalize()}:** {turn['text']}")
+    query = st.text_input("Search past turns", key="history_search")
+    if query:
+        everywhere = HISTORY_SEARCH_ALL and st.checkbox("All sessions", key="history_search_all")
+        hits = conversation_store.search(query, session_id=None if everywhere else session_id, limit=10)
+        for hit in hits:
+            st.markdown(f"`{hit['session_id']}#{hit['seq']}` **{hit['role'].capitalize()}:** {hit['snippet']}")
+        if not hits:
+            st.caption("No matching turns.")
 
     st.subheader("Latest Response")
-    st.write(st.session_state['history'][-1]["text"])
+    latest = conversation_store.tail(session_id, 1)
+    st.write(latest[-1]["text"] if latest else "")
 
     st.markdown("🎤 **Click the button to interrupt and ask a new question.**")
-    st.info("Recording will stop automatically after 1.8 seconds of silence, or you can click 'Stop'.")
-
-    # Start threaded TTS playback only if not already playing
-    if not st.session_state.get('tts_playing', False):
-        st.session_state['tts_player'].play(st.session_state['cloned_audio'])
-        st.session_state['tts_playing'] = True
+    st.info(f"Recording will stop automatically after {PAUSE_THRESHOLD:g} seconds of silence, or you can click 'Stop'.")
 
     # Recorder for interruption
     audio = audio_recorder(
-        pause_threshold=2.0,
+        pause_threshold=PAUSE_THRESHOLD,
         sample_rate=16000,
         icon_size="2x",
         neutral_color="#6c757d",
@@ -202,35 +294,50 @@ elif st.session_state['state'] == "speaking" and 'cloned_audio' in st.session_st
         icon_name="microphone",
         key="recorder_speaking"
     )
+
+    # Debug info (optional): aggregated per-stage latencies instead of the raw log
+    if debug_mode:
+        show_metrics()
+        st.write("Model registry:", registry.stats())
+        st.write("Conversation context:", st.session_state['context'].stats())
+        st.write("ASR input I/O:", io_stats)
+        st.write("Playback:", st.session_state['tts_player'].stats())
+
     if audio and audio['audio']:
-        # User interrupted: stop TTS, process new input
-        st.session_state['tts_player'].stop()
+        # User interrupted: cancel the turn (stops TTS and any synthesis still running), process new input
+        cancel_turn("interrupted")
+        finish_trace(outcome="interrupted")
         st.session_state['tts_playing'] = False
         st.session_state['audio_bytes'] = audio['audio']
         st.session_state['state'] = "processing"
-        if 'cloned_audio' in st.session_state:
-            del st.session_state['cloned_audio']
         st.rerun()
     else:
-        # If playback finished naturally, reset for next turn
-        if not st.session_state['tts_player'].thread.is_alive():
-            st.session_state['tts_playing'] = False
-            st.session_state['state'] = "waiting"
-            if 'cloned_audio' in st.session_state:
-                del st.session_state['cloned_audio']
-            st.rerun()
-
-    # Debug info (optional)
-    if debug_mode:
-        st.write("Transcription latency:", st.session_state.get('latency_transcribe', None))
-        st.write("LLM latency:", st.session_state.get('latency_llm', None))
-        st.write("TTS latency:", st.session_state.get('latency_tts', None))
-        with open(log_file, "r") as f:
-            logs = f.read()
-        st.text_area("Logs", logs, height=200)
-
-    # Optionally, clear latencies if you want (after leaving speaking state)
-    if st.session_state['state'] != "speaking":
-        st.session_state['latency_transcribe'] = None
-        st.session_state['latency_llm'] = None
-        st.session_state['latency_tts'] = None
+        # Wait for playback to end (or a barge-in) without blocking reruns: every
+        # placeholder update lets Streamlit interrupt this loop when the recorder fires.
+        player = st.session_state['tts_player']
+        monitor = st.session_state.get('barge_in') if BARGE_IN else None
+        status = st.empty()
+        while player.is_playing and not (monitor and monitor.utterance):
+            status.caption("🔊 Speaking...")
+            player.wait(0.1)
+        status.empty()
+        st.session_state['tts_playing'] = False
+        if monitor and monitor.triggered:
+            cancel_turn("barge_in")
+        st.session_state.pop('turn_token', None)
+        finish_trace(outcome="barge_in" if monitor and monitor.triggered else "completed")
+        if monitor:
+            # Wait for the interrupting utterance to end, then treat it like a recording
+            deadline = time.time() + 15
+            while monitor.triggered and monitor.utterance is None and time.time() < deadline:
+                status.caption("🎤 Listening...")
+                time.sleep(0.05)
+            monitor.stop()
+            if monitor.utterance is not None:
+                buffer = io.BytesIO()
+                sf.write(buffer, monitor.utterance.audio, 16000, format="WAV")
+                st.session_state['audio_bytes'] = buffer.getvalue()
+                st.session_state['state'] = "processing"
+                st.rerun()
+        st.session_state['state'] = "waiting"
+        st.rerun()
@@ -0,0 +1,44 @@
+# utils/audio_frames.py
+import numpy as np
+
+
+def to_float32(samples):
+    """int16/int32/float audio -> float32 in [-1, 1]."""
+    samples = np.asarray(samples)
+    if samples.dtype == np.int16:
+        return samples.astype(np.float32) / 32768.0
+    if samples.dtype == np.int32:
+        return samples.astype(np.float32) / 2147483648.0
+    return samples.astype(np.float32, copy=False)
+
+
+def resample(samples, sample_rate, target_sr=16000):
+    """
+    Lightweight resampler for live frames: box-filter decimation for integer ratios
+    (48 kHz -> 16 kHz), linear interpolation otherwise. Good enough for VAD/ASR input.
+    """
+    if sample_rate == target_sr or len(samples) == 0:
+        return samples
+    if sample_rate > target_sr and sample_rate % target_sr == 0:
+        factor = sample_rate // target_sr
+        usable = len(samples) - len(samples) % factor
+        return samples[:usable].reshape(-1, factor).mean(axis=1)
+    duration = len(samples) / sample_rate
+    target_len = int(round(duration * target_sr))
+    positions = np.linspace(0, len(samples) - 1, target_len)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def av_frame_to_mono(frame, target_sr=16000):
+    """
+    Converts a PyAV/WebRTC ``AudioFrame`` into mono float32 samples at ``target_sr``.
+
+    Packed formats (s16) come out of ``to_ndarray`` as one interleaved row;
+    planar formats have one row per channel.
+    """
+    data = frame.to_ndarray()
+    channels = len(frame.layout.channels)
+    if data.shape[0] == 1 and channels > 1:
+        data = data.reshape(-1, channels).T
+    mono = to_float32(data).mean(axis=0)
+    return resample(mono, frame.sample_rate, target_sr)
@@ -0,0 +1,88 @@
+# utils/cancellation.py
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+
+class TurnCancelled(Exception):
+    """Raised by ``check_cancelled`` inside a stage whose turn was cancelled or superseded."""
+
+
+class CancelToken:
+    """
+    Cancellation state of one turn, shared by every stage working on it.
+
+    ``cancel`` is idempotent and runs the registered callbacks once (close the
+    LLM stream, stop playback, cancel the turn's task, ...). A torch forward pass
+    can't be interrupted, so stage code on worker threads calls ``check_cancelled``
+    between model calls and skips the rest of the work.
+    """
+
+    def __init__(self):
+        self.reason = None
+        self.cancelled_at = None
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self, reason="cancelled"):
+        """Cancels the turn; returns False if it already was."""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self.cancelled_at = time.perf_counter()
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Cancel callback failed: {e}")
+        return True
+
+    def on_cancel(self, callback):
+        """Runs ``callback`` when the turn is cancelled (right away if it already is)."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def check(self):
+        if self._event.is_set():
+            raise TurnCancelled(self.reason)
+
+    def wait(self, timeout=None):
+        return self._event.wait(timeout)
+
+
+# --- Ambient token for stage code (no-ops when the turn isn't cancellable) ---
+
+_current_token = contextvars.ContextVar("vocomate_cancel_token", default=None)
+
+
+def current_token():
+    return _current_token.get()
+
+
+@contextmanager
+def use_token(token):
+    """Makes ``token`` the current cancel token in this thread/context (worker threads must set it explicitly)."""
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
+
+
+def check_cancelled():
+    """Raises TurnCancelled if the current turn was cancelled."""
+    token = _current_token.get()
+    if token is not None:
+        token.check()
@@ -0,0 +1,167 @@
+# utils/cpu_scheduler.py
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Relative share of the cores each stage gets when no explicit plan is given.
+# Whisper decoding and OpenVoice conversion are the heaviest per call; Silero is tiny.
+DEFAULT_WEIGHTS = {"transcribe": 3, "synthesis": 2, "conversion": 2, "vad": 1}
+
+
+def available_cpus():
+    """CPUs this process may run on (respects taskset/cgroup affinity where supported)."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def parse_plan(spec):
+    """ "transcribe=4,synthesis=2" -> {"transcribe": 4, "synthesis": 2} """
+    plan = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, threads = item.partition("=")
+        plan[name.strip()] = int(threads)
+    return plan
+
+
+class StageBudget:
+    """Intra-op thread count and (optionally) the CPUs a stage is pinned to."""
+
+    __slots__ = ("threads", "cpus")
+
+    def __init__(self, threads, cpus=None):
+        self.threads = threads
+        self.cpus = cpus
+
+    def __repr__(self):
+        return f"StageBudget(threads={self.threads}, cpus={self.cpus})"
+
+
+class CpuScheduler:
+    """
+    Per-stage CPU thread budgets for the pipeline's torch models.
+
+    torch's intra-op pool is sized per calling thread, so every stage call sets
+    the thread count of the worker it runs on instead of letting each model
+    default to all cores. Pipelined stages (Whisper on one session while another
+    session's MeloTTS/OpenVoice run) then share the machine instead of
+    oversubscribing it. With ``pin=True`` each stage also gets a disjoint CPU set
+    (``os.sched_setaffinity`` on the calling thread, Linux only).
+
+    Args:
+        plan (dict, optional): ``{stage: threads}``; by default the available CPUs are
+            split by ``DEFAULT_WEIGHTS``
+        pin (bool): Pin stage calls to disjoint CPU sets
+        interop_threads (int): torch inter-op pool size, set once per process
+        cpus (list[int], optional): CPUs to schedule on (default: the process affinity)
+    """
+
+    def __init__(self, plan=None, pin=False, interop_threads=1, cpus=None):
+        self.cpus = list(cpus) if cpus is not None else available_cpus()
+        self.pin = pin and hasattr(os, "sched_setaffinity")
+        self.interop_threads = interop_threads
+        self.budgets = self._allocate(plan or self._weighted_plan())
+        self._lock = threading.Lock()
+        self._interop_done = False
+        self._stats = {name: {"calls": 0, "busy_seconds": 0.0, "active": 0, "max_active": 0} for name in self.budgets}
+
+    def _weighted_plan(self):
+        total = sum(DEFAULT_WEIGHTS.values())
+        return {name: max(1, len(self.cpus) * weight // total) for name, weight in DEFAULT_WEIGHTS.items()}
+
+    def _allocate(self, plan):
+        budgets, start = {}, 0
+        for name, threads in plan.items():
+            threads = max(1, min(int(threads), len(self.cpus)))
+            cpus = None
+            if self.pin:
+                # Disjoint slices while cores last, then wrap around (oversubscribed plan)
+                cpus = [self.cpus[(start + i) % len(self.cpus)] for i in range(threads)]
+                start += threads
+            budgets[name] = StageBudget(threads, cpus)
+        return budgets
+
+    def _configure_interop(self):
+        if self._interop_done:
+            return
+        self._interop_done = True
+        import torch
+        try:
+            torch.set_num_interop_threads(self.interop_threads)
+        except RuntimeError:
+            pass  # already fixed by earlier parallel work in this process
+
+    @contextmanager
+    def stage(self, name):
+        """Runs the block with ``name``'s thread budget (and CPU set) on the calling thread."""
+        budget = self.budgets.get(name)
+        if budget is None:
+            yield None
+            return
+        import torch
+
+        self._configure_interop()
+        previous_threads = torch.get_num_threads()
+        if previous_threads != budget.threads:
+            torch.set_num_threads(budget.threads)
+        previous_cpus = None
+        if budget.cpus:
+            previous_cpus = os.sched_getaffinity(0)
+            os.sched_setaffinity(0, budget.cpus)
+        stats = self._stats[name]
+        with self._lock:
+            stats["calls"] += 1
+            stats["active"] += 1
+            stats["max_active"] = max(stats["max_active"], stats["active"])
+        began = time.perf_counter()
+        try:
+            yield budget
+        finally:
+            with self._lock:
+                stats["active"] -= 1
+                stats["busy_seconds"] += time.perf_counter() - began
+            if previous_cpus is not None:
+                os.sched_setaffinity(0, previous_cpus)
+            if previous_threads != budget.threads:
+                torch.set_num_threads(previous_threads)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cpus": len(self.cpus),
+                "pin": self.pin,
+                "budgets": {name: {"threads": b.threads, "cpus": b.cpus} for name, b in self.budgets.items()},
+                "stages": {name: dict(s) for name, s in self._stats.items()},
+            }
+
+
+def scheduler_from_env():
+    """
+    VOCOMATE_CPU_PLAN="transcribe=4,synthesis=2,conversion=2,vad=1" sets explicit budgets,
+    VOCOMATE_CPU_PIN=1 pins stages to disjoint cores, VOCOMATE_CPU_PLAN=off disables scheduling.
+    """
+    spec = os.environ.get("VOCOMATE_CPU_PLAN", "")
+    if spec.lower() == "off":
+        return None
+    return CpuScheduler(
+        plan=parse_plan(spec) or None,
+        pin=os.environ.get("VOCOMATE_CPU_PIN", "0") == "1",
+        interop_threads=int(os.environ.get("VOCOMATE_INTEROP_THREADS", 1)),
+    )
+
+
+scheduler = scheduler_from_env()
+
+
+def set_scheduler(new_scheduler):
+    """Replaces the process-wide scheduler (None disables per-stage budgets)."""
+    global scheduler
+    scheduler = new_scheduler
+
+
+def cpu_stage(name):
+    """``with cpu_stage("transcribe"): ...`` -- no-op when scheduling is disabled."""
+    if scheduler is None:
+        return nullcontext()
+    return scheduler.stage(name)
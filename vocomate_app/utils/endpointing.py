@@ -0,0 +1,188 @@
+# utils/endpointing.py
+import copy
+import os
+import queue
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if repo_root not in sys.path:
+    sys.path.append(repo_root)
+from vocomate_app.utils.audio_frames import av_frame_to_mono, to_float32
+from vocomate_app.utils.model_registry import get_silero_vad
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 512  # Silero VAD works on 512-sample (32 ms) frames at 16 kHz
+
+
+class EndpointEvent:
+    """``kind`` is "start" or "end"; "end" events carry the utterance samples and the detection latency."""
+
+    __slots__ = ("kind", "sample", "audio", "latency_ms")
+
+    def __init__(self, kind, sample, audio=None, latency_ms=None):
+        self.kind = kind
+        self.sample = sample
+        self.audio = audio
+        self.latency_ms = latency_ms
+
+    def __repr__(self):
+        return f"EndpointEvent({self.kind!r}, sample={self.sample}, latency_ms={self.latency_ms})"
+
+
+class StreamingEndpointer:
+    """
+    Live speech start/end detection on a stream of audio frames, built on Silero's VADIterator.
+
+    Feed it audio as it arrives (any block size); it emits a "start" event when
+    speech begins and an "end" event, carrying the whole utterance, as soon as
+    ``hangover_ms`` of silence follows. End-of-utterance latency is therefore
+    roughly ``hangover_ms`` plus one frame, instead of a fixed recorder pause.
+
+    Args:
+        threshold (float): Silero speech probability threshold
+        hangover_ms (int): Silence required to end an utterance
+        speech_pad_ms (int): Padding kept around detected speech
+        pre_roll_ms (int): Audio kept from before the detected start
+        max_utterance_s (float): Force an end after this long
+        on_speech_start (callable, optional): Called with the "start" event
+        on_utterance (callable, optional): Called with the "end" event
+    """
+
+    def __init__(self, threshold=0.5, hangover_ms=300, speech_pad_ms=30, pre_roll_ms=200,
+                 max_utterance_s=30.0, on_speech_start=None, on_utterance=None):
+        silero = get_silero_vad()
+        # Silero keeps RNN state inside the model, so every live stream gets its own copy
+        self._model = copy.deepcopy(silero.model)
+        self._iterator = silero.VADIterator(
+            self._model, threshold=threshold, sampling_rate=SAMPLE_RATE,
+            min_silence_duration_ms=hangover_ms, speech_pad_ms=speech_pad_ms,
+        )
+        self.hangover_ms = hangover_ms
+        self.speech_pad_samples = SAMPLE_RATE * speech_pad_ms // 1000
+        self.max_utterance_samples = int(max_utterance_s * SAMPLE_RATE)
+        self.on_speech_start = on_speech_start
+        self.on_utterance = on_utterance
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._pre_roll = deque(maxlen=max(1, pre_roll_ms * SAMPLE_RATE // 1000 // FRAME_SAMPLES))
+        self._utterance = None
+        self._start_sample = 0
+        self.samples_seen = 0
+        self.latencies_ms = deque(maxlen=100)
+
+    @property
+    def in_speech(self):
+        return self._utterance is not None
+
+    def reset(self):
+        self._iterator.reset_states()
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._pre_roll.clear()
+        self._utterance = None
+
+    def feed(self, samples):
+        """
+        Consumes mono 16 kHz audio (float or int16) and returns the events it triggered.
+        """
+        self._pending = np.concatenate([self._pending, to_float32(samples)])
+        events = []
+        while len(self._pending) >= FRAME_SAMPLES:
+            frame, self._pending = self._pending[:FRAME_SAMPLES], self._pending[FRAME_SAMPLES:]
+            events.extend(self._process_frame(frame))
+        return events
+
+    def feed_av_frame(self, frame):
+        """Consumes a WebRTC/PyAV ``AudioFrame`` (any rate/layout)."""
+        return self.feed(av_frame_to_mono(frame, SAMPLE_RATE))
+
+    def _process_frame(self, frame):
+        import torch
+
+        started = time.perf_counter()
+        self.samples_seen += len(frame)
+        result = self._iterator(torch.from_numpy(frame), return_seconds=False)
+        events = []
+        if self._utterance is not None:
+            self._utterance.append(frame)
+        if result and "start" in result and self._utterance is None:
+            self._start_sample = result["start"]
+            self._utterance = list(self._pre_roll) + [frame]
+            event = EndpointEvent("start", result["start"])
+            if self.on_speech_start:
+                self.on_speech_start(event)
+            events.append(event)
+        elif result and "end" in result and self._utterance is not None:
+            speech_end = result["end"] - self.speech_pad_samples
+            events.append(self._finish(speech_end, started))
+        elif self._utterance is not None and self.samples_seen - self._start_sample >= self.max_utterance_samples:
+            events.append(self._finish(self.samples_seen, started))
+            self._iterator.reset_states()
+        self._pre_roll.append(frame)
+        return events
+
+    def _finish(self, speech_end, started):
+        audio = np.concatenate(self._utterance)
+        self._utterance = None
+        # Time between the last speech sample and the moment we emit the end event
+        latency_ms = (self.samples_seen - speech_end) / SAMPLE_RATE * 1000 + (time.perf_counter() - started) * 1000
+        self.latencies_ms.append(latency_ms)
+        event = EndpointEvent("end", speech_end, audio=audio, latency_ms=latency_ms)
+        if self.on_utterance:
+            self.on_utterance(event)
+        return event
+
+    def stats(self):
+        latencies = sorted(self.latencies_ms)
+        if not latencies:
+            return {"utterances": 0, "hangover_ms": self.hangover_ms}
+        return {
+            "utterances": len(latencies),
+            "hangover_ms": self.hangover_ms,
+            "latency_ms_p50": latencies[len(latencies) // 2],
+            "latency_ms_max": latencies[-1],
+        }
+
+
+def listen_for_utterance(endpointer=None, device=None, timeout=None):
+    """
+    Records from the microphone until the endpointer detects the end of an utterance.
+
+    Args:
+        endpointer (StreamingEndpointer, optional): Configured endpointer (default settings otherwise)
+        device: sounddevice input device
+        timeout (float, optional): Give up (return None) after this many seconds
+
+    Returns:
+        EndpointEvent | None: The "end" event with ``audio`` (16 kHz float32) and ``latency_ms``
+    """
+    import sounddevice as sd
+
+    endpointer = endpointer or StreamingEndpointer()
+    frames = queue.Queue()
+
+    def callback(indata, frame_count, time_info, status):
+        frames.put(indata[:, 0].copy())
+
+    deadline = time.monotonic() + timeout if timeout else None
+    with sd.InputStream(samplerate=SAMPLE_RATE, channels=1, dtype="float32", blocksize=FRAME_SAMPLES,
+                        device=device, callback=callback):
+        while deadline is None or time.monotonic() < deadline:
+            try:
+                block = frames.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            for event in endpointer.feed(block):
+                if event.kind == "end":
+                    return event
+    return None
+
+
+if __name__ == "__main__":
+    hangover = int(os.environ.get("VOCOMATE_HANGOVER_MS", 300))
+    print(f"Listening (hangover {hangover} ms)... speak, then pause.")
+    event = listen_for_utterance(StreamingEndpointer(hangover_ms=hangover, on_speech_start=lambda e: print("Speech started")))
+    if event is not None:
+        print(f"Utterance: {len(event.audio) / SAMPLE_RATE:.2f}s, end-of-utterance latency {event.latency_ms:.0f} ms")
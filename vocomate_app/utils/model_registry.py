@@ -0,0 +1,330 @@
+# utils/model_registry.py
+import os
+import threading
+import time
+import warnings
+from collections import OrderedDict
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+OPENVOICE_CONVERTER_DIR = os.environ.get(
+    "VOCOMATE_OPENVOICE_DIR",
+    os.path.join(REPO_ROOT, 'OpenVoice', 'openvoice', 'checkpoints_v2', 'converter')
+)
+DEFAULT_CONVERTER_CONFIG = os.path.join(OPENVOICE_CONVERTER_DIR, 'config.json')
+DEFAULT_CONVERTER_CKPT = os.path.join(OPENVOICE_CONVERTER_DIR, 'checkpoint.pth')
+
+
+def _estimate_nbytes(model):
+    """Best-effort size of a loaded model: parameters + buffers of every torch module we can reach."""
+    modules = [model, getattr(model, "model", None)]
+    total = 0
+    seen = set()
+    for module in modules:
+        if module is None or not hasattr(module, "parameters"):
+            continue
+        tensors = list(module.parameters())
+        if hasattr(module, "buffers"):
+            tensors += list(module.buffers())
+        for t in tensors:
+            if id(t) in seen:
+                continue
+            seen.add(id(t))
+            total += t.numel() * t.element_size()
+        if hasattr(module, "modules"):
+            # Dynamically quantized layers keep their int8 weights outside parameters(), in packed-params submodules
+            for layer in module.modules():
+                if hasattr(layer, "_weight_bias") and not hasattr(layer, "weight"):
+                    for t in layer._weight_bias():
+                        if t is not None:
+                            total += t.numel() * t.element_size()
+    return total
+
+
+class _Entry:
+    def __init__(self, model, nbytes, load_time):
+        self.model = model
+        self.nbytes = nbytes
+        self.load_time = load_time
+        self.hits = 0
+        self.last_used = time.time()
+
+
+class ModelRegistry:
+    """
+    Keeps heavy models (Whisper, MeloTTS, OpenVoice, ...) resident for the whole process.
+
+    Models are keyed by ``(kind, key)`` and built by a loader registered per kind.
+    When the summed model size exceeds ``budget_bytes`` the least-recently-used
+    models are evicted (the model being requested is never evicted).
+    """
+
+    def __init__(self, budget_bytes=None):
+        self.budget_bytes = budget_bytes
+        self._loaders = {}
+        self._default_keys = {}
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._key_locks = {}
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "load_seconds": 0.0}
+
+    def register_loader(self, kind, loader, default_key=None):
+        """Register ``loader(key) -> model`` for a model kind."""
+        self._loaders[kind] = loader
+        self._default_keys[kind] = default_key
+
+    def get(self, kind, key):
+        """
+        Returns the resident model for ``(kind, key)``, loading it on first use.
+
+        Args:
+            kind (str): Model family, e.g. "whisper", "melo", "openvoice"
+            key: Hashable identifier within the family (model size, language, ...)
+
+        Returns:
+            The loaded model instance, shared by every caller in the process.
+        """
+        name = (kind, key)
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                return self._touch(name, entry)
+            key_lock = self._key_locks.setdefault(name, threading.Lock())
+
+        # Load outside the registry lock so other models stay available meanwhile,
+        # but serialize concurrent loads of the same model.
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(name)
+                if entry is not None:
+                    return self._touch(name, entry)
+            if kind not in self._loaders:
+                raise KeyError(f"No loader registered for model kind '{kind}'")
+            start = time.perf_counter()
+            model = self._loaders[kind](key)
+            load_time = time.perf_counter() - start
+            entry = _Entry(model, _estimate_nbytes(model), load_time)
+            with self._lock:
+                self._stats["misses"] += 1
+                self._stats["load_seconds"] += load_time
+                self._entries[name] = entry
+                self._evict(keep=name)
+            print(f"Loaded {kind} model ({key}) in {load_time:.2f}s")
+            return model
+
+    def _touch(self, name, entry):
+        self._entries.move_to_end(name)
+        entry.hits += 1
+        entry.last_used = time.time()
+        self._stats["hits"] += 1
+        return entry.model
+
+    def _evict(self, keep=None):
+        if self.budget_bytes is None:
+            return
+        for name in list(self._entries):
+            if self.resident_bytes() <= self.budget_bytes:
+                break
+            if name == keep:
+                continue
+            del self._entries[name]
+            self._stats["evictions"] += 1
+            print(f"Evicted {name[0]} model ({name[1]}) to stay under memory budget")
+
+    def resident_bytes(self):
+        with self._lock:
+            return sum(e.nbytes for e in self._entries.values())
+
+    def set_budget(self, budget_bytes):
+        with self._lock:
+            self.budget_bytes = budget_bytes
+            self._evict()
+
+    def evict(self, kind, key):
+        with self._lock:
+            return self._entries.pop((kind, key), None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def warmup(self, specs):
+        """
+        Loads models ahead of the first turn.
+
+        Args:
+            specs (list[str] | str): Entries like "whisper:base", "melo:EN", "openvoice"
+                (comma-separated when given as a string)
+        """
+        if isinstance(specs, str):
+            specs = [s for s in specs.split(",") if s.strip()]
+        for spec in specs:
+            kind, _, key = spec.strip().partition(":")
+            self.get(kind, key or self._default_keys.get(kind))
+
+    def stats(self):
+        """Load times, hit rates and memory usage for every resident model."""
+        with self._lock:
+            total = self._stats["hits"] + self._stats["misses"]
+            return {
+                "hits": self._stats["hits"],
+                "misses": self._stats["misses"],
+                "hit_rate": self._stats["hits"] / total if total else 0.0,
+                "evictions": self._stats["evictions"],
+                "load_seconds": self._stats["load_seconds"],
+                "resident_bytes": sum(e.nbytes for e in self._entries.values()),
+                "budget_bytes": self.budget_bytes,
+                "models": [
+                    {
+                        "kind": kind,
+                        "key": key,
+                        "bytes": e.nbytes,
+                        "load_seconds": e.load_time,
+                        "hits": e.hits,
+                    }
+                    for (kind, key), e in self._entries.items()
+                ],
+            }
+
+
+# --- Loaders ---
+
+def quantize_linear_int8(model):
+    """
+    Dynamic int8 quantization of every Linear layer (weights int8, activations
+    quantized on the fly); convolutions, embeddings and layer norms stay float32.
+    """
+    import torch
+
+    # Whisper's Linear subclass (casts weights to the input dtype) isn't picked up
+    # by quantize_dynamic: swap in plain nn.Linear modules sharing the same weights
+    for module in list(model.modules()):
+        for name, child in module.named_children():
+            if isinstance(child, torch.nn.Linear) and type(child) is not torch.nn.Linear:
+                plain = torch.nn.Linear(child.in_features, child.out_features, bias=child.bias is not None)
+                plain.weight = child.weight
+                plain.bias = child.bias
+                setattr(module, name, plain)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)  # quantized tensor deprecation notice on newer torch
+        # In place: no second float32 copy of the model while quantizing
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def _load_whisper(model_size):
+    """``model_size``: a Whisper size, or e.g. "base-int8" for the int8-quantized CPU variant."""
+    import whisper
+    quantized = model_size.endswith("-int8")
+    size = model_size[:-len("-int8")] if quantized else model_size
+    print(f"Loading Whisper model ({model_size})...")
+    if not quantized:
+        return whisper.load_model(size)
+    # Quantized kernels are CPU-only
+    return quantize_linear_int8(whisper.load_model(size, device="cpu").float().eval())
+
+
+def _load_melo(language):
+    from melo.api import TTS
+    print(f"Loading MeloTTS ({language})...")
+    return TTS(language=language, device="auto")
+
+
+def _load_openvoice(paths):
+    from openvoice.api import ToneColorConverter
+    config_path, checkpoint_path = paths or (DEFAULT_CONVERTER_CONFIG, DEFAULT_CONVERTER_CKPT)
+    print("Loading ToneColorConverter...")
+    converter = ToneColorConverter(config_path=config_path, device="cpu")
+    converter.load_ckpt(checkpoint_path)
+    return converter
+
+
+class SileroVAD:
+    """Silero VAD model bundled with its helper functions (get_speech_timestamps, VADIterator, ...)."""
+
+    def __init__(self, model, utils):
+        self.model = model
+        self.utils = utils
+        (self.get_speech_timestamps, self.save_audio, self.read_audio,
+         self.VADIterator, self.collect_chunks) = utils
+
+    def parameters(self):
+        return self.model.parameters()
+
+    def buffers(self):
+        return self.model.buffers()
+
+
+def _load_silero(jit_path):
+    """
+    Loads Silero VAD without touching the network when possible.
+
+    Order: the pip ``silero-vad`` package (weights bundled), then a cached torch.hub
+    checkout, then a torch.hub download. ``jit_path`` (or VOCOMATE_SILERO_JIT)
+    replaces the weights with a local/vendored silero_vad.jit file.
+    """
+    import torch
+
+    jit_path = jit_path or os.environ.get("VOCOMATE_SILERO_JIT")
+    try:
+        import silero_vad
+        model = None if jit_path else silero_vad.load_silero_vad()
+        utils = (silero_vad.get_speech_timestamps, silero_vad.save_audio, silero_vad.read_audio,
+                 silero_vad.VADIterator, silero_vad.collect_chunks)
+    except ImportError:
+        cached_repo = os.path.join(torch.hub.get_dir(), 'snakers4_silero-vad_master')
+        if os.path.isdir(cached_repo):
+            model, utils = torch.hub.load(repo_or_dir=cached_repo, model='silero_vad', source='local')
+        else:
+            model, utils = torch.hub.load(repo_or_dir='snakers4/silero-vad', model='silero_vad', force_reload=False)
+    if jit_path:
+        model = torch.jit.load(jit_path, map_location="cpu")
+        model.eval()
+    return SileroVAD(model, utils)
+
+
+def _budget_from_env():
+    value = os.environ.get("VOCOMATE_MODEL_RAM_MB")
+    return int(float(value) * 1024 * 1024) if value else None
+
+
+registry = ModelRegistry(budget_bytes=_budget_from_env())
+registry.register_loader("whisper", _load_whisper, default_key="base")
+registry.register_loader("melo", _load_melo, default_key="EN")
+registry.register_loader("openvoice", _load_openvoice)
+registry.register_loader("silero", _load_silero)
+
+
+def get_whisper_model(model_size="base"):
+    return registry.get("whisper", model_size)
+
+
+def get_melo_tts(language="EN"):
+    return registry.get("melo", language)
+
+
+def get_silero_vad(jit_path=None):
+    return registry.get("silero", jit_path)
+
+
+def get_tone_color_converter(config_path=DEFAULT_CONVERTER_CONFIG, checkpoint_path=DEFAULT_CONVERTER_CKPT):
+    key = (os.path.abspath(config_path), os.path.abspath(checkpoint_path))
+    if key == (DEFAULT_CONVERTER_CONFIG, DEFAULT_CONVERTER_CKPT):
+        key = None  # share the instance warmed up via "openvoice"
+    return registry.get("openvoice", key)
+
+
+_warmup_done = False
+
+
+def warmup_from_env():
+    """
+    Warm up the models listed in VOCOMATE_WARMUP (e.g. "whisper:base,melo:EN,openvoice").
+
+    Only runs once per process, so UIs that re-execute their script (Streamlit) can call it freely.
+    """
+    global _warmup_done
+    if _warmup_done:
+        return
+    _warmup_done = True
+    specs = os.environ.get("VOCOMATE_WARMUP", "")
+    if specs:
+        registry.warmup(specs)
@@ -0,0 +1,389 @@
+# utils/playback.py
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if repo_root not in sys.path:
+    sys.path.append(repo_root)
+from vocomate_app.utils.audio_frames import resample, to_float32
+from vocomate_app.utils.tracing import current_trace
+
+BLOCK_SIZE = 512  # ~23 ms at 22.05 kHz: upper bound for stop/duck latency before device buffering
+
+
+class AudioPlayer:
+    """
+    Event-driven playback on a ``sounddevice.OutputStream``.
+
+    Audio is handed over as a stream of chunks (e.g. ``SentencePipeline.run``) and
+    pulled block by block from PortAudio's callback, so nothing polls while audio
+    plays and the next chunk can still be in synthesis when the previous one starts.
+    ``stop()`` and ``duck()`` only flip a flag the callback reads on its next block:
+    the reaction time is one block plus the device's output latency, both reported
+    in ``stats()`` together with the callback cost and process CPU use during playback.
+
+    Args:
+        blocksize (int): Frames per callback
+        device: sounddevice output device
+        max_buffered_chunks (int): Chunks decoded ahead of playback
+        fade_ms (float): Gain ramp used for stop/duck to avoid clicks
+    """
+
+    def __init__(self, blocksize=BLOCK_SIZE, device=None, max_buffered_chunks=8, fade_ms=5.0):
+        self.blocksize = blocksize
+        self.device = device
+        self.fade_ms = fade_ms
+        self._chunks = queue.Queue(maxsize=max_buffered_chunks)
+        self._current = None
+        self._offset = 0
+        self._gain = 1.0
+        self._target_gain = 1.0
+        self._stop_requested_at = None
+        self._trace = None
+        self._source_done = threading.Event()
+        self._done = threading.Event()
+        self._done.set()
+        self._stream = None
+        self._feeder = None
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.sample_rate = None
+        self.output_latency = 0.0
+        self.played_samples = 0
+        self.underruns = 0
+        self.callback_ms = deque(maxlen=500)
+        self.callback_seconds = 0.0
+        self.stop_latency_ms = deque(maxlen=50)
+        self.process_cpu_percent = None
+
+    # --- Control ---
+
+    def play(self, audio):
+        """
+        Starts playback (stopping anything already playing) and returns immediately.
+
+        Args:
+            audio: WAV path, ``(samples, sample_rate)``, or an iterable of
+                ``(samples, sample_rate)`` / ``(text, samples, sample_rate)`` chunks
+        """
+        self.stop()
+        self._done.wait(1.0)
+        if isinstance(audio, str):
+            import soundfile as sf
+            data, samplerate = sf.read(audio, dtype="float32", always_2d=True)
+            audio = [(data.mean(axis=1), samplerate)]
+        elif isinstance(audio, tuple) and len(audio) == 2 and np.ndim(audio[0]) >= 1:
+            audio = [audio]
+        with self._lock:
+            if self._stream is not None:
+                self._stream.close()  # previous feeder may still be waiting on its source
+                self._stream = None
+            self._generation += 1
+            self._current, self._offset = None, 0
+            self._gain = self._target_gain = 1.0
+            self._stop_requested_at = None
+            self._trace = current_trace()  # marked with "playback_start" on the first audible block
+            self._source_done.clear()
+            self._done.clear()
+        self._feeder = threading.Thread(target=self._feed, args=(audio, self._generation), daemon=True)
+        self._feeder.start()
+
+    def stop(self):
+        """Silences output within one callback block; queued and pending chunks are dropped."""
+        if self._done.is_set():
+            return
+        if self._stop_requested_at is None:
+            self._stop_requested_at = time.perf_counter()
+        if self._stream is None:
+            self._finish()
+
+    def duck(self, gain=0.2):
+        """Fades the volume to ``gain`` (1.0 restores it) without stopping playback."""
+        self._target_gain = float(gain)
+
+    def wait(self, timeout=None):
+        """Blocks until playback finished or was stopped; returns False on timeout."""
+        return self._done.wait(timeout)
+
+    @property
+    def is_playing(self):
+        return not self._done.is_set()
+
+    def close(self):
+        self.stop()
+        self._done.wait(1.0)
+
+    # --- Feeder thread: chunk iterator -> queue, opens/closes the stream ---
+
+    def _feed(self, chunks, generation):
+        began_wall, began_cpu = time.perf_counter(), time.process_time()
+        try:
+            for chunk in chunks:
+                if self._stop_requested_at is not None or generation != self._generation:
+                    break
+                samples, sample_rate = chunk[-2], chunk[-1]
+                samples = to_float32(samples)
+                if samples.ndim > 1:
+                    samples = samples.mean(axis=1)
+                if self._stream is None:
+                    with self._lock:
+                        if self._stop_requested_at is not None or generation != self._generation:
+                            break
+                        self._open(sample_rate)
+                elif sample_rate != self.sample_rate:
+                    samples = resample(samples, sample_rate, self.sample_rate)
+                while self._stop_requested_at is None:
+                    try:
+                        self._chunks.put(np.ascontiguousarray(samples, dtype=np.float32), timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+        except Exception as e:
+            print(f"Playback source failed: {e}")
+        finally:
+            close = getattr(chunks, "close", None)
+            if close:
+                close()  # e.g. cancels sentences still queued in a SentencePipeline
+            if generation != self._generation:
+                return  # superseded by a newer play(), which owns the stream now
+            self._source_done.set()
+            if self._stream is None:
+                self._finish()
+            self._done.wait()
+            with self._lock:
+                if generation == self._generation and self._stream is not None:
+                    self._stream.close()
+                    self._stream = None
+            wall = time.perf_counter() - began_wall
+            if wall > 0:
+                # Whole-process CPU while this playback ran (includes any synthesis still going on)
+                self.process_cpu_percent = 100.0 * (time.process_time() - began_cpu) / wall
+
+    def _open(self, sample_rate):
+        import sounddevice as sd
+
+        self.sample_rate = sample_rate
+        self._stream = sd.OutputStream(
+            samplerate=sample_rate, channels=1, dtype="float32", blocksize=self.blocksize,
+            device=self.device, callback=self._callback, finished_callback=self._finish,
+        )
+        self.output_latency = self._stream.latency
+        self._stream.start()
+
+    def _finish(self):
+        while True:
+            try:
+                self._chunks.get_nowait()
+            except queue.Empty:
+                break
+        self._current = None
+        if self._done.is_set():
+            return
+        if self._stop_requested_at is not None:
+            self.stop_latency_ms.append((time.perf_counter() - self._stop_requested_at) * 1000
+                                        + self.output_latency * 1000)
+        self._done.set()
+
+    # --- PortAudio callback (audio thread: no allocation-heavy or blocking work) ---
+
+    def _callback(self, outdata, frames, time_info, status):
+        import sounddevice as sd
+
+        began = time.perf_counter()
+        out = outdata[:, 0]
+        if self._stop_requested_at is not None:
+            # Fade out over this block, then end the stream
+            out[:] = 0.0
+            filled = self._fill(out, min(frames, self._fade_frames()))
+            out[:filled] *= np.linspace(self._gain, 0.0, filled, dtype=np.float32)
+            self._record_callback(began)
+            raise sd.CallbackStop
+        filled = self._fill(out, frames)
+        if filled and self._trace is not None:
+            self._trace.mark("playback_start")
+            self._trace = None
+        self.played_samples += filled
+        if filled < frames:
+            out[filled:] = 0.0
+            if self._source_done.is_set() and self._chunks.empty() and self._current is None:
+                self._record_callback(began)
+                raise sd.CallbackStop
+            self.underruns += 1  # next chunk still being synthesized
+        if self._gain != self._target_gain or self._gain != 1.0:
+            step = frames / max(1, self._fade_frames())
+            end_gain = self._gain + max(-step, min(step, self._target_gain - self._gain))
+            out *= np.linspace(self._gain, end_gain, frames, dtype=np.float32)
+            self._gain = end_gain
+        self._record_callback(began)
+
+    def _record_callback(self, began):
+        elapsed = time.perf_counter() - began
+        self.callback_seconds += elapsed
+        self.callback_ms.append(elapsed * 1000)
+
+    def _fade_frames(self):
+        return int((self.sample_rate or 22050) * self.fade_ms / 1000)
+
+    def _fill(self, out, frames):
+        filled = 0
+        while filled < frames:
+            if self._current is None:
+                try:
+                    self._current, self._offset = self._chunks.get_nowait(), 0
+                except queue.Empty:
+                    break
+            take = min(frames - filled, len(self._current) - self._offset)
+            out[filled:filled + take] = self._current[self._offset:self._offset + take]
+            filled += take
+            self._offset += take
+            if self._offset >= len(self._current):
+                self._current = None
+        return filled
+
+    def stats(self):
+        callback_ms = sorted(self.callback_ms)
+        stop_ms = sorted(self.stop_latency_ms)
+        played_seconds = self.played_samples / self.sample_rate if self.sample_rate else 0.0
+        return {
+            "playing": self.is_playing,
+            "played_seconds": played_seconds,
+            "underruns": self.underruns,
+            "output_latency_ms": self.output_latency * 1000,
+            "callback_ms_p50": callback_ms[len(callback_ms) // 2] if callback_ms else None,
+            "callback_ms_max": callback_ms[-1] if callback_ms else None,
+            # Share of one core spent in the audio callback per second of audio played
+            "callback_cpu_percent": 100.0 * self.callback_seconds / played_seconds if played_seconds else None,
+            "process_cpu_percent": self.process_cpu_percent,
+            "stop_latency_ms_last": self.stop_latency_ms[-1] if stop_ms else None,
+            "stop_latency_ms_max": stop_ms[-1] if stop_ms else None,
+        }
+
+
+class BargeInMonitor:
+    """
+    Listens on the microphone while the assistant speaks and interrupts playback
+    as soon as the user starts talking.
+
+    Runs a ``StreamingEndpointer`` on the input stream: on speech start the player
+    is stopped (or ducked), and the finished utterance is kept in ``utterance`` so
+    it can go straight to ASR without a second recording. Speaker echo can trigger
+    false barge-ins, so the threshold is stricter than for normal endpointing;
+    headphones or an echo-cancelling mic help.
+
+    Args:
+        player (AudioPlayer): Playback to interrupt
+        action (str): "stop" or "duck"
+        threshold (float): Silero speech probability threshold
+        hangover_ms (int): Silence that ends the interrupting utterance
+        on_barge_in (callable, optional): Called with the "start" event
+        on_utterance (callable, optional): Called with the "end" event (``audio`` at 16 kHz)
+        device: sounddevice input device
+    """
+
+    def __init__(self, player, action="stop", threshold=0.7, hangover_ms=300, on_barge_in=None,
+                 on_utterance=None, device=None):
+        from vocomate_app.utils.endpointing import StreamingEndpointer
+
+        self.player = player
+        self.action = action
+        self.on_barge_in = on_barge_in
+        self.on_utterance = on_utterance
+        self.device = device
+        self.utterance = None
+        self.triggered = False
+        self.barge_ins = 0
+        self.detection_ms = deque(maxlen=50)
+        self._endpointer = StreamingEndpointer(
+            threshold=threshold, hangover_ms=hangover_ms,
+            on_speech_start=self._speech_started, on_utterance=self._utterance_ended,
+        )
+        self._frames = queue.Queue()
+        self._block_arrived = 0.0
+        self._stream = None
+        self._thread = None
+        self._running = False
+
+    def _speech_started(self, event):
+        if not self.player.is_playing:
+            return
+        self.triggered = True
+        self.barge_ins += 1
+        self.detection_ms.append((time.perf_counter() - self._block_arrived) * 1000)
+        if self.action == "duck":
+            self.player.duck()
+        else:
+            self.player.stop()
+        if self.on_barge_in:
+            self.on_barge_in(event)
+
+    def _utterance_ended(self, event):
+        self.utterance = event
+        if self.on_utterance:
+            self.on_utterance(event)
+
+    def start(self):
+        import sounddevice as sd
+        from vocomate_app.utils.endpointing import FRAME_SAMPLES, SAMPLE_RATE
+
+        self.stop()
+        self.utterance = None
+        self.triggered = False
+        self._endpointer.reset()
+        self._running = True
+
+        def callback(indata, frame_count, time_info, status):
+            self._frames.put((time.perf_counter(), indata[:, 0].copy()))
+
+        self._stream = sd.InputStream(samplerate=SAMPLE_RATE, channels=1, dtype="float32",
+                                      blocksize=FRAME_SAMPLES, device=self.device, callback=callback)
+        self._stream.start()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        # VAD runs here, not in the PortAudio callback
+        while self._running:
+            try:
+                self._block_arrived, block = self._frames.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self._endpointer.feed(block)
+
+    def stop(self):
+        self._running = False
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        detection = sorted(self.detection_ms)
+        return {
+            "barge_ins": self.barge_ins,
+            "detection_ms_max": detection[-1] if detection else None,
+            "player_stop_latency_ms_last": self.player.stats()["stop_latency_ms_last"],
+        }
+
+
+if __name__ == "__main__":
+    # Plays a test tone, stops it after a second and prints the playback metrics
+    sample_rate = 22050
+    t = np.arange(int(sample_rate * 3)) / sample_rate
+    tone = (0.2 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+    player = AudioPlayer()
+    player.play((tone, sample_rate))
+    time.sleep(1.0)
+    player.stop()
+    player.wait()
+    time.sleep(0.1)
+    for key, value in player.stats().items():
+        print(f"{key}: {value}")
@@ -0,0 +1,249 @@
+# utils/profiling.py
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import warnings
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+DEFAULT_PROFILE_DIR = os.path.join(repo_root, 'logs', 'profiles')
+
+_current_capture = contextvars.ContextVar("vocomate_profile", default=None)
+
+
+class StackSampler:
+    """
+    Wall-clock sampling of every thread's Python stack (``sys._current_frames``).
+
+    Produces folded stacks (``thread;outer;...;inner count``) that flamegraph.pl,
+    speedscope or inferno render directly. Unlike cProfile it sees the worker
+    threads too (synthesis pool, playback feeder, Ollama stream).
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = Counter()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while self._running:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.samples[";".join(reversed(stack))] += 1
+            time.sleep(self.interval)
+
+    def collapsed(self):
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+
+class ProfileCapture:
+    """
+    Profiles of one turn: cProfile for the threads that opt in via ``profile_thread``,
+    a stack sampler over all threads and, when available, the torch profiler for
+    operator-level CPU time of the model calls.
+
+    ``end()`` writes everything to ``<output_dir>/<label>/``:
+    ``cprofile.prof`` (pstats), ``cprofile.txt``, ``stacks.collapsed``,
+    ``torch_ops.txt`` and ``torch_trace.json`` (chrome://tracing / Perfetto).
+
+    The torch profiler must be stopped on the thread that created the capture: call
+    ``stop_torch()`` there when ``end()`` runs elsewhere (e.g. a later Streamlit rerun).
+    """
+
+    def __init__(self, label, output_dir=DEFAULT_PROFILE_DIR, torch_profiler=True, sample_interval=0.005):
+        self.label = label
+        self.path = os.path.join(output_dir, label)
+        self._profiles = []
+        self._lock = threading.Lock()
+        self._sampler = StackSampler(sample_interval)
+        self._torch = None
+        self._torch_stopped = False
+        self._owner = threading.get_ident()
+        self._ended = False
+        self.started_at = time.perf_counter()
+        self.summary = None
+        if torch_profiler:
+            try:
+                from torch.profiler import ProfilerActivity, profile
+            except ImportError:
+                pass
+            else:
+                self._torch = profile(activities=[ProfilerActivity.CPU], record_shapes=True)
+                self._torch.__enter__()
+        self._sampler.start()
+
+    @contextmanager
+    def thread_profile(self):
+        """
+        cProfile the calling thread for the duration of the block.
+
+        Up to Python 3.11 each thread gets its own profile. From 3.12 cProfile sits in
+        the process-wide ``sys.monitoring`` slot, so only one profile can be enabled at a
+        time and it records every thread: nested or concurrent blocks then yield None and
+        run unprofiled here (their calls land in the active profile) instead of failing.
+        """
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # "Another profiling tool is already active"
+            profile = None
+        if profile is None:
+            yield None
+            return
+        with self._lock:
+            self._profiles.append(profile)
+        try:
+            yield profile
+        finally:
+            profile.disable()
+
+    def stop_torch(self):
+        """
+        Stops the torch profiler (idempotent). Exiting it on another thread than the one
+        that entered it crashes the process, so elsewhere this warns and returns False.
+        """
+        if self._torch is None or self._torch_stopped:
+            return self._torch_stopped
+        if threading.get_ident() != self._owner:
+            warnings.warn(f"profile {self.label}: torch profiler not stopped (ended on another thread "
+                          "than it started on); skipping the torch section", RuntimeWarning, stacklevel=2)
+            return False
+        self._torch.__exit__(None, None, None)
+        self._torch_stopped = True
+        return True
+
+    def end(self):
+        """Stops all profilers, writes the files and returns a small summary (idempotent)."""
+        if self._ended:
+            return self.summary
+        self._ended = True
+        wall = time.perf_counter() - self.started_at
+        self._sampler.stop()
+        os.makedirs(self.path, exist_ok=True)
+
+        with open(os.path.join(self.path, "stacks.collapsed"), "w") as f:
+            f.write(self._sampler.collapsed())
+        with self._lock:
+            profiles = [p for p in self._profiles if p.getstats()]
+        if profiles:
+            stats = pstats.Stats(*profiles)
+            stats.dump_stats(os.path.join(self.path, "cprofile.prof"))
+            report = io.StringIO()
+            pstats.Stats(*profiles, stream=report).sort_stats("cumulative").print_stats(40)
+            with open(os.path.join(self.path, "cprofile.txt"), "w") as f:
+                f.write(report.getvalue())
+
+        top_ops = []
+        if self._torch is not None and self.stop_torch():
+            averages = self._torch.key_averages()
+            with open(os.path.join(self.path, "torch_ops.txt"), "w") as f:
+                f.write(averages.table(sort_by="self_cpu_time_total", row_limit=40))
+            self._torch.export_chrome_trace(os.path.join(self.path, "torch_trace.json"))
+            ranked = sorted(averages, key=lambda e: e.self_cpu_time_total, reverse=True)[:10]
+            top_ops = [{"op": e.key, "self_cpu_ms": e.self_cpu_time_total / 1000, "calls": e.count} for e in ranked]
+
+        self.summary = {
+            "label": self.label,
+            "path": self.path,
+            "wall_seconds": wall,
+            "stack_samples": sum(self._sampler.samples.values()),
+            "profiled_threads": len(profiles),
+            "top_torch_ops": top_ops,
+        }
+        with open(os.path.join(self.path, "summary.json"), "w") as f:
+            json.dump(self.summary, f, indent=2)
+        return self.summary
+
+
+class Profiler:
+    """
+    Arms profiling for the next N turns.
+
+    Disabled (the default) it costs one integer check per turn: ``begin`` returns
+    None and ``profile_thread``/``use_capture`` fall through to no-ops.
+
+    Args:
+        output_dir (str): Where per-turn profile directories are written
+        torch_profiler (bool): Also record torch operator CPU time
+    """
+
+    def __init__(self, output_dir=DEFAULT_PROFILE_DIR, torch_profiler=True):
+        self.output_dir = output_dir
+        self.torch_profiler = torch_profiler
+        self.remaining = 0
+        self.captures = []
+        self._lock = threading.Lock()
+
+    def arm(self, turns=1):
+        with self._lock:
+            self.remaining = max(0, int(turns))
+
+    @property
+    def armed(self):
+        return self.remaining > 0
+
+    def begin(self, label="turn"):
+        """Starts a capture if armed (consuming one turn), otherwise returns None."""
+        if self.remaining <= 0:
+            return None
+        with self._lock:
+            if self.remaining <= 0:
+                return None
+            self.remaining -= 1
+        name = f"{time.strftime('%Y%m%d_%H%M%S')}-{label}-{len(self.captures):03d}"
+        capture = ProfileCapture(name, self.output_dir, self.torch_profiler)
+        self.captures.append(capture)
+        return capture
+
+
+def current_capture():
+    return _current_capture.get()
+
+
+@contextmanager
+def use_capture(capture):
+    """Makes ``capture`` the ambient capture for ``profile_thread`` (None is allowed)."""
+    token = _current_capture.set(capture)
+    try:
+        yield capture
+    finally:
+        _current_capture.reset(token)
+
+
+def profile_thread():
+    """cProfile this block on this thread if a capture is active, else a no-op."""
+    capture = _current_capture.get()
+    return capture.thread_profile() if capture is not None else nullcontext()
+
+
+profiler = Profiler(os.environ.get("VOCOMATE_PROFILE_DIR", DEFAULT_PROFILE_DIR))
+# VOCOMATE_PROFILE_TURNS=N profiles the first N turns of the process
+profiler.arm(int(os.environ.get("VOCOMATE_PROFILE_TURNS", "0") or 0))
@@ -0,0 +1,293 @@
+# utils/response_cache.py
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from vocomate_app.utils.model_registry import REPO_ROOT
+
+DEFAULT_CACHE_DIR = os.path.join(REPO_ROOT, 'vocomate_app', 'assets', 'response_cache')
+DEFAULT_TTL = 7 * 24 * 3600
+
+
+def _digest(*parts):
+    sha = hashlib.sha256()
+    for part in parts:
+        sha.update(str(part).encode("utf-8"))
+        sha.update(b"\0")
+    return sha.hexdigest()[:32]
+
+
+def normalize_prompt(text):
+    """ "  What can you DO?? " -> "what can you do" (case, spacing and trailing punctuation don't matter)."""
+    return re.sub(r"\s+", " ", text).strip().lower().rstrip(" .!?")
+
+
+class TextCodec:
+    extension = "json"
+
+    @staticmethod
+    def size(value):
+        return len(value.encode("utf-8"))
+
+    @staticmethod
+    def encode(value, created):
+        return json.dumps({"created": created, "value": value}).encode("utf-8")
+
+    @staticmethod
+    def decode(data):
+        entry = json.loads(data)
+        return entry["value"], entry["created"]
+
+
+class AudioCodec:
+    """``(samples, sample_rate)`` stored as .npz (no pickling)."""
+
+    extension = "npz"
+
+    @staticmethod
+    def size(value):
+        return value[0].nbytes
+
+    @staticmethod
+    def encode(value, created):
+        buffer = io.BytesIO()
+        np.savez(buffer, audio=np.asarray(value[0], dtype=np.float32), sample_rate=value[1], created=created)
+        return buffer.getvalue()
+
+    @staticmethod
+    def decode(data):
+        with np.load(io.BytesIO(data)) as entry:
+            return (entry["audio"], int(entry["sample_rate"])), float(entry["created"])
+
+
+class TieredCache:
+    """
+    Size-bounded LRU cache in memory, backed by a size-bounded LRU directory on disk.
+
+    Entries older than ``ttl`` are dropped on access. The disk level survives
+    restarts and is shared by processes using the same directory; its recency
+    is the file mtime, refreshed on every hit.
+
+    Args:
+        name (str): Cache name (sub-directory and metric label)
+        codec: ``TextCodec`` or ``AudioCodec``
+        memory_bytes (int), disk_bytes (int): Budgets; 0 disables that level
+        ttl (float): Seconds an entry stays valid
+        cache_dir (str): Parent directory of the disk level
+    """
+
+    def __init__(self, name, codec, memory_bytes=64 << 20, disk_bytes=1 << 30, ttl=DEFAULT_TTL,
+                 cache_dir=DEFAULT_CACHE_DIR):
+        self.name = name
+        self.codec = codec
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.ttl = ttl
+        self.directory = os.path.join(cache_dir, name)
+        self._memory = OrderedDict()  # key -> (created, value, size)
+        self._memory_size = 0
+        self._disk_size = None  # scanned on first disk write
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "expired": 0, "memory_evictions": 0,
+                      "disk_evictions": 0, "writes": 0}
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.{self.codec.extension}")
+
+    def _remember(self, key, value, created, size):
+        # Caller holds the lock
+        if key in self._memory:
+            self._memory_size -= self._memory.pop(key)[2]
+        if size > self.memory_bytes:
+            return
+        self._memory[key] = (created, value, size)
+        self._memory_size += size
+        while self._memory_size > self.memory_bytes:
+            _, (_, _, evicted) = self._memory.popitem(last=False)
+            self._memory_size -= evicted
+            self.stats["memory_evictions"] += 1
+
+    def get(self, key):
+        """Returns the cached value, or None."""
+        now = time.time()
+        expired = False
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[0] <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return entry[1]
+                self._memory_size -= self._memory.pop(key)[2]
+                expired = True
+        if self.disk_bytes:
+            path = self._path(key)
+            try:
+                with open(path, "rb") as f:
+                    value, created = self.codec.decode(f.read())
+            except (OSError, ValueError, KeyError):
+                value = None
+            if value is not None:
+                if now - created <= self.ttl:
+                    os.utime(path)
+                    with self._lock:
+                        self._remember(key, value, created, self.codec.size(value))
+                        self.stats["disk_hits"] += 1
+                    return value
+                self._remove(path)
+                expired = True
+        with self._lock:
+            self.stats["misses"] += 1
+            self.stats["expired"] += expired
+        return None
+
+    def put(self, key, value):
+        created = time.time()
+        with self._lock:
+            self._remember(key, value, created, self.codec.size(value))
+            self.stats["writes"] += 1
+        if not self.disk_bytes:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        data = self.codec.encode(value, created)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            if self._disk_size is None:
+                self._disk_size = sum(size for _, _, size in self._scan())
+            else:
+                self._disk_size += len(data)
+            over = self._disk_size > self.disk_bytes
+        if over:
+            self._evict_disk()
+
+    def _scan(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(f".{self.codec.extension}"):
+                st = entry.stat()
+                entries.append((st.st_mtime, entry.path, st.st_size))
+        return entries
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict_disk(self):
+        # Least recently used files first, down to 90% of the budget
+        entries = sorted(self._scan())
+        total = sum(size for _, _, size in entries)
+        for _, path, size in entries:
+            if total <= 0.9 * self.disk_bytes:
+                break
+            self._remove(path)
+            total -= size
+            with self._lock:
+                self.stats["disk_evictions"] += 1
+        with self._lock:
+            self._disk_size = total
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+            self._disk_size = 0
+        if os.path.isdir(self.directory):
+            for _, path, _ in self._scan():
+                self._remove(path)
+
+    def info(self):
+        with self._lock:
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            lookups = hits + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": hits / lookups if lookups else None,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_size,
+                "disk_bytes": self._disk_size,
+            }
+
+
+class ResponseCache:
+    """
+    Two-level cache for repeated turns (greetings, "what can you do?", canned help).
+
+    ``replies``: normalized prompt + hash of the conversation before it + model ->
+    LLM reply text. ``audio``: (text, language, speaker, speed, reference voice
+    hash, conversion settings) -> cloned samples, so a cached sentence plays
+    without loading MeloTTS or the converter.
+
+    Args:
+        replies (bool), audio (bool): Enable each level
+        **cache_kwargs: ``memory_bytes``, ``disk_bytes``, ``ttl``, ``cache_dir`` for both levels
+    """
+
+    def __init__(self, replies=True, audio=True, **cache_kwargs):
+        self.replies = TieredCache("replies", TextCodec, **cache_kwargs) if replies else None
+        self.audio = TieredCache("audio", AudioCodec, **cache_kwargs) if audio else None
+
+    @staticmethod
+    def reply_key(prompt, history, model):
+        """``history``: the messages sent before ``prompt`` (system prompt, summary, earlier turns)."""
+        context = _digest(*(f"{m['role']}:{m['content']}" for m in history or []))
+        return _digest("reply", model, context, normalize_prompt(prompt))
+
+    @staticmethod
+    def audio_key(text, reference_digest, language, speaker, speed, **settings):
+        return _digest("audio", text.strip(), reference_digest, language, speaker, f"{speed:g}",
+                       json.dumps(settings, sort_keys=True, default=str))
+
+    def get_reply(self, prompt, history, model):
+        return self.replies.get(self.reply_key(prompt, history, model)) if self.replies else None
+
+    def put_reply(self, prompt, history, model, reply):
+        if self.replies and reply.strip():
+            self.replies.put(self.reply_key(prompt, history, model), reply)
+
+    def stats(self):
+        return {name: level.info() for name, level in (("replies", self.replies), ("audio", self.audio)) if level}
+
+    def export_prometheus(self):
+        lines = ["# HELP vocomate_cache_lookups_total Response cache lookups by level and result.",
+                 "# TYPE vocomate_cache_lookups_total counter"]
+        stats = self.stats()
+        for name, info in stats.items():
+            for result, key in (("memory_hit", "memory_hits"), ("disk_hit", "disk_hits"), ("miss", "misses")):
+                lines.append(f'vocomate_cache_lookups_total{{cache="{name}",result="{result}"}} {info[key]}')
+        lines += ["# HELP vocomate_cache_bytes Bytes held by the response cache.", "# TYPE vocomate_cache_bytes gauge"]
+        for name, info in stats.items():
+            lines.append(f'vocomate_cache_bytes{{cache="{name}",level="memory"}} {info["memory_bytes"]}')
+            lines.append(f'vocomate_cache_bytes{{cache="{name}",level="disk"}} {info["disk_bytes"] or 0}')
+        return "\n".join(lines) + "\n"
+
+
+def cache_from_env():
+    """
+    VOCOMATE_CACHE=on|off|audio|replies, VOCOMATE_CACHE_DIR, VOCOMATE_CACHE_TTL (seconds),
+    VOCOMATE_CACHE_MEMORY_MB and VOCOMATE_CACHE_DISK_MB (per level).
+    """
+    mode = os.environ.get("VOCOMATE_CACHE", "on").lower()
+    return ResponseCache(
+        replies=mode in ("on", "replies"),
+        audio=mode in ("on", "audio"),
+        memory_bytes=int(float(os.environ.get("VOCOMATE_CACHE_MEMORY_MB", 64)) * (1 << 20)),
+        disk_bytes=int(float(os.environ.get("VOCOMATE_CACHE_DISK_MB", 1024)) * (1 << 20)),
+        ttl=float(os.environ.get("VOCOMATE_CACHE_TTL", DEFAULT_TTL)),
+        cache_dir=os.environ.get("VOCOMATE_CACHE_DIR", DEFAULT_CACHE_DIR),
+    )
+
+
+response_cache = cache_from_env()
@@ -0,0 +1,67 @@
+# utils/sentences.py
+import re
+
+# Sentence end: ., !, ? or … (optionally followed by closing quotes/brackets) and then whitespace
+_SENTENCE_END = re.compile(r'[.!?…]+["\')\]]*\s+')
+# Clause end: , ; : or a dash followed by whitespace
+_CLAUSE_END = re.compile(r'(?:[,;:]|\s[-–—])\s+')
+# Tokens that end in a period but do not end a sentence
+_ABBREVIATIONS = {"mr.", "mrs.", "ms.", "dr.", "prof.", "st.", "vs.", "etc.", "e.g.", "i.e.", "approx."}
+
+
+def _is_abbreviation(text, end):
+    words = text[:end].split()
+    return bool(words) and words[-1].lower() in _ABBREVIATIONS
+
+
+class SentenceSplitter:
+    """
+    Turns a stream of text fragments (LLM tokens) into complete sentences.
+
+    Call ``feed`` with every fragment; it returns the sentences completed by that
+    fragment. ``flush`` returns whatever is left once the stream ends.
+
+    Args:
+        clauses (bool): Also split on clause boundaries (, ; : -) so speech can start sooner
+        min_chars (int): Don't emit pieces shorter than this; they are merged with the next one
+    """
+
+    def __init__(self, clauses=False, min_chars=20):
+        self.clauses = clauses
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, fragment):
+        self._buffer += fragment
+        pieces = []
+        while True:
+            cut = self._find_cut()
+            if cut is None:
+                break
+            piece, self._buffer = self._buffer[:cut].strip(), self._buffer[cut:]
+            if piece:
+                pieces.append(piece)
+        return pieces
+
+    def flush(self):
+        piece, self._buffer = self._buffer.strip(), ""
+        return [piece] if piece else []
+
+    def _find_cut(self):
+        patterns = [_SENTENCE_END, _CLAUSE_END] if self.clauses else [_SENTENCE_END]
+        cuts = []
+        for pattern in patterns:
+            for match in pattern.finditer(self._buffer):
+                if match.end() < self.min_chars:
+                    continue
+                if pattern is _SENTENCE_END and _is_abbreviation(self._buffer, match.start() + 1):
+                    continue
+                cuts.append(match.end())
+                break
+        return min(cuts) if cuts else None
+
+
+def split_sentences(text, clauses=False, min_chars=20):
+    """Splits a complete text into sentences (or clauses) using the same rules as the streaming splitter."""
+    splitter = SentenceSplitter(clauses=clauses, min_chars=min_chars)
+    return splitter.feed(text) + splitter.flush()
@@ -0,0 +1,274 @@
+# utils/tracing.py
+import contextvars
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Prometheus-style upper bounds (seconds) shared by every latency histogram
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current_trace = contextvars.ContextVar("vocomate_trace", default=None)
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram plus a bounded window of recent values for quantiles.
+
+    Memory is constant: bucket counts never grow and only the last ``window`` samples are kept.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window=512):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+
+    def quantile(self, q):
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "max": max(self.recent) if self.recent else None,
+        }
+
+
+class Trace:
+    """
+    Spans and point events of one conversational turn.
+
+    Spans (decode, vad, transcribe, prefill, synthesis, conversion, ...) are
+    durations and may occur several times per turn (one synthesis per sentence);
+    events (first_token, first_audio, playback_start) are offsets from the turn start.
+    Safe to use from the worker threads that serve the turn.
+    """
+
+    def __init__(self, tracer, session_id=None, attributes=None):
+        self.tracer = tracer
+        self.session_id = session_id
+        self.attributes = dict(attributes or {})
+        self.started_at = time.perf_counter()
+        self.wall_start = time.time()
+        self.spans = []
+        self.events = {}
+        self.wasted = {}
+        self.finished = False
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name):
+        began = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.record(name, time.perf_counter() - began, began)
+
+    def record(self, name, seconds, began=None):
+        """Adds a span measured elsewhere (e.g. time to first token reported by Ollama)."""
+        offset = (began if began is not None else time.perf_counter() - seconds) - self.started_at
+        with self._lock:
+            if not self.finished:
+                self.spans.append((name, offset, seconds))
+
+    def mark(self, name):
+        """Records the first occurrence of an event, as seconds since the turn started."""
+        with self._lock:
+            if not self.finished and name not in self.events:
+                self.events[name] = time.perf_counter() - self.started_at
+
+    def waste(self, stage, seconds):
+        """
+        Records compute spent on work whose result was thrown away (cancelled turn).
+
+        Abandoned stage calls often end after the turn was closed, so this is
+        accepted after ``finish`` too and goes straight to the tracer.
+        """
+        with self._lock:
+            self.wasted[stage] = self.wasted.get(stage, 0.0) + seconds
+        self.tracer._observe_waste(stage, seconds)
+
+    def finish(self, **attributes):
+        """Closes the turn and folds its spans/events into the tracer's histograms (idempotent)."""
+        with self._lock:
+            if self.finished:
+                return
+            self.finished = True
+            self.attributes.update(attributes)
+            self.total = time.perf_counter() - self.started_at
+        self.tracer._collect(self)
+
+    def as_dict(self):
+        totals = {}
+        for name, _, seconds in self.spans:
+            totals[name] = totals.get(name, 0.0) + seconds
+        return {
+            "session_id": self.session_id,
+            "started": self.wall_start,
+            "total": getattr(self, "total", None),
+            "stages": totals,
+            "events": dict(self.events),
+            "wasted": dict(self.wasted),
+            "spans": [{"name": n, "offset": o, "seconds": s} for n, o, s in self.spans],
+            "attributes": self.attributes,
+        }
+
+
+class Tracer:
+    """
+    Collects per-turn traces into bounded histograms and exports them.
+
+    Every span observation goes into ``vocomate_stage_seconds{stage=...}``, every
+    event into ``vocomate_turn_event_seconds{event=...}`` and the whole turn into
+    ``vocomate_turn_seconds``. Work thrown away by cancelled turns goes into
+    ``vocomate_wasted_seconds{stage=...}`` and turn outcomes into ``vocomate_turns_total``.
+    Only the last ``keep_traces`` traces are retained.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, keep_traces=50):
+        self.buckets = buckets
+        self.stages = {}
+        self.events = {}
+        self.turns = Histogram(buckets)
+        self.wasted = {}
+        self.outcomes = {}
+        self.recent = deque(maxlen=keep_traces)
+        self._lock = threading.Lock()
+
+    def start_turn(self, session_id=None, **attributes):
+        return Trace(self, session_id, attributes)
+
+    def _histogram(self, table, name):
+        if name not in table:
+            table[name] = Histogram(self.buckets)
+        return table[name]
+
+    def _collect(self, trace):
+        with self._lock:
+            for name, _, seconds in trace.spans:
+                self._histogram(self.stages, name).observe(seconds)
+            for name, offset in trace.events.items():
+                self._histogram(self.events, name).observe(offset)
+            self.turns.observe(trace.total)
+            outcome = trace.attributes.get("outcome", "completed")
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+            self.recent.append(trace.as_dict())
+
+    def _observe_waste(self, stage, seconds):
+        with self._lock:
+            self._histogram(self.wasted, stage).observe(seconds)
+
+    def summary(self):
+        """p50/p95/mean per stage and event, for dashboards and the debug panel."""
+        with self._lock:
+            return {
+                "turns": self.turns.summary(),
+                "stages": {name: h.summary() for name, h in self.stages.items()},
+                "events": {name: h.summary() for name, h in self.events.items()},
+                "wasted": {name: h.summary() for name, h in self.wasted.items()},
+                "outcomes": dict(self.outcomes),
+            }
+
+    def export_json(self, include_traces=False):
+        data = self.summary()
+        if include_traces:
+            with self._lock:
+                data["traces"] = list(self.recent)
+        return json.dumps(data, indent=2)
+
+    def export_prometheus(self):
+        """Prometheus text exposition format (histograms with cumulative buckets)."""
+        lines = []
+
+        def histogram(metric, help_text, label, table):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for name, h in sorted(table.items()):
+                labels = f'{label}="{name}",' if label else ""
+                cumulative = 0
+                for bound, count in zip(h.buckets + (float("inf"),), h.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(f'{metric}_bucket{{{labels}le="{le}"}} {cumulative}')
+                selector = f"{{{labels[:-1]}}}" if labels else ""
+                lines.append(f"{metric}_sum{selector} {h.sum:.6f}")
+                lines.append(f"{metric}_count{selector} {h.count}")
+
+        with self._lock:
+            histogram("vocomate_stage_seconds", "Duration of each pipeline stage.", "stage", self.stages)
+            histogram("vocomate_turn_event_seconds", "Time from turn start to each event.", "event", self.events)
+            histogram("vocomate_turn_seconds", "Duration of whole turns.", None, {"": self.turns})
+            histogram("vocomate_wasted_seconds", "Stage compute discarded by cancelled turns.", "stage", self.wasted)
+            lines.append("# HELP vocomate_turns_total Finished turns by outcome.")
+            lines.append("# TYPE vocomate_turns_total counter")
+            lines.extend(f'vocomate_turns_total{{outcome="{name}"}} {count}' for name, count in sorted(self.outcomes.items()))
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+            self.events.clear()
+            self.turns = Histogram(self.buckets)
+            self.wasted.clear()
+            self.outcomes.clear()
+            self.recent.clear()
+
+
+# --- Ambient trace for library code (no-ops when no turn is being traced) ---
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def use_trace(trace):
+    """Makes ``trace`` the current trace in this thread/context (worker threads must set it explicitly)."""
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(name):
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    with trace.span(name):
+        yield trace
+
+
+def mark(name):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.mark(name)
+
+
+def record(name, seconds):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.record(name, seconds)
+
+
+tracer = Tracer()
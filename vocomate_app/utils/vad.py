@@ -1,26 +1,179 @@
-import torch
+import io
+import os
+import subprocess
+import sys
 import numpy as np
 import soundfile as sf
 
-# Load Silero VAD model and utils once at import time
-model, utils = torch.hub.load(
-    repo_or_dir='snakers4/silero-vad',
-    model='silero_vad',
-    force_reload=False  # Set to True to force a fresh download
-)
-(get_speech_timestamps, save_audio, read_audio, VADIterator, collect_chunks) = utils
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if repo_root not in sys.path:
+    sys.path.append(repo_root)
+from vocomate_app.utils.model_registry import get_silero_vad
+from vocomate_app.utils.cpu_scheduler import cpu_stage
+from vocomate_app.utils.tracing import span
+
+# Silero VAD (and torch) are loaded on first use through the model registry, not at import time.
+# Set VOCOMATE_SILERO_JIT to a local silero_vad.jit file to run fully offline.
+_LAZY_ATTRIBUTES = ("model", "utils", "get_speech_timestamps", "save_audio", "read_audio", "VADIterator", "collect_chunks")
+
+def __getattr__(name):
+    # Keeps `from vad import model, VADIterator, ...` working without loading Silero on import
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(get_silero_vad(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Per-process counters for the ASR input path (decodes, VAD passes, bytes written to disk)
+io_stats = {"decodes": 0, "vad_passes": 0, "bytes_written": 0}
 
 def load_audio(audio_path, target_sr=16000):
     # Use Silero's read_audio for best compatibility
-    audio = read_audio(audio_path, sampling_rate=target_sr)
+    audio = get_silero_vad().read_audio(audio_path, sampling_rate=target_sr)
+    io_stats["decodes"] += 1
     return audio, target_sr
 
-def get_speech_timestamps_vad(audio_path, threshold=0.5, min_speech_duration_ms=250, min_silence_duration_ms=100):
-    audio, sr = load_audio(audio_path)
-    speech_timestamps = get_speech_timestamps(
+def _ffmpeg_decode(data, target_sr):
+    # Formats soundfile can't read (webm/opus from browsers, mp3, ...) go through ffmpeg via pipes
+    proc = subprocess.run(
+        ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", "pipe:0",
+         "-f", "f32le", "-ac", "1", "-ar", str(target_sr), "pipe:1"],
+        input=data, capture_output=True, check=True
+    )
+    return np.frombuffer(proc.stdout, dtype=np.float32)
+
+def stream_decode(audio_path, target_sr=16000, block_seconds=30.0):
+    """
+    Decodes any ffmpeg-readable file as a stream of mono float32 blocks.
+
+    Only one block is held at a time, so memory doesn't grow with the file length
+    (hour-long recordings).
+
+    Args:
+        audio_path (str): Audio or video file
+        target_sr (int): Output sample rate
+        block_seconds (float): Samples per yielded block (the last one may be shorter)
+
+    Yields:
+        np.ndarray: Consecutive blocks of samples in [-1, 1]
+    """
+    proc = subprocess.Popen(
+        ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", audio_path,
+         "-f", "f32le", "-ac", "1", "-ar", str(target_sr), "pipe:1"],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    block_bytes = int(block_seconds * target_sr) * 4
+    try:
+        while True:
+            data = proc.stdout.read(block_bytes)
+            if not data:
+                break
+            io_stats["decodes"] += 1
+            yield np.frombuffer(data[:len(data) - len(data) % 4], dtype=np.float32)
+    finally:
+        proc.stdout.close()
+        if proc.poll() is None:
+            proc.kill()  # consumer stopped early
+        returncode = proc.wait()
+        error = proc.stderr.read().decode(errors="replace").strip()
+        proc.stderr.close()
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode {audio_path}: {error}")
+
+def decode_audio_bytes(data, target_sr=16000):
+    """
+    Decodes an encoded recording (e.g. the recorder's WAV bytes) into a mono float32 array.
+
+    Args:
+        data (bytes): Encoded audio
+        target_sr (int): Output sample rate
+
+    Returns:
+        tuple[np.ndarray, int]: Samples in [-1, 1] and the sample rate
+    """
+    try:
+        audio, sr = sf.read(io.BytesIO(data), dtype="float32", always_2d=True)
+        audio = audio.mean(axis=1)
+        if sr != target_sr:
+            import torch
+            import torchaudio
+            audio = torchaudio.functional.resample(torch.from_numpy(audio), sr, target_sr).numpy()
+    except RuntimeError:  # soundfile.LibsndfileError: format not supported by libsndfile
+        audio = _ffmpeg_decode(data, target_sr)
+    io_stats["decodes"] += 1
+    return np.ascontiguousarray(audio, dtype=np.float32), target_sr
+
+def analyze_speech(audio, sr=16000, threshold=0.5, min_speech_duration_ms=250, min_silence_duration_ms=100):
+    """
+    Runs Silero VAD once and returns both the speech segments and the trimmed audio.
+
+    Args:
+        audio (np.ndarray | torch.Tensor): Mono samples at ``sr``
+        sr (int): Sample rate (8000 or 16000)
+
+    Returns:
+        tuple[list[dict], np.ndarray | None]: Speech timestamps (sample offsets) and the
+        concatenated speech samples, or None when no speech was found
+    """
+    import torch
+
+    silero = get_silero_vad()
+    tensor = audio if isinstance(audio, torch.Tensor) else torch.from_numpy(np.asarray(audio, dtype=np.float32))
+    with cpu_stage("vad"):
+        speech_timestamps = silero.get_speech_timestamps(
+            tensor,
+            silero.model,
+            sampling_rate=sr,
+            threshold=threshold,
+            min_speech_duration_ms=min_speech_duration_ms,
+            min_silence_duration_ms=min_silence_duration_ms
+        )
+    io_stats["vad_passes"] += 1
+    if not speech_timestamps:
+        return speech_timestamps, None
+    samples = tensor.numpy()
+    trimmed = np.concatenate([samples[t['start']:t['end']] for t in speech_timestamps])
+    return speech_timestamps, trimmed
+
+class SpeechInput:
+    """Result of ``process_recording``: speech decision plus the samples to hand to Whisper."""
+
+    def __init__(self, has_speech, audio, sample_rate, timestamps):
+        self.has_speech = has_speech
+        self.audio = audio
+        self.sample_rate = sample_rate
+        self.timestamps = timestamps
+
+def process_recording(data, threshold=0.5, trim=True, target_sr=16000):
+    """
+    Recorder bytes -> VAD -> Whisper-ready samples, fully in memory (one decode, one VAD pass).
+
+    Args:
+        data (bytes): Encoded recording
+        threshold (float): Silero speech probability threshold
+        trim (bool): Return only the speech segments instead of the whole recording
+
+    Returns:
+        SpeechInput: ``audio`` is float32 at 16 kHz, ready for ``transcribe_audio``
+    """
+    with span("decode"):
+        audio, sr = decode_audio_bytes(data, target_sr=target_sr)
+    with span("vad"):
+        timestamps, trimmed = analyze_speech(audio, sr, threshold=threshold)
+    speech = trimmed is not None
+    return SpeechInput(speech, trimmed if (speech and trim) else audio, sr, timestamps)
+
+def get_speech_timestamps_vad(audio_path, threshold=0.5, min_speech_duration_ms=250, min_silence_duration_ms=100,
+                              sr=16000):
+    """
+    Silero speech segments (sample offsets) of a file, or of in-memory samples at ``sr``
+    (e.g. one block of ``stream_decode``).
+    """
+    if isinstance(audio_path, str):
+        audio, sr = load_audio(audio_path)
+    else:
+        audio = audio_path
+    speech_timestamps, _ = analyze_speech(
         audio,
-        model,
-        sampling_rate=sr,
+        sr,
         threshold=threshold,
         min_speech_duration_ms=min_speech_duration_ms,
         min_silence_duration_ms=min_silence_duration_ms
@@ -33,17 +186,11 @@ def has_speech(audio_path, threshold=0.5):
 
 def trim_silence(audio_path, output_path=None, threshold=0.5):
     audio, sr = load_audio(audio_path)
-    speech_timestamps = get_speech_timestamps(
-        audio,
-        model,
-        sampling_rate=sr,
-        threshold=threshold
-    )
-    if not speech_timestamps:
+    _, speech_audio = analyze_speech(audio, sr, threshold=threshold)
+    if speech_audio is None:
         return None
-    # Concatenate all speech segments
-    speech_audio = np.concatenate([audio[t['start']:t['end']] for t in speech_timestamps])
     if output_path:
         sf.write(output_path, speech_audio, sr)
+        io_stats["bytes_written"] += speech_audio.nbytes
         return output_path
     return speech_audio
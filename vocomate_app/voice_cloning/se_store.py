@@ -0,0 +1,154 @@
+# voice_cloning/se_store.py
+import hashlib
+import os
+import threading
+
+from vocomate_app.utils.model_registry import OPENVOICE_CONVERTER_DIR, REPO_ROOT
+
+DEFAULT_CACHE_DIR = os.path.join(REPO_ROOT, 'vocomate_app', 'assets', 'se_cache')
+# OpenVoice v2 ships precomputed embeddings of every MeloTTS base speaker here
+BASE_SPEAKER_SES_DIR = os.path.join(os.path.dirname(OPENVOICE_CONVERTER_DIR), 'base_speakers', 'ses')
+
+
+class _FileDigests:
+    """sha256 of files, recomputed only when size or mtime change."""
+
+    def __init__(self):
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, path):
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        stamp = (st.st_size, st.st_mtime_ns)
+        with self._lock:
+            cached = self._cache.get(path)
+            if cached and cached[0] == stamp:
+                return cached[1]
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha.update(block)
+        digest = sha.hexdigest()[:16]
+        with self._lock:
+            self._cache[path] = (stamp, digest)
+        return digest
+
+
+file_digest = _FileDigests()
+
+
+def base_speaker_key(speaker):
+    """MeloTTS speaker name -> OpenVoice embedding file name ("EN-Default" -> "en-default")."""
+    return speaker.lower().replace("_", "-")
+
+
+def _extract_se(audio_path, converter):
+    from openvoice import se_extractor
+    se = se_extractor.get_se(audio_path, converter, vad=True)
+    return se[0] if isinstance(se, tuple) else se
+
+
+class SpeakerEmbeddingStore:
+    """
+    Content-addressed cache of OpenVoice speaker embeddings (memory + disk).
+
+    Target embeddings are keyed by the sha256 of the reference recording, source
+    embeddings by MeloTTS language/speaker; both also include the converter
+    checkpoint hash, so a new reference file or checkpoint never reuses a stale
+    embedding. In steady state a clone turn does no embedding extraction at all.
+
+    Args:
+        cache_dir (str): Directory for the persisted ``.pth`` embeddings
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._memory = {}
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "extractions": 0}
+
+    def _get(self, key, device, compute):
+        import torch
+
+        with self._lock:
+            if (key, device) in self._memory:
+                self.stats["memory_hits"] += 1
+                return self._memory[(key, device)]
+        path = os.path.join(self.cache_dir, f"{key}.pth")
+        if os.path.exists(path):
+            se = torch.load(path, map_location=device)
+            self.stats["disk_hits"] += 1
+        else:
+            se = compute()
+            self.stats["extractions"] += 1
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            torch.save(se.detach().cpu(), tmp_path)
+            os.replace(tmp_path, path)
+            se = se.to(device)
+        with self._lock:
+            self._memory[(key, device)] = se
+        return se
+
+    def target_se(self, reference_audio_path, converter, checkpoint_path):
+        """
+        Embedding of the voice to clone.
+
+        Args:
+            reference_audio_path (str): Reference recording (e.g. my_voic.wav)
+            converter: Loaded ToneColorConverter
+            checkpoint_path (str): Converter checkpoint the embedding is valid for
+        """
+        key = f"target-{file_digest(reference_audio_path)}-{file_digest(checkpoint_path)}"
+        return self._get(key, converter.device, lambda: _extract_se(reference_audio_path, converter))
+
+    def source_se(self, language, speaker, converter, checkpoint_path, base_audio_path=None, base_audio=None):
+        """
+        Embedding of a MeloTTS base speaker.
+
+        Uses OpenVoice's precomputed base speaker embedding when shipped with the
+        checkpoints, otherwise extracts it once from any MeloTTS output of that
+        speaker -- ``base_audio_path`` on disk or ``base_audio=(samples, sample_rate)``
+        in memory -- and persists it.
+        """
+        key = f"source-{language}-{base_speaker_key(speaker)}-{file_digest(checkpoint_path)}"
+
+        def compute():
+            import torch
+
+            shipped = os.path.join(BASE_SPEAKER_SES_DIR, f"{base_speaker_key(speaker)}.pth")
+            if os.path.exists(shipped):
+                return torch.load(shipped, map_location=converter.device)
+            if base_audio is not None:
+                from vocomate_app.voice_cloning.tone_converter import extract_se_from_audio
+                return extract_se_from_audio(base_audio[0], base_audio[1], converter)
+            if base_audio_path is None:
+                raise ValueError(f"No embedding for MeloTTS speaker '{speaker}' and no base audio to extract it from")
+            return _extract_se(base_audio_path, converter)
+
+        return self._get(key, converter.device, compute)
+
+    def precompute_sources(self, speakers, converter, checkpoint_path, synthesize):
+        """
+        Fills the store for a list of ``(language, speaker)`` pairs ahead of time.
+
+        Args:
+            synthesize (callable): ``synthesize(language, speaker) -> wav path`` used only
+                for speakers that have no shipped embedding
+        """
+        for language, speaker in speakers:
+            shipped = os.path.join(BASE_SPEAKER_SES_DIR, f"{base_speaker_key(speaker)}.pth")
+            base_audio_path = None if os.path.exists(shipped) else synthesize(language, speaker)
+            self.source_se(language, speaker, converter, checkpoint_path, base_audio_path=base_audio_path)
+
+    def clear(self, disk=False):
+        with self._lock:
+            self._memory.clear()
+        if disk and os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".pth"):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+
+se_store = SpeakerEmbeddingStore(os.environ.get("VOCOMATE_SE_CACHE_DIR", DEFAULT_CACHE_DIR))
@@ -0,0 +1,105 @@
+# voice_cloning/tone_converter.py
+import numpy as np
+
+
+def _resample(audio, sample_rate, target_sr):
+    audio = np.asarray(audio, dtype=np.float32)
+    if sample_rate == target_sr:
+        return audio
+    import librosa
+    return librosa.resample(audio, orig_sr=sample_rate, target_sr=target_sr)
+
+
+def _spectrogram(audio, converter):
+    import torch
+    from openvoice.mel_processing import spectrogram_torch
+
+    hps = converter.hps
+    y = torch.from_numpy(audio).float().to(converter.device).unsqueeze(0)
+    return spectrogram_torch(
+        y, hps.data.filter_length, hps.data.sampling_rate, hps.data.hop_length, hps.data.win_length, center=False
+    ).to(converter.device)
+
+
+def extract_se_from_audio(audio, sample_rate, converter):
+    """
+    Speaker embedding of an in-memory waveform (same computation as ToneColorConverter.extract_se).
+
+    Meant for clean synthetic speech such as MeloTTS output; recordings should go
+    through se_extractor.get_se, which also applies VAD and segmentation.
+    """
+    import torch
+
+    audio = _resample(audio, sample_rate, converter.hps.data.sampling_rate)
+    with torch.no_grad():
+        spec = _spectrogram(audio, converter)
+        return converter.model.ref_enc(spec.transpose(1, 2)).unsqueeze(-1).detach()
+
+
+def convert_tone(audio, sample_rate, src_se, tgt_se, converter, tau=0.3, message="@MyShell"):
+    """
+    Runs OpenVoice tone-colour conversion on an in-memory waveform.
+
+    Mirrors ToneColorConverter.convert but takes and returns arrays instead of file paths.
+
+    Args:
+        audio (np.ndarray): Source speech (e.g. MeloTTS output)
+        sample_rate (int): Sample rate of ``audio``; resampled to the converter's rate
+        src_se, tgt_se (torch.Tensor): Source / target speaker embeddings
+        converter: Loaded ToneColorConverter
+        tau (float): Conversion strength
+        message (str, optional): Watermark, applied only when the converter has a watermark model
+
+    Returns:
+        tuple[np.ndarray, int]: Converted float32 samples and their sample rate
+    """
+    import torch
+
+    target_sr = converter.hps.data.sampling_rate
+    audio = _resample(audio, sample_rate, target_sr)
+    with torch.no_grad():
+        spec = _spectrogram(audio, converter)
+        spec_lengths = torch.LongTensor([spec.size(-1)]).to(converter.device)
+        out = converter.model.voice_conversion(spec, spec_lengths, sid_src=src_se, sid_tgt=tgt_se, tau=tau)
+        out = out[0][0, 0].data.cpu().float().numpy()
+    if message and getattr(converter, "watermark_model", None) is not None:
+        out = converter.add_watermark(out, message)
+    return out, target_sr
+
+
+def convert_tone_batch(audios, sample_rate, src_se, tgt_se, converter, tau=0.3, message="@MyShell"):
+    """
+    ``convert_tone`` for several waveforms in one forward pass.
+
+    Spectrograms are zero-padded to the longest one and masked by their lengths,
+    so each output matches converting it alone; group inputs of similar length
+    to keep the padding (wasted compute) small.
+
+    Args:
+        audios (list[np.ndarray]): Source speech, all at ``sample_rate``
+        src_se, tgt_se (torch.Tensor): Speaker embeddings shared by the whole batch
+
+    Returns:
+        list[tuple[np.ndarray, int]]: Converted samples and sample rate, in input order
+    """
+    import torch
+
+    target_sr = converter.hps.data.sampling_rate
+    hop_length = converter.hps.data.hop_length
+    with torch.no_grad():
+        specs = [_spectrogram(_resample(audio, sample_rate, target_sr), converter)[0] for audio in audios]
+        lengths = [spec.size(-1) for spec in specs]
+        batch = torch.zeros(len(specs), specs[0].size(0), max(lengths), device=converter.device)
+        for i, spec in enumerate(specs):
+            batch[i, :, :lengths[i]] = spec
+        spec_lengths = torch.LongTensor(lengths).to(converter.device)
+        out = converter.model.voice_conversion(batch, spec_lengths, sid_src=src_se.expand(len(specs), -1, -1),
+                                               sid_tgt=tgt_se.expand(len(specs), -1, -1), tau=tau)
+        out = out[0][:, 0].data.cpu().float().numpy()
+    results = []
+    for i, length in enumerate(lengths):
+        samples = out[i, :length * hop_length]
+        if message and getattr(converter, "watermark_model", None) is not None:
+            samples = converter.add_watermark(samples, message)
+        results.append((samples, target_sr))
+    return results